@@ -1,31 +1,174 @@
-from flask import Flask, request, jsonify
+import time
+
+_IMPORT_START = time.perf_counter()
+
+from flask import Flask, Response, g, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
-import tensorflow as tf
 import numpy as np
+import argparse
+import atexit
+import hmac
+import json
 import logging
 import os
+import subprocess
+import sys
+import threading
 import traceback
 
+from attributions import explain, reference_patient
+from audit_log import AuditLog
+from batching import MicroBatcher, BatcherQueueFull, DeadlineExceeded
+from bulk_jobs import BulkJobManager, JobQueueFull, UploadTooLarge
+from canary import CanaryProber
+from drift import DriftMonitor, load_reference
+from engines import load_candidate, load_engine
+from inference_pool import InferencePool, candidate_configs, configure_threads, measure_throughput
+from input_schema import BOOLEAN_VOCABULARY, FeatureSpec, InputSchema
+from metrics import MetricsRegistry, StageTimer, NULL_TIMER
+from numpy_runtime import NumpyMLP
+from prediction_cache import PredictionCache
+from shadow import ShadowScorer
+from shared_weights import write_shared_weights
+import wire_formats
+
 # ---------------------------------------------------
-# 1. SETUP & LOAD MODEL
+# 1. SETUP
 # ---------------------------------------------------
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("FlaskBackend")
 
+# Boot phases (import / load / warm-up), logged once when the model is ready
+STARTUP_TIMINGS = {'import_ms': (time.perf_counter() - _IMPORT_START) * 1000.0}
+
 # Get the base directory of your project
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Load the Keras model
 MODEL_PATH = os.path.join(BASE_DIR, "..", "artifacts_nn", "best_nn_model.keras")
 
-logger.info(f"Loading TensorFlow Keras model from {MODEL_PATH}...")
+# TensorFlow-free export of the same model (see scripts/export_numpy_model.py)
+NUMPY_MODEL_PATH = os.path.join(BASE_DIR, "..", "artifacts_nn", "best_nn_model.npz")
+
+# 'auto' uses the NumPy export when present, otherwise the Keras model.
+# 'int8' / 'float16' serve a quantized copy of the NumPy export.
+# 'traced' serves the Keras model through pre-traced fixed-shape functions.
+# 'mmap' maps SHARED_WEIGHTS_PATH so forked workers share one copy of the weights.
+INFERENCE_ENGINE = os.environ.get("INFERENCE_ENGINE", "auto")
+
+# Pointer to the flat, memory-mappable weights used by the 'mmap' engine (written by serve_workers.py)
+SHARED_WEIGHTS_PATH = os.environ.get(
+    "SHARED_WEIGHTS_PATH", os.path.join(BASE_DIR, "..", "artifacts_nn", "best_nn_model.weights")
+)
+
+# Hot reload: poll the model files every N seconds (0 disables the watcher) and
+# require this token in X-Admin-Token for POST /admin/reload (unset: no check)
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", 0))
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Drift monitor, canary prober and model watcher threads. serve_workers.py sets this
+# to 0 so its supervisor runs none of them and each forked worker starts its own
+BACKGROUND_SERVICES = os.environ.get("BACKGROUND_SERVICES", "1") == "1"
+
+# Shadow scoring: candidate models (.npz/.keras files, or directories of them,
+# comma-separated) scored on a sample of production batches off the response path
+SHADOW_MODELS = [p for p in os.environ.get("SHADOW_MODELS", "").split(",") if p.strip()]
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", 1.0))
+SHADOW_QUEUE_SIZE = int(os.environ.get("SHADOW_QUEUE_SIZE", 64))
+SHADOW_NICENESS = int(os.environ.get("SHADOW_NICENESS", 10))
+
+# Canary prober: the /debug and /test-low-risk patients, plus any in CANARY_PATIENTS
+# (a JSON file {"name": {"patient": {...}, "expected_class": 0/1, "expected_probability": percent}}),
+# scored through the micro-batcher, unshadowed, every CANARY_INTERVAL seconds (0 disables it)
+CANARY_INTERVAL = float(os.environ.get("CANARY_INTERVAL", 30))
+CANARY_PATIENTS = os.environ.get("CANARY_PATIENTS")
+CANARY_DRIFT_TOLERANCE = float(os.environ.get("CANARY_DRIFT_TOLERANCE", 0.01))
+CANARY_LATENCY_SLO_MS = float(os.environ.get("CANARY_LATENCY_SLO_MS", 250))
+CANARY_TIMEOUT = float(os.environ.get("CANARY_TIMEOUT", 5))
+
+# Input drift: request features are histogrammed and compared every DRIFT_INTERVAL
+# seconds (once DRIFT_MIN_ROWS have arrived) with the training-data histograms
+# written by scripts/drift_reference.py; PSI above DRIFT_PSI_THRESHOLD counts as drift
+DRIFT_REFERENCE_PATH = os.environ.get(
+    "DRIFT_REFERENCE_PATH", os.path.join(BASE_DIR, "..", "artifacts_nn", "drift_reference.npz")
+)
+DRIFT_INTERVAL = float(os.environ.get("DRIFT_INTERVAL", 60))
+DRIFT_MIN_ROWS = int(os.environ.get("DRIFT_MIN_ROWS", 500))
+DRIFT_PSI_THRESHOLD = float(os.environ.get("DRIFT_PSI_THRESHOLD", 0.2))
+
+# Batch-size buckets traced (and warmed) at startup by the 'traced' engine
+TRACED_BUCKETS = [int(b) for b in os.environ.get("TRACED_BUCKETS", "1,8,32,256").split(",")]
+
+# Micro-batching: concurrent /predict calls are coalesced into one forward pass
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 64))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", 2.0))
+BATCH_MAX_QUEUE = int(os.environ.get("BATCH_MAX_QUEUE", 1024))
+
+# Deadlines: clients may send their remaining time budget (ms) in this header and
+# /predict work still queued when it runs out is dropped before the forward pass
+# (DEFAULT_REQUEST_TIMEOUT_MS applies when the header is absent; 0 means no deadline)
+REQUEST_TIMEOUT_HEADER = os.environ.get("REQUEST_TIMEOUT_HEADER", "X-Request-Timeout-Ms")
+DEFAULT_REQUEST_TIMEOUT_MS = float(os.environ.get("DEFAULT_REQUEST_TIMEOUT_MS", 0))
+
+# In-process LRU cache of /predict results (size 0 disables it)
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 10000))
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", 300))
+
+# Sampled JSON-lines audit log of /predict calls, written off the request thread
+# (sample rate 0 disables it; forked workers append their pid to the file name)
+AUDIT_LOG_PATH = os.environ.get("AUDIT_LOG_PATH", os.path.join(BASE_DIR, "logs", "requests.jsonl"))
+AUDIT_LOG_SAMPLE_RATE = float(os.environ.get("AUDIT_LOG_SAMPLE_RATE", 1.0))
+AUDIT_LOG_QUEUE_SIZE = int(os.environ.get("AUDIT_LOG_QUEUE_SIZE", 10000))
+AUDIT_LOG_MAX_BYTES = int(os.environ.get("AUDIT_LOG_MAX_BYTES", 50 * 1024 * 1024))
+AUDIT_LOG_BACKUPS = int(os.environ.get("AUDIT_LOG_BACKUPS", 5))
+
+# Features missing from a payload are filled with 0.0 ('fill') or rejected ('reject')
+MISSING_FEATURE_POLICY = os.environ.get("MISSING_FEATURE_POLICY", "fill")
+
+# Upper bound on patients accepted by one /predict/batch call
+BATCH_ENDPOINT_MAX_ROWS = int(os.environ.get("BATCH_ENDPOINT_MAX_ROWS", 10000))
+
+# /explain: attribution method ('auto', 'integrated_gradients' or 'occlusion'),
+# interpolation steps, patients per call and a cache of explanations (size 0 disables it)
+EXPLAIN_METHOD = os.environ.get("EXPLAIN_METHOD", "auto")
+EXPLAIN_STEPS = int(os.environ.get("EXPLAIN_STEPS", 32))
+EXPLAIN_MAX_ROWS = int(os.environ.get("EXPLAIN_MAX_ROWS", 256))
+EXPLANATION_CACHE_SIZE = int(os.environ.get("EXPLANATION_CACHE_SIZE", 2000))
+EXPLANATION_CACHE_TTL = float(os.environ.get("EXPLANATION_CACHE_TTL", 3600))
+
+# /predict/sweep: grid points per axis when only a range is given, and the largest grid scored
+SWEEP_DEFAULT_STEPS = int(os.environ.get("SWEEP_DEFAULT_STEPS", 50))
+SWEEP_MAX_POINTS = int(os.environ.get("SWEEP_MAX_POINTS", 40000))
 
-try:
-    model = tf.keras.models.load_model(MODEL_PATH)
-    logger.info("Keras model loaded successfully.")
-except Exception as e:
-    logger.error(f"CRITICAL: Could not load Keras model: {e}")
-    exit(1)
+# Partial-dependence/ICE curves precomputed by scripts/partial_dependence.py
+PARTIAL_DEPENDENCE_PATH = os.environ.get(
+    "PARTIAL_DEPENDENCE_PATH", os.path.join(BASE_DIR, "..", "artifacts_nn", "partial_dependence.npz")
+)
+
+# /predict/stream scores uploads in chunks of this many rows; memory per
+# stream stays below roughly STREAM_BATCH_ROWS * STREAM_MAX_LINE_BYTES
+STREAM_BATCH_ROWS = int(os.environ.get("STREAM_BATCH_ROWS", 1024))
+STREAM_MAX_LINE_BYTES = int(os.environ.get("STREAM_MAX_LINE_BYTES", 64 * 1024))
+
+# Bulk scoring jobs (/jobs): CSV/Parquet uploads scored by their own low-priority threads
+JOB_DIR = os.environ.get("JOB_DIR", os.path.join(BASE_DIR, "jobs"))
+JOB_MAX_CONCURRENT = int(os.environ.get("JOB_MAX_CONCURRENT", 1))
+JOB_MAX_QUEUED = int(os.environ.get("JOB_MAX_QUEUED", 8))
+JOB_CHUNK_ROWS = int(os.environ.get("JOB_CHUNK_ROWS", 4096))
+JOB_NICENESS = int(os.environ.get("JOB_NICENESS", 10))
+JOB_MAX_UPLOAD_BYTES = int(os.environ.get("JOB_MAX_UPLOAD_BYTES", 512 * 1024 * 1024))
+
+# Inference worker pool for latency-critical traffic: at most INFERENCE_WORKERS forward
+# passes run at once, each using INFERENCE_INTRA_OP_THREADS BLAS/TensorFlow threads (and
+# INFERENCE_INTER_OP_THREADS TensorFlow inter-op threads). Bulk jobs and shadow candidates
+# score on their own niced threads outside the pool, but every forward-pass thread counts
+# against the host's cores. 0 picks a split of them; tune it with `python app.py --benchmark-threads`.
+CPU_COUNT = os.cpu_count() or 1
+BACKGROUND_INFERENCE_THREADS = JOB_MAX_CONCURRENT + (1 if SHADOW_MODELS else 0)
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", 0)) or max(1, min(4, CPU_COUNT // 2))
+INFERENCE_INTRA_OP_THREADS = int(os.environ.get("INFERENCE_INTRA_OP_THREADS", 0)) or \
+    max(1, CPU_COUNT // (INFERENCE_WORKERS + BACKGROUND_INFERENCE_THREADS))
+INFERENCE_INTER_OP_THREADS = int(os.environ.get("INFERENCE_INTER_OP_THREADS", 1))
 
 app = Flask(__name__)
 CORS(app)
@@ -57,133 +200,1344 @@ FRONTEND_TO_BACKEND = {
     'Thallium': 'thallium'
 }
 
+SEX_VOCABULARY = {'male': 1.0, 'm': 1.0, 'female': 0.0, 'f': 0.0, **BOOLEAN_VOCABULARY}
 
-@app.route('/', methods=['GET'])
-def home():
-    return jsonify({
+# Valid range and accepted words of every feature, in EXPECTED_FEATURES_ORDER
+FEATURE_RULES = {
+    'age': dict(low=0, high=120),
+    'sex': dict(low=0, high=1, vocabulary=SEX_VOCABULARY),
+    'chest_pain_type': dict(low=1, high=4),
+    'bp': dict(low=50, high=250),
+    'cholesterol': dict(low=50, high=700),
+    'fbs_over_120': dict(low=0, high=1, vocabulary=BOOLEAN_VOCABULARY),
+    'ekg_results': dict(low=0, high=2),
+    'max_hr': dict(low=40, high=250),
+    'exercise_angina': dict(low=0, high=1, vocabulary=BOOLEAN_VOCABULARY),
+    'st_depression': dict(low=0, high=10),
+    'slope_of_st': dict(low=1, high=3),
+    'number_of_vessels_fluro': dict(low=0, high=3),
+    'thallium': dict(low=3, high=7),
+}
+
+BACKEND_TO_FRONTEND = {backend_key: frontend_key for frontend_key, backend_key in FRONTEND_TO_BACKEND.items()}
+
+input_schema = InputSchema(
+    [FeatureSpec(name, aliases=(BACKEND_TO_FRONTEND[name],), **FEATURE_RULES[name])
+     for name in EXPECTED_FEATURES_ORDER],
+    missing_policy=MISSING_FEATURE_POLICY
+)
+
+
+# ---------------------------------------------------
+# 3. LOAD MODEL
+# ---------------------------------------------------
+# The model is loaded and warmed in a background thread so the server can
+# answer liveness probes immediately; /ready turns 200 once it is done.
+engine = None
+model_ready = threading.Event()
+
+# Thread counts are fixed before any engine (and TensorFlow) is loaded
+inference_pool = InferencePool(workers=INFERENCE_WORKERS)
+inference_pool.settings = configure_threads(INFERENCE_INTRA_OP_THREADS, INFERENCE_INTER_OP_THREADS)
+
+# Endpoints that must answer while the model is still loading
+LIVENESS_ENDPOINTS = {'home', 'health', 'ready', 'stats', 'metrics_endpoint'}
+
+
+# Hot reload state: one reload at a time, reported under /stats
+reload_lock = threading.Lock()
+# last_reload_at is the last swap; last_checked_at the last reload attempt, swapped or not
+RELOAD_STATUS = {'state': 'idle', 'reloads': 0, 'last_reload_at': None, 'last_checked_at': None, 'last_error': None}
+
+
+def build_engine():
+    """Load and warm a fresh engine from the artifacts on disk; returns (engine, load ms, warm-up ms)"""
+    start = time.perf_counter()
+    if INFERENCE_ENGINE == 'mmap' and model_ready.is_set():
+        # A reload re-flattens the current export into a new content-hashed pair and swaps the pointer;
+        # workers reloading at the same time write identical files, and ones still mapping the old pair keep it
+        write_shared_weights(NumpyMLP.load(NUMPY_MODEL_PATH), SHARED_WEIGHTS_PATH)
+    loaded = load_engine(INFERENCE_ENGINE, EXPECTED_FEATURES_ORDER, MODEL_PATH, NUMPY_MODEL_PATH,
+                         buckets=TRACED_BUCKETS, shared_path=SHARED_WEIGHTS_PATH)
+    load_ms = (time.perf_counter() - start) * 1000.0
+
+    # Warm-up: one forward pass per typical shape before the engine takes traffic
+    start = time.perf_counter()
+    for rows in sorted({1, BATCH_MAX_SIZE}):
+        loaded.predict(np.zeros((rows, len(EXPECTED_FEATURES_ORDER)), dtype=np.float32))
+    return loaded, load_ms, (time.perf_counter() - start) * 1000.0
+
+
+def load_shadow_candidates():
+    """{name: engine} for every SHADOW_MODELS file; candidates that fail to load are skipped"""
+    paths = []
+    for entry in SHADOW_MODELS:
+        entry = entry.strip()
+        if os.path.isdir(entry):
+            paths.extend(os.path.join(entry, f) for f in sorted(os.listdir(entry)) if f.endswith(('.npz', '.keras')))
+        else:
+            paths.append(entry)
+
+    production = {os.path.realpath(MODEL_PATH), os.path.realpath(NUMPY_MODEL_PATH)}
+    candidates = {}
+    for path in paths:
+        if os.path.realpath(path) in production:
+            continue
+        try:
+            candidate = load_candidate(path, EXPECTED_FEATURES_ORDER)
+        except Exception as e:
+            logger.error(f"Skipping shadow candidate {path}: {e}")
+            continue
+        candidates[os.path.basename(path)] = candidate
+        logger.info(f"Shadow candidate {os.path.basename(path)} loaded ({candidate.name} engine, "
+                    f"version {candidate.version}).")
+    return candidates
+
+
+def load_and_warm_model():
+    global engine
+    try:
+        loaded, load_ms, warmup_ms = build_engine()
+        STARTUP_TIMINGS['load_ms'] = load_ms
+        logger.info(f"Model loaded successfully ({loaded.name} engine, version {loaded.version}).")
+
+        # Then one trip through the batcher
+        start = time.perf_counter()
+        engine = loaded
+        batcher.predict(np.zeros(len(EXPECTED_FEATURES_ORDER), dtype=np.float32))
+        STARTUP_TIMINGS['warmup_ms'] = warmup_ms + (time.perf_counter() - start) * 1000.0
+        # Candidates join after the warm-up so its all-zero row is not shadowed
+        if SHADOW_MODELS:
+            shadow.candidates = load_shadow_candidates()
+    except Exception as e:
+        logger.error(f"CRITICAL: Could not load model: {e}")
+        os._exit(1)
+
+    STARTUP_TIMINGS['total_ms'] = (time.perf_counter() - _IMPORT_START) * 1000.0
+    model_ready.set()
+    logger.info("Startup timings: " + ", ".join(f"{k[:-3]}={v:.1f} ms" for k, v in STARTUP_TIMINGS.items()))
+
+
+def reload_model(force=False):
+    """Load and warm the model files on disk, then swap them in for new requests.
+
+    Requests already holding the old engine finish on it; the swap is one
+    reference assignment. Returns False if a reload is already running or
+    the files could not be loaded, True once they were.
+    """
+    if not reload_lock.acquire(blocking=False):
+        return False
+    return _reload_holding_lock(force)
+
+
+def _reload_holding_lock(force):
+    """Body of reload_model for a caller that already holds reload_lock; releases it. Returns success"""
+    global engine
+    try:
+        RELOAD_STATUS['state'] = 'loading'
+        loaded, load_ms, warmup_ms = build_engine()
+        previous = engine
+        if force or previous is None or loaded.version != previous.version:
+            engine = loaded
+            RELOAD_STATUS['reloads'] += 1
+            RELOAD_STATUS['last_reload_at'] = time.time()
+            logger.info(f"Model reloaded: version {previous.version if previous else None} -> {loaded.version} "
+                        f"(load {load_ms:.1f} ms, warm-up {warmup_ms:.1f} ms)")
+        else:
+            logger.info(f"Model files unchanged (version {loaded.version}); keeping the current engine")
+        RELOAD_STATUS.update(state='idle', last_checked_at=time.time(), last_error=None)
+        return True
+    except Exception as e:
+        logger.error(f"Model reload failed, still serving version {engine.version if engine else None}: {e}")
+        RELOAD_STATUS.update(state='failed', last_checked_at=time.time(), last_error=str(e))
+        return False
+    finally:
+        reload_lock.release()
+
+
+def start_reload(force=False):
+    """Run reload_model in the background; returns False if one is already running.
+
+    The lock is taken here, in the caller's thread, and handed to the
+    reloader thread, so two requests cannot both be told a reload started.
+    """
+    if not reload_lock.acquire(blocking=False):
+        return False
+    try:
+        threading.Thread(target=_reload_holding_lock, args=(force,), name="ModelReloader", daemon=True).start()
+    except Exception:
+        reload_lock.release()
+        raise
+    return True
+
+
+def watch_model_files():
+    """Reload when the model files change and have stopped changing for one poll interval"""
+    def signature():
+        stats = []
+        for path in (MODEL_PATH, NUMPY_MODEL_PATH):
+            try:
+                st = os.stat(path)
+                stats.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stats.append(None)
+        return stats
+
+    model_ready.wait()
+    loaded_signature = previous = signature()
+    while True:
+        time.sleep(MODEL_WATCH_INTERVAL)
+        current = signature()
+        # Wait for a second identical reading so a file still being copied is not loaded
+        if current != loaded_signature and current == previous:
+            logger.info("Model files changed on disk; reloading")
+            # A busy lock means another reload may have read the files mid-copy, and a failed
+            # one loaded nothing: keep the old signature so the next poll tries again
+            if reload_model():
+                loaded_signature = current
+                logger.info(f"Model files at version {engine.version} are loaded")
+            else:
+                logger.warning("Model reload did not complete; retrying on the next poll")
+        previous = current
+
+
+def predict_matrix(matrix, shadowed=True, background=False):
+    """Score an (n, 13) float32 matrix in EXPECTED_FEATURES_ORDER with one forward pass.
+
+    Returns (probabilities, model version). The engine is read once, so a
+    concurrent hot reload never mixes versions within one call. Unless
+    `shadowed` is False the same matrix is queued for the shadow candidates;
+    a boolean row mask queues only the rows it marks.
+    The forward pass runs on the inference pool, or with `background` on the
+    calling (low-priority) thread so it never holds a pool worker.
+    """
+    current = engine
+    probs = current.predict(matrix) if background else inference_pool.run(current.predict, matrix)
+    if shadowed is True:
+        shadow.submit(matrix, probs)
+    elif shadowed is not False and np.any(shadowed):
+        shadow.submit(matrix[shadowed], np.asarray(probs).reshape(-1)[shadowed])
+    return probs, current.version
+
+
+batcher = MicroBatcher(
+    predict_matrix,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    max_queue_size=BATCH_MAX_QUEUE,
+    tagged=True,
+    # metrics is created further down; it is only looked up when rows expire
+    on_expired=lambda rows: metrics.inc('requests_shed_total', rows, stage='batcher')
+)
+
+prediction_cache = PredictionCache(
+    max_size=PREDICTION_CACHE_SIZE,
+    ttl_seconds=PREDICTION_CACHE_TTL,
+    watched_paths=[MODEL_PATH, NUMPY_MODEL_PATH, SHARED_WEIGHTS_PATH]
+)
+
+# Explanations are keyed on the feature vector; entries carry the model version that made them
+explanation_cache = PredictionCache(
+    max_size=EXPLANATION_CACHE_SIZE,
+    ttl_seconds=EXPLANATION_CACHE_TTL,
+    watched_paths=[MODEL_PATH, NUMPY_MODEL_PATH, SHARED_WEIGHTS_PATH]
+)
+
+audit_log = AuditLog(
+    AUDIT_LOG_PATH,
+    sample_rate=AUDIT_LOG_SAMPLE_RATE,
+    max_queue_size=AUDIT_LOG_QUEUE_SIZE,
+    max_bytes=AUDIT_LOG_MAX_BYTES,
+    backup_count=AUDIT_LOG_BACKUPS
+)
+atexit.register(audit_log.close)
+
+
+def score_frame(frame, first_row):
+    """Bulk-job scorer: result columns for one DataFrame chunk shaped like dataset/test.csv"""
+    import pandas as pd
+
+    n_rows = len(frame)
+    matrix, valid_rows, row_errors = input_schema.columns_to_matrix(
+        {column: frame[column].to_numpy() for column in frame.columns}, n_rows)
+
+    probs = np.full(n_rows, np.nan)
+    version = None
+    if valid_rows:
+        # Bulk work is scored on the niced job thread itself: not through the
+        # micro-batcher, the inference pool or the shadow candidates
+        scored = matrix if len(valid_rows) == n_rows else matrix[valid_rows]
+        scored_probs, version = predict_matrix(scored, shadowed=False, background=True)
+        probs[valid_rows] = np.clip(scored_probs, 0.0, 1.0)
+
+    errors = [None] * n_rows
+    for row_index, row_error in row_errors.items():
+        errors[row_index] = '; '.join(e['message'] for e in row_error)
+    ids = frame['id'].to_numpy() if 'id' in frame.columns else np.arange(first_row, first_row + n_rows)
+    return {
+        'id': ids,
+        # Nullable integers, so the CSV says 1/0 rather than 1.0/0.0 next to rows that failed
+        'prediction': pd.array([None if np.isnan(p) else int(p > 0.5) for p in probs], dtype='Int64'),
+        'probability': np.round(probs * 100, 2),
+        'model_version': version,
+        'error': errors
+    }
+
+
+bulk_jobs = BulkJobManager(
+    score_frame,
+    JOB_DIR,
+    max_concurrent=JOB_MAX_CONCURRENT,
+    max_queued=JOB_MAX_QUEUED,
+    chunk_rows=JOB_CHUNK_ROWS,
+    niceness=JOB_NICENESS,
+    max_upload_bytes=JOB_MAX_UPLOAD_BYTES
+)
+
+# Prometheus metrics served on /metrics (per process when running several workers)
+metrics = MetricsRegistry('vitalthrob')
+metrics.counter('requests_total', 'HTTP requests by endpoint and status code.')
+metrics.counter('request_errors_total', 'HTTP requests answered with a 4xx or 5xx status.')
+metrics.gauge('requests_in_flight', 'HTTP requests currently being handled.')
+metrics.histogram('request_duration_seconds', 'End-to-end request handling time.')
+metrics.histogram('predict_stage_seconds', 'Time spent in each stage of /predict.')
+metrics.gauge('batcher_queue_depth', 'Rows waiting in the micro-batcher queue.')
+metrics.gauge('prediction_cache_entries', 'Entries held by the prediction cache.')
+metrics.counter('requests_shed_total', 'Requests dropped unscored because their deadline passed, by stage.')
+
+# Candidates are filled in by the model loader once production is up
+shadow = ShadowScorer(
+    {},
+    metrics,
+    sample_rate=SHADOW_SAMPLE_RATE,
+    max_queue_size=SHADOW_QUEUE_SIZE,
+    niceness=SHADOW_NICENESS
+)
+
+
+
+def load_drift_reference():
+    """Training-data sketch for the drift monitor, or None when scripts/drift_reference.py has not run"""
+    try:
+        return load_reference(DRIFT_REFERENCE_PATH, EXPECTED_FEATURES_ORDER)
+    except FileNotFoundError:
+        logger.info(f"No drift reference at {DRIFT_REFERENCE_PATH}; input drift monitoring is off")
+    except Exception as e:
+        logger.error(f"Could not load the drift reference {DRIFT_REFERENCE_PATH}: {e}")
+    return None
+
+
+drift_monitor = DriftMonitor(
+    EXPECTED_FEATURES_ORDER,
+    load_drift_reference(),
+    metrics,
+    interval=DRIFT_INTERVAL,
+    min_rows=DRIFT_MIN_ROWS,
+    threshold=DRIFT_PSI_THRESHOLD
+)
+atexit.register(drift_monitor.close)
+
+threading.Thread(target=load_and_warm_model, name="ModelLoader", daemon=True).start()
+
+
+model_watcher = None
+
+
+def start_model_watcher():
+    global model_watcher
+    if MODEL_WATCH_INTERVAL > 0 and model_watcher is None:
+        model_watcher = threading.Thread(target=watch_model_files, name="ModelWatcher", daemon=True)
+        model_watcher.start()
+
+
+def restart_after_fork():
+    # Held locks do not survive fork(): forked workers get fresh ones, and
+    # their own watcher thread when the parent was running one
+    global reload_lock, partial_dependence_lock, model_watcher
+    reload_lock = threading.Lock()
+    partial_dependence_lock = threading.Lock()
+    was_watching = model_watcher is not None
+    model_watcher = None
+    if was_watching:
+        start_model_watcher()
+
+
+os.register_at_fork(after_in_child=restart_after_fork)
+
+
+@app.before_request
+def start_request_metrics():
+    # Registered before the readiness gate so rejected requests are counted too
+    g.request_start = time.perf_counter()
+    g.metrics_endpoint = request.endpoint or 'unmatched'
+    metrics.inc('requests_in_flight', endpoint=g.metrics_endpoint)
+
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = g.get('metrics_endpoint')
+    if endpoint is not None:
+        metrics.inc('requests_total', endpoint=endpoint, status=response.status_code)
+        if response.status_code >= 400:
+            metrics.inc('request_errors_total', endpoint=endpoint)
+    return response
+
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    # Streamed responses (stream_with_context) tear down only once their body has been sent
+    endpoint = g.pop('metrics_endpoint', None)
+    if endpoint is not None:
+        metrics.inc('requests_in_flight', -1, endpoint=endpoint)
+        metrics.observe('request_duration_seconds', time.perf_counter() - g.request_start, endpoint=endpoint)
+
+
+@app.before_request
+def reject_until_ready():
+    if not model_ready.is_set() and request.endpoint not in LIVENESS_ENDPOINTS:
+        response = jsonify({'error': 'Model is still loading', 'ready': False})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+
+# ---------------------------------------------------
+# 4. REQUEST HANDLERS
+# ---------------------------------------------------
+# Framework-independent bodies of the routes below; asgi_app.py serves the
+# same functions, so both front-ends return identical JSON.
+HIGH_RISK_TEST_PATIENT = {
+    'age': 65.0, 'sex': 1.0, 'chest_pain_type': 4.0, 'bp': 180.0, 'cholesterol': 300.0,
+    'fbs_over_120': 1.0, 'ekg_results': 2.0, 'max_hr': 120.0, 'exercise_angina': 1.0,
+    'st_depression': 4.5, 'slope_of_st': 3.0, 'number_of_vessels_fluro': 3.0, 'thallium': 7.0
+}
+
+LOW_RISK_TEST_PATIENT = {
+    'age': 40.0, 'sex': 0.0, 'chest_pain_type': 1.0, 'bp': 120.0, 'cholesterol': 180.0,
+    'fbs_over_120': 0.0, 'ekg_results': 0.0, 'max_hr': 160.0, 'exercise_angina': 0.0,
+    'st_depression': 0.5, 'slope_of_st': 1.0, 'number_of_vessels_fluro': 0.0, 'thallium': 3.0
+}
+
+
+def canary_patients():
+    """{name: canary} for the prober: the two built-in patients plus CANARY_PATIENTS"""
+    configured = {
+        'high_risk': {'patient': HIGH_RISK_TEST_PATIENT, 'expected_class': 1},
+        'low_risk': {'patient': LOW_RISK_TEST_PATIENT, 'expected_class': 0},
+    }
+    if CANARY_PATIENTS:
+        try:
+            with open(CANARY_PATIENTS) as f:
+                configured.update(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read CANARY_PATIENTS {CANARY_PATIENTS}: {e}")
+
+    canaries = {}
+    for name, entry in configured.items():
+        if not isinstance(entry, dict):
+            logger.error(f"Skipping canary {name}: expected an object with a \"patient\"")
+            continue
+        row, errors, _ = input_schema.to_row(entry.get('patient') or {})
+        if errors:
+            logger.error(f"Skipping canary {name}: {errors}")
+            continue
+        expected = entry.get('expected_probability')
+        canaries[name] = {
+            'row': row,
+            'expected_class': entry.get('expected_class'),
+            'expected_probability': None if expected is None else float(expected) / 100.0,
+        }
+    return canaries
+
+
+def canary_probe(row):
+    """One canary row through the same micro-batcher as /predict (never the prediction cache).
+
+    The row is marked unshadowed, so golden patients never reach the shadow
+    candidates' comparison stats while other rows of its batch still do.
+    """
+    return batcher.predict(row, timeout=CANARY_TIMEOUT, shadowed=False)
+
+
+canary = CanaryProber(
+    canary_probe,
+    canary_patients(),
+    metrics,
+    interval=CANARY_INTERVAL,
+    drift_tolerance=CANARY_DRIFT_TOLERANCE,
+    latency_slo_ms=CANARY_LATENCY_SLO_MS
+)
+atexit.register(canary.close)
+
+
+def start_background_services():
+    """Start the drift monitor, canary prober and model watcher threads (once per process)"""
+    drift_monitor.start()
+    canary.start(model_ready)
+    start_model_watcher()
+
+
+if BACKGROUND_SERVICES:
+    start_background_services()
+
+
+def service_info():
+    return {
         'message': 'Heart Disease Neural Network API is Running!',
         'status': 'Active',
-        'model_loaded': True,
+        'model_loaded': model_ready.is_set(),
+        'inference_engine': engine.name if engine is not None else None,
+        'model_version': engine.version if engine is not None else None,
         'expected_features': EXPECTED_FEATURES_ORDER,
-        'usage': 'Send a POST request to /predict with patient data.'
+        'usage': 'Send a POST request to /predict with patient data, '
+                 'or to /predict/batch with a list of patients.'
+    }
+
+
+def readiness():
+    """(body, status) of the readiness probe"""
+    is_ready = model_ready.is_set()
+    return {
+        'ready': is_ready,
+        'inference_engine': engine.name if engine is not None else None,
+        'model_version': engine.version if engine is not None else None,
+        'startup_timings_ms': STARTUP_TIMINGS
+    }, 200 if is_ready else 503
+
+
+def runtime_stats():
+    return {
+        'batcher': batcher.stats(),
+        'inference_pool': {**inference_pool.stats(), 'background_threads': BACKGROUND_INFERENCE_THREADS},
+        'prediction_cache': prediction_cache.stats(),
+        'explanation_cache': explanation_cache.stats(),
+        'audit_log': audit_log.stats(),
+        'bulk_jobs': bulk_jobs.stats(),
+        'model_reload': dict(RELOAD_STATUS),
+        'shadow': shadow.stats(),
+        'canary': canary.stats(),
+        'input_drift': drift_monitor.stats(),
+        'predict_stage_seconds': metrics.quantiles('predict_stage_seconds')
+    }
+
+
+def render_metrics():
+    """Prometheus text exposition of every metric, with point-in-time gauges refreshed"""
+    metrics.set('batcher_queue_depth', batcher.stats()['queue_depth'])
+    metrics.set('prediction_cache_entries', prediction_cache.stats()['size'])
+    return metrics.render()
+
+
+def request_deadline(timeout_ms, arrived):
+    """time.perf_counter() deadline for a request that arrived at `arrived`, or None.
+
+    `timeout_ms` is the REQUEST_TIMEOUT_HEADER value (None when absent);
+    raises ValueError when it is not a non-negative number.
+    """
+    if timeout_ms is None:
+        budget = DEFAULT_REQUEST_TIMEOUT_MS
+        return arrived + budget / 1000.0 if budget > 0 else None
+    budget = float(timeout_ms)
+    if not budget >= 0 or budget == float('inf'):
+        raise ValueError(f"{REQUEST_TIMEOUT_HEADER} must be a non-negative number of milliseconds")
+    return arrived + budget / 1000.0
+
+
+def check_deadline(deadline, stage):
+    """Raise DeadlineExceeded (and count the shed request) once `deadline` has passed"""
+    if deadline is not None and time.perf_counter() >= deadline:
+        metrics.inc('requests_shed_total', stage=stage)
+        raise DeadlineExceeded(f"Deadline passed before the request was scored ({stage})")
+
+
+def score_patient(data, timer=NULL_TIMER, deadline=None):
+    """(body, status) for one frontend patient dict; 400 lists every invalid field.
+
+    `timer` is marked after the tensor and forward stages. Raises
+    BatcherQueueFull when the micro-batcher is saturated and
+    DeadlineExceeded when `deadline` passes before the row is scored.
+    """
+    # Work that waited for a thread past its deadline is dropped before any of it is done
+    check_deadline(deadline, 'queue')
+
+    # 1. Convert the payload to a feature row in model order
+    row, errors, missing_features = input_schema.to_row(data)
+    timer.mark('tensor')
+    if errors:
+        return {'error': 'Invalid patient data', 'details': errors}, 400
+    drift_monitor.update(row[None, :])
+
+    # 2. Make prediction (repeats come from the cache, the rest are
+    #    coalesced with concurrent requests by the micro-batcher). Cache
+    #    entries from a model version that has since been reloaded are misses.
+    entry = prediction_cache.get(row)
+    cached = entry is not None and entry[1] == engine.version
+    if cached:
+        prediction_prob, model_version = entry
+    else:
+        prediction_prob, model_version = batcher.predict(row, deadline=deadline)
+        prediction_cache.put(row, (prediction_prob, model_version))
+    timer.mark('forward')
+
+    # Ensure probability is between 0 and 1 (sigmoid output should already be)
+    prediction_prob = max(0.0, min(1.0, prediction_prob))
+
+    prediction_class = int(prediction_prob > 0.5)
+    probability_pct = round(float(prediction_prob) * 100, 2)
+
+    audit_log.record({
+        'endpoint': 'predict',
+        'payload': data,
+        'missing': missing_features,
+        'prediction': prediction_class,
+        'probability': probability_pct,
+        'cached': cached,
+        'engine': engine.name,
+        'model_version': model_version
     })
 
+    return {
+        'prediction': prediction_class,
+        'probability': probability_pct,
+        'model_version': model_version,
+        'features_used': EXPECTED_FEATURES_ORDER,
+        'features_values': row.tolist()
+    }, 200
+
+
+def patient_payloads(data):
+    """(payloads, None) for a /predict/batch body, or (None, (error body, status))"""
+    payloads = data.get('patients') if isinstance(data, dict) else data
+    if not isinstance(payloads, list):
+        return None, ({'error': 'Expected a JSON list of patients or {"patients": [...]}'}, 400)
+    if len(payloads) > BATCH_ENDPOINT_MAX_ROWS:
+        return None, ({'error': f'At most {BATCH_ENDPOINT_MAX_ROWS} patients per request'}, 413)
+    return payloads, None
+
+
+def score_rows(matrix, valid_rows, n_rows):
+    """(clipped probabilities of `valid_rows`, model version) from a single forward pass"""
+    if not valid_rows:
+        return np.empty(0, dtype=np.float32), engine.version
+    scored = matrix if len(valid_rows) == n_rows else matrix[valid_rows]
+    drift_monitor.update(scored)
+    probs, model_version = predict_matrix(scored)
+    return np.clip(probs, 0.0, 1.0), model_version
+
+
+def batch_body(n_rows, valid_rows, probs, row_errors, model_version):
+    results = [None] * n_rows
+    for row_index, prob in zip(valid_rows, probs.tolist()):
+        results[row_index] = {
+            'index': row_index,
+            'prediction': int(prob > 0.5),
+            'probability': round(prob * 100, 2)
+        }
+    for row_index, errors in row_errors.items():
+        results[row_index] = {'index': row_index, 'error': errors[0]['message'], 'details': errors}
+
+    return {
+        'count': n_rows,
+        'scored': len(valid_rows),
+        'errors': len(row_errors),
+        'model_version': model_version,
+        'features_used': EXPECTED_FEATURES_ORDER,
+        'results': results
+    }
+
+
+def score_patients(data):
+    """(body, status) for a /predict/batch payload, scored with a single forward pass"""
+    payloads, error = patient_payloads(data)
+    if error:
+        return error
+
+    matrix, valid_rows, row_errors = input_schema.to_matrix(payloads)
+    probs, model_version = score_rows(matrix, valid_rows, len(payloads))
+
+    logger.info(f"Batch prediction: {len(valid_rows)} scored, {len(row_errors)} rejected")
+
+    return batch_body(len(payloads), valid_rows, probs, row_errors, model_version), 200
+
+
+def score_patients_wire(raw, input_format, output_format):
+    """(content, status, media type) for a /predict/batch body in any wire format.
+
+    MessagePack bodies carry the same structure as JSON ones; Arrow IPC
+    bodies carry one column per feature and are answered, when Arrow is
+    also accepted, with index/prediction/probability/error columns and the
+    summary in the schema metadata. Errors are sent as MessagePack when
+    that was accepted and as JSON otherwise.
+    """
+    error_format = 'msgpack' if output_format == 'msgpack' else 'json'
+
+    def encode(body, status, fmt):
+        if fmt == 'msgpack':
+            return wire_formats.encode_msgpack(body), status, wire_formats.media_type('msgpack')
+        return json.dumps(body).encode(), status, wire_formats.media_type('json')
+
+    try:
+        if input_format == 'arrow':
+            columns, n_rows = wire_formats.decode_arrow(raw)
+            if n_rows > BATCH_ENDPOINT_MAX_ROWS:
+                return encode({'error': f'At most {BATCH_ENDPOINT_MAX_ROWS} patients per request'}, 413, error_format)
+            matrix, valid_rows, row_errors = input_schema.columns_to_matrix(columns, n_rows)
+        else:
+            data = wire_formats.decode_msgpack(raw) if input_format == 'msgpack' else json.loads(raw)
+            payloads, error = patient_payloads(data)
+            if error:
+                return encode(*error, error_format)
+            n_rows = len(payloads)
+            matrix, valid_rows, row_errors = input_schema.to_matrix(payloads)
+    except ImportError as e:
+        return encode({'error': f'{e.name} is not installed on this server'}, 415, 'json')
+    except Exception as e:
+        return encode({'error': f'Could not decode the {input_format} body: {e}'}, 400, error_format)
+
+    probs, model_version = score_rows(matrix, valid_rows, n_rows)
+    logger.info(f"Batch prediction ({input_format} -> {output_format}): "
+                f"{len(valid_rows)} scored, {len(row_errors)} rejected")
+
+    try:
+        if output_format == 'arrow':
+            summary = {'count': n_rows, 'scored': len(valid_rows), 'errors': len(row_errors),
+                       'model_version': model_version}
+            return (wire_formats.encode_arrow(n_rows, valid_rows, probs, row_errors, summary), 200,
+                    wire_formats.media_type('arrow'))
+        return encode(batch_body(n_rows, valid_rows, probs, row_errors, model_version), 200, output_format)
+    except ImportError as e:
+        return encode({'error': f'{e.name} is not installed on this server'}, 406, 'json')
+
+
+_baseline_statistics = {'mtime': None, 'mlp': None}
+
+
+def baseline_statistics():
+    """The NumPy export, for its training statistics; reloaded when the file changes"""
+    try:
+        mtime = os.path.getmtime(NUMPY_MODEL_PATH)
+    except OSError:
+        return None
+    if _baseline_statistics['mtime'] != mtime:
+        try:
+            _baseline_statistics['mlp'] = NumpyMLP.load(NUMPY_MODEL_PATH)
+        except Exception as e:
+            logger.warning(f"Cannot read training statistics from {NUMPY_MODEL_PATH}: {e}")
+            _baseline_statistics['mlp'] = None
+        _baseline_statistics['mtime'] = mtime
+    return _baseline_statistics['mlp']
+
+
+def explanation_baseline(current):
+    """Reference patient attributions are measured against, one value per feature in EXPECTED_FEATURES_ORDER"""
+    midpoints = [(FEATURE_RULES[f]['low'] + FEATURE_RULES[f]['high']) / 2.0 for f in EXPECTED_FEATURES_ORDER]
+    statistics = None if getattr(current, 'norm_mean', None) is not None else baseline_statistics()
+    if statistics is not None and statistics.features != EXPECTED_FEATURES_ORDER:
+        statistics = None
+    return reference_patient(current, midpoints, statistics)
+
+
+def explanation_entry(method, attributions, prob, baseline_prob, model_version):
+    """Cacheable explanation of one patient; attributions are in percentage points of probability"""
+    prob = max(0.0, min(1.0, float(prob)))
+    entry = {
+        'prediction': int(prob > 0.5),
+        'probability': round(prob * 100, 2),
+        'model_version': model_version,
+        'method': method,
+        'baseline_probability': round(baseline_prob * 100, 2),
+        'attributions': {f: round(float(a) * 100, 3) for f, a in zip(EXPECTED_FEATURES_ORDER, attributions)},
+        'ranked_features': [EXPECTED_FEATURES_ORDER[i] for i in np.argsort(-np.abs(attributions), kind='stable')],
+    }
+    if method == 'integrated_gradients':
+        # Completeness check: attributions should add up to probability - baseline probability
+        entry['convergence_delta'] = round((float(attributions.sum()) - (prob - baseline_prob)) * 100, 4)
+    return entry
+
+
+def explain_patients(data):
+    """(body, status) for /explain: one patient object, a list, or {"patients": [...]}.
+
+    Uncached patients are explained together with one vectorised forward
+    (and, for integrated gradients, backward) pass.
+    """
+    single = isinstance(data, dict) and 'patients' not in data
+    payloads, error = patient_payloads([data] if single else data)
+    if error:
+        return error
+    if len(payloads) > EXPLAIN_MAX_ROWS:
+        return {'error': f'At most {EXPLAIN_MAX_ROWS} patients per /explain request'}, 413
+
+    matrix, valid_rows, row_errors = input_schema.to_matrix(payloads)
+    if single and row_errors:
+        return {'error': 'Invalid patient data', 'details': row_errors[0]}, 400
+
+    current = engine
+    baseline = explanation_baseline(current)
+    results = [None] * len(payloads)
+    uncached = []
+    for row_index in valid_rows:
+        entry = explanation_cache.get(matrix[row_index])
+        if entry is not None and entry['model_version'] == current.version:
+            results[row_index] = {'index': row_index, **entry, 'cached': True}
+        else:
+            uncached.append(row_index)
+
+    if uncached:
+        method, attributions, probs, baseline_prob = inference_pool.run(
+            lambda: explain(current, matrix[uncached], baseline, method=EXPLAIN_METHOD, steps=EXPLAIN_STEPS))
+        for row_index, row_attributions, prob in zip(uncached, attributions, probs):
+            entry = explanation_entry(method, row_attributions, prob, baseline_prob, current.version)
+            explanation_cache.put(matrix[row_index], entry)
+            results[row_index] = {'index': row_index, **entry, 'cached': False}
+    for row_index, errors in row_errors.items():
+        results[row_index] = {'index': row_index, 'error': errors[0]['message'], 'details': errors}
+
+    logger.info(f"Explained {len(valid_rows)} patients ({len(uncached)} computed, "
+                f"{len(valid_rows) - len(uncached)} cached), {len(row_errors)} rejected")
+
+    baseline_values = {f: round(v, 3) for f, v in zip(EXPECTED_FEATURES_ORDER, baseline.tolist())}
+    if single:
+        result = results[0]
+        del result['index']
+        return {**result, 'baseline': baseline_values, 'features_values': matrix[0].tolist()}, 200
+    return {
+        'count': len(payloads),
+        'explained': len(valid_rows),
+        'errors': len(row_errors),
+        'model_version': current.version,
+        'baseline': baseline_values,
+        'results': results
+    }, 200
+
+
+def sweep_axis(axis):
+    """(column, grid values) for one /predict/sweep axis, or (None, error message)"""
+    if not isinstance(axis, dict):
+        return None, 'Each sweep axis must be an object with a "feature"'
+    column = input_schema.column(axis.get('feature'))
+    if column is None:
+        return None, f"Unknown feature {axis.get('feature')!r}"
+    spec = input_schema.features[column]
+
+    try:
+        if axis.get('values') is not None:
+            values = np.asarray(axis['values'], dtype=np.float64).reshape(-1)
+        else:
+            low = float(axis.get('min', spec.low))
+            high = float(axis.get('max', spec.high))
+            steps = int(axis.get('steps', SWEEP_DEFAULT_STEPS))
+            if steps < 1 or not low <= high:
+                return None, f"{spec.name}: need steps >= 1 and min <= max"
+            values = np.linspace(low, high, steps)
+    except (TypeError, ValueError) as e:
+        return None, f"{spec.name}: {e}"
+    if values.size == 0:
+        return None, f"{spec.name}: no values to sweep"
+    if not (np.all(values >= spec.low) and np.all(values <= spec.high)):
+        return None, f"{spec.name}: sweep values must lie within [{spec.low:g}, {spec.high:g}]"
+    return column, values
+
+
+def sweep_patient(data):
+    """(body, status) for /predict/sweep: risk over a 1-D or 2-D grid around a base patient.
+
+    The body is {"patient": {...}, "sweep": [{"feature": ..., "min": ...,
+    "max": ..., "steps": ...} or {"feature": ..., "values": [...]}]} with one
+    or two axes. The whole grid is scored with a single forward pass;
+    `probabilities` is indexed [i] or [i][j] by the axis values.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('sweep'), list) or not 1 <= len(data['sweep']) <= 2:
+        return {'error': 'Expected {"patient": {...}, "sweep": [one or two axes]}'}, 400
+
+    row, errors, _ = input_schema.to_row(data.get('patient') or {})
+    if errors:
+        return {'error': 'Invalid patient data', 'details': errors}, 400
+
+    axes = []
+    for axis in data['sweep']:
+        column, values = sweep_axis(axis)
+        if column is None:
+            return {'error': values}, 400
+        axes.append((column, values))
+    if len(axes) == 2 and axes[0][0] == axes[1][0]:
+        return {'error': 'The two sweep axes must vary different features'}, 400
+    shape = tuple(len(values) for _, values in axes)
+    n_points = int(np.prod(shape))
+    if n_points > SWEEP_MAX_POINTS:
+        return {'error': f'The grid has {n_points} points; at most {SWEEP_MAX_POINTS} are allowed'}, 413
+
+    # Grid rows in C order: the last axis varies fastest; the base patient is the final row
+    start = time.perf_counter()
+    grid = np.empty((n_points + 1, len(EXPECTED_FEATURES_ORDER)), dtype=np.float32)
+    grid[:] = row
+    for column, values in axes:
+        grid[:n_points, column] = np.broadcast_to(
+            values.reshape([-1 if c == column else 1 for c, _ in axes]), shape).reshape(-1)
+    probs, model_version = predict_matrix(grid, shadowed=False)
+    probs = np.clip(np.asarray(probs, dtype=np.float64), 0.0, 1.0)
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+    return {
+        'features': [EXPECTED_FEATURES_ORDER[column] for column, _ in axes],
+        'axes': [values.tolist() for _, values in axes],
+        'shape': list(shape),
+        'probabilities': np.round(probs[:n_points] * 100, 2).reshape(shape).tolist(),
+        'base_probability': round(float(probs[-1]) * 100, 2),
+        'model_version': model_version,
+        'elapsed_ms': round(elapsed_ms, 3)
+    }, 200
+
+
+partial_dependence_lock = threading.Lock()
+partial_dependence_cache = {'signature': None, 'model_version': None, 'features': {}, 'bodies': {}}
+
+
+def load_partial_dependence():
+    """Cached contents of PARTIAL_DEPENDENCE_PATH, re-read whenever the file changes"""
+    stat = os.stat(PARTIAL_DEPENDENCE_PATH)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with partial_dependence_lock:
+        if partial_dependence_cache['signature'] == signature:
+            return partial_dependence_cache
+
+        with np.load(PARTIAL_DEPENDENCE_PATH) as artifact:
+            quantiles = artifact['ice_quantiles'].astype(np.float64)
+            features = {}
+            for feature in artifact['features'].tolist():
+                features[feature] = {
+                    'grid': np.round(artifact[f'grid_{feature}'].astype(np.float64), 4).tolist(),
+                    'pd': np.round(artifact[f'pd_{feature}'].astype(np.float64) * 100, 2).tolist(),
+                    'ice_quantiles': {
+                        f'{q:g}': np.round(curve.astype(np.float64) * 100, 2).tolist()
+                        for q, curve in zip(quantiles, artifact[f'ice_quantiles_{feature}'])
+                    },
+                    'ice': np.round(artifact[f'ice_{feature}'].astype(np.float64) * 100, 1).tolist(),
+                }
+            partial_dependence_cache.update(
+                signature=signature,
+                model_version=str(artifact['model_version']),
+                sample_size=int(artifact['sample_size']),
+                created_at=float(artifact['created_at']),
+                features=features,
+                bodies={},
+            )
+        logger.info(f"Loaded partial-dependence curves for {len(features)} features "
+                    f"(model version {partial_dependence_cache['model_version']})")
+        return partial_dependence_cache
+
+
+def partial_dependence(feature=None):
+    """(JSON bytes, status, media type) for /partial-dependence, all features or just `feature`.
+
+    Curves are percentages like every other probability in the API; the
+    encoded bodies are cached until the artifact or the model changes.
+    """
+    def encoded(body, status):
+        return json.dumps(body).encode(), status, 'application/json'
+
+    try:
+        cached = load_partial_dependence()
+    except FileNotFoundError:
+        return encoded({'error': 'No partial-dependence curves available; '
+                                 'run scripts/partial_dependence.py'}, 404)
+    current_version = engine.version
+    if cached['model_version'] != current_version:
+        return encoded({'error': 'The partial-dependence curves were computed for another model version; '
+                                 'rerun scripts/partial_dependence.py',
+                        'artifact_version': cached['model_version'],
+                        'model_version': current_version}, 409)
+
+    if feature is not None:
+        column = input_schema.column(feature)
+        if column is None or EXPECTED_FEATURES_ORDER[column] not in cached['features']:
+            return encoded({'error': f'No partial-dependence curve for {feature!r}'}, 404)
+        feature = EXPECTED_FEATURES_ORDER[column]
+
+    key = feature or ''
+    content = cached['bodies'].get(key)
+    if content is None:
+        features = cached['features'] if feature is None else {feature: cached['features'][feature]}
+        content = json.dumps({
+            'model_version': cached['model_version'],
+            'sample_size': cached['sample_size'],
+            'created_at': cached['created_at'],
+            'features': features,
+        }).encode()
+        cached['bodies'][key] = content
+    return content, 200, 'application/json'
+
+
+def score_ndjson_lines(lines, first_index):
+    """Score one chunk of NDJSON request lines; returns (NDJSON bytes, scored, rejected).
+
+    `lines` holds raw lines (or None for a line that exceeded
+    STREAM_MAX_LINE_BYTES); results carry their line's position in the
+    upload, counted from `first_index`.
+    """
+    payloads = []
+    parse_errors = {}
+    for offset, line in enumerate(lines):
+        payload = None
+        if line is None:
+            parse_errors[offset] = f'Line longer than {STREAM_MAX_LINE_BYTES} bytes'
+        else:
+            try:
+                payload = json.loads(line)
+            except ValueError as e:
+                parse_errors[offset] = f'Invalid JSON: {e}'
+        payloads.append(payload)
+
+    matrix, valid_rows, row_errors = input_schema.to_matrix(payloads)
+    for offset, message in parse_errors.items():
+        row_errors[offset] = [{'field': None, 'code': 'invalid_json', 'message': message}]
+
+    probs = []
+    model_version = None
+    if valid_rows:
+        scored = matrix if len(valid_rows) == len(payloads) else matrix[valid_rows]
+        drift_monitor.update(scored)
+        probs, model_version = predict_matrix(scored)
+        probs = np.clip(probs, 0.0, 1.0).tolist()
+
+    results = [None] * len(payloads)
+    for offset, prob in zip(valid_rows, probs):
+        results[offset] = {'index': first_index + offset, 'prediction': int(prob > 0.5),
+                           'probability': round(prob * 100, 2), 'model_version': model_version}
+    for offset, errors in row_errors.items():
+        results[offset] = {'index': first_index + offset, 'error': errors[0]['message'], 'details': errors}
+
+    body = ''.join(json.dumps(result, separators=(',', ':')) + '\n' for result in results)
+    return body.encode(), len(valid_rows), len(row_errors)
+
+
+def iter_ndjson_chunks(readline):
+    """Group the non-blank lines returned by `readline(limit)` into chunks of STREAM_BATCH_ROWS"""
+    chunk = []
+    while True:
+        line = readline(STREAM_MAX_LINE_BYTES + 1)
+        if not line:
+            break
+        if len(line) > STREAM_MAX_LINE_BYTES and not line.endswith(b'\n'):
+            # Discard the rest of an oversized line without buffering it
+            while line and not line.endswith(b'\n'):
+                line = readline(STREAM_MAX_LINE_BYTES + 1)
+            chunk.append(None)
+        elif line.strip():
+            chunk.append(line)
+        if len(chunk) >= STREAM_BATCH_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_summary(count, scored, rejected, error=None):
+    summary = {'done': error is None, 'count': count, 'scored': scored, 'errors': rejected}
+    if error is not None:
+        summary['error'] = error
+    return (json.dumps({'summary': summary}) + '\n').encode()
+
+
+def job_format(filename, content_type, requested=None):
+    """'csv' or 'parquet' from an explicit ?format=, the file extension or the content type"""
+    if requested:
+        return requested.lower()
+    if filename and filename.lower().endswith(('.parquet', '.pq')):
+        return 'parquet'
+    if content_type and 'parquet' in content_type:
+        return 'parquet'
+    return 'csv'
+
+
+def job_status(job):
+    body = job.to_dict()
+    if job.status == 'succeeded':
+        body['result_url'] = f'/jobs/{job.id}/result'
+    return body
+
+
+def cancel_job(job_id):
+    """(body, status) for DELETE /jobs/<id>"""
+    job = bulk_jobs.cancel(job_id)
+    if job is None:
+        return {'error': f'Unknown job {job_id}'}, 404
+    if job.status in ('succeeded', 'failed'):
+        return {'error': f'Job already {job.status}', **job_status(job)}, 409
+    return job_status(job), 202
+
+
+def finished_job(job_id):
+    """(job, None, 200) when its result can be downloaded, else (None, error body, status)"""
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        return None, {'error': f'Unknown job {job_id}'}, 404
+    if job.status != 'succeeded':
+        return None, {'error': f'Job is {job.status}', **job_status(job)}, 409
+    return job, None, 200
+
+
+def admin_reload(token, force=False):
+    """(body, status) for POST /admin/reload: start a background reload of the model files"""
+    if ADMIN_TOKEN and not hmac.compare_digest(token or '', ADMIN_TOKEN):
+        return {'error': 'Invalid or missing X-Admin-Token'}, 403
+    if not model_ready.is_set():
+        return {'error': 'Model is still loading', 'ready': False}, 503
+    if not start_reload(force=force):
+        return {'error': 'A model reload is already in progress', 'model_reload': dict(RELOAD_STATUS)}, 409
+    return {'status': 'reloading', 'model_version': engine.version, 'force': force}, 202
+
+
+def score_test_patient(patient):
+    """Score one of the built-in reference patients directly, bypassing cache and batcher"""
+    matrix = np.array([[patient[f] for f in EXPECTED_FEATURES_ORDER]], dtype=np.float32)
+    prediction, model_version = predict_matrix(matrix, shadowed=False)
+    prediction = np.asarray(prediction).reshape(-1, 1)
+    prediction_prob = float(prediction[0][0])
+    return {
+        'test_input': dict(patient),
+        'model_version': model_version,
+        'raw_prediction': prediction.tolist(),
+        'prediction_class': int(prediction_prob > 0.5),
+        'prediction_probability': prediction_prob,
+        'probability_percent': round(prediction_prob * 100, 2)
+    }
+
+
+def debug_result():
+    result = score_test_patient(HIGH_RISK_TEST_PATIENT)
+    logger.info(f"Debug test prediction output: {result['raw_prediction']}")
+    result['message'] = 'Debug test completed'
+    return result
+
+
+def low_risk_result():
+    result = score_test_patient(LOW_RISK_TEST_PATIENT)
+    del result['raw_prediction']
+    result['message'] = 'Low-risk test completed'
+    return result
+
+
+# ---------------------------------------------------
+# 5. ROUTES
+# ---------------------------------------------------
+@app.route('/', methods=['GET'])
+def home():
+    return jsonify(service_info())
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Liveness probe: the process is up and serving HTTP"""
+    return jsonify({'status': 'alive'})
+
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: the model is loaded and warmed up"""
+    body, status = readiness()
+    return jsonify(body), status
+
 
 @app.route('/predict', methods=['POST'])
 def predict():
     try:
+        timer = StageTimer(metrics, 'predict_stage_seconds')
+        try:
+            deadline = request_deadline(request.headers.get(REQUEST_TIMEOUT_HEADER), g.request_start)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         data = request.json
-        logger.info(f"Received prediction request with data: {data}")
-
-        # 1. Map frontend names to backend names and convert values
-        backend_data = {}
-        for frontend_key, value in data.items():
-            if frontend_key in FRONTEND_TO_BACKEND:
-                backend_key = FRONTEND_TO_BACKEND[frontend_key]
-
-                # Convert to float
-                try:
-                    backend_data[backend_key] = float(value)
-                except ValueError:
-                    # Handle string values
-                    if value.lower() in ['yes', 'y', 'true', '1']:
-                        backend_data[backend_key] = 1.0
-                    elif value.lower() in ['no', 'n', 'false', '0']:
-                        backend_data[backend_key] = 0.0
-                    elif value.lower() in ['male', 'm']:
-                        backend_data[backend_key] = 1.0
-                    elif value.lower() in ['female', 'f']:
-                        backend_data[backend_key] = 0.0
-                    else:
-                        # Try to convert to float
-                        try:
-                            backend_data[backend_key] = float(value)
-                        except:
-                            backend_data[backend_key] = 0.0
-
-        logger.info(f"Mapped data: {backend_data}")
-
-        # 2. Prepare feature dictionary for the model (13 separate inputs)
-        model_inputs = {}
-        missing_features = []
-
-        for feature in EXPECTED_FEATURES_ORDER:
-            if feature in backend_data:
-                model_inputs[feature] = np.array([[backend_data[feature]]], dtype=np.float32)
-            else:
-                missing_features.append(feature)
-                model_inputs[feature] = np.array([[0.0]], dtype=np.float32)
+        timer.mark('parse')
+        body, status = score_patient(data, timer, deadline)
+        response = jsonify(body)
+        timer.mark('serialize')
+        return response, status
+
+    except BatcherQueueFull as e:
+        logger.warning(f"Prediction rejected: {e}")
+        return jsonify({'error': str(e)}), 503
+
+    except DeadlineExceeded as e:
+        logger.warning(f"Prediction shed: {e}")
+        return jsonify({'error': str(e)}), 504
+
+    except Exception as e:
+        logger.error(f"Prediction Error: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
 
-        if missing_features:
-            logger.warning(f"Missing features: {missing_features}")
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Score many patients with a single forward pass (JSON, MessagePack or Arrow IPC, see wire_formats.py)"""
+    try:
+        input_format = wire_formats.request_format(request.mimetype)
+        output_format = wire_formats.response_format(request.headers.get('Accept'), input_format)
+        if input_format == output_format == 'json':
+            body, status = score_patients(request.get_json(silent=True))
+            return jsonify(body), status
+        content, status, mimetype = score_patients_wire(request.get_data(), input_format, output_format)
+        return Response(content, status=status, mimetype=mimetype)
+
+    except Exception as e:
+        logger.error(f"Batch Prediction Error: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
-        logger.info(f"Model inputs prepared with shapes:")
-        for key, value in model_inputs.items():
-            logger.info(f"  {key}: {value.shape} = {value[0][0]}")
 
-        # 3. Make prediction
-        prediction = model.predict(model_inputs, verbose=0)
-        logger.info(f"Raw model output: {prediction}")
+@app.route('/predict/sweep', methods=['POST'])
+def predict_sweep():
+    """What-if risk curve or surface over one or two features of a base patient"""
+    try:
+        body, status = sweep_patient(request.get_json(silent=True))
+        return jsonify(body), status
+
+    except Exception as e:
+        logger.error(f"Sweep Prediction Error: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
-        # Handle output (single value for binary classification)
-        prediction_prob = float(prediction[0][0])
 
-        # Ensure probability is between 0 and 1 (sigmoid output should already be)
-        prediction_prob = max(0.0, min(1.0, prediction_prob))
+@app.route('/partial-dependence', methods=['GET'])
+def partial_dependence_endpoint():
+    """Precomputed partial-dependence and ICE curves for the advanced charts"""
+    try:
+        content, status, mimetype = partial_dependence(request.args.get('feature'))
+        return Response(content, status=status, mimetype=mimetype)
 
-        prediction_class = int(prediction_prob > 0.5)
-        probability_pct = round(float(prediction_prob) * 100, 2)
+    except Exception as e:
+        logger.error(f"Partial Dependence Error: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
-        logger.info(f"Final prediction: class={prediction_class}, probability={probability_pct}%")
 
-        return jsonify({
-            'prediction': prediction_class,
-            'probability': probability_pct,
-            'features_used': EXPECTED_FEATURES_ORDER,
-            'features_values': [float(model_inputs[f][0][0]) for f in EXPECTED_FEATURES_ORDER]
-        })
+@app.route('/explain', methods=['POST'])
+def explain_endpoint():
+    """Per-feature attributions of the predicted probability for one patient or a list"""
+    try:
+        body, status = explain_patients(request.get_json(silent=True))
+        return jsonify(body), status
 
     except Exception as e:
-        logger.error(f"Prediction Error: {e}")
+        logger.error(f"Explain Error: {e}")
         logger.error(traceback.format_exc())
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
 
-@app.route('/debug', methods=['GET'])
-def debug():
-    """Debug endpoint to test the model directly"""
-    # Create test inputs as separate arrays
-    test_inputs = {
-        'age': np.array([[65.0]], dtype=np.float32),
-        'sex': np.array([[1.0]], dtype=np.float32),
-        'chest_pain_type': np.array([[4.0]], dtype=np.float32),
-        'bp': np.array([[180.0]], dtype=np.float32),
-        'cholesterol': np.array([[300.0]], dtype=np.float32),
-        'fbs_over_120': np.array([[1.0]], dtype=np.float32),
-        'ekg_results': np.array([[2.0]], dtype=np.float32),
-        'max_hr': np.array([[120.0]], dtype=np.float32),
-        'exercise_angina': np.array([[1.0]], dtype=np.float32),
-        'st_depression': np.array([[4.5]], dtype=np.float32),
-        'slope_of_st': np.array([[3.0]], dtype=np.float32),
-        'number_of_vessels_fluro': np.array([[3.0]], dtype=np.float32),
-        'thallium': np.array([[7.0]], dtype=np.float32)
-    }
+@app.route('/predict/stream', methods=['POST'])
+def predict_stream():
+    """Score newline-delimited JSON patients while the upload is still arriving"""
+    stream = request.stream
 
+    def generate():
+        count = scored = rejected = 0
+        try:
+            for lines in iter_ndjson_chunks(stream.readline):
+                body, chunk_scored, chunk_rejected = score_ndjson_lines(lines, count)
+                count += len(lines)
+                scored += chunk_scored
+                rejected += chunk_rejected
+                yield body
+        except Exception as e:
+            logger.error(f"Stream Prediction Error: {e}")
+            logger.error(traceback.format_exc())
+            yield stream_summary(count, scored, rejected, error=str(e))
+            return
+        logger.info(f"Stream prediction: {scored} scored, {rejected} rejected")
+        yield stream_summary(count, scored, rejected)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Upload a CSV or Parquet file shaped like dataset/test.csv for background scoring.
+
+    Send it as multipart field 'file' or as the raw request body
+    (with ?filename= or ?format=).
+    """
+    upload = request.files.get('file')
+    filename = upload.filename if upload else request.args.get('filename', 'upload')
+    try:
+        job = bulk_jobs.create(filename, job_format(filename, request.mimetype, request.args.get('format')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except JobQueueFull as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '30'
+        return response, 429
+
+    source = upload.stream if upload else request.stream
     try:
-        prediction = model.predict(test_inputs, verbose=0)
-        logger.info(f"Debug test prediction output: {prediction}")
+        for data in iter(lambda: source.read(1 << 20), b''):
+            bulk_jobs.append_upload(job, data)
+    except UploadTooLarge as e:
+        bulk_jobs.discard(job)
+        return jsonify({'error': str(e)}), 413
+    except Exception as e:
+        bulk_jobs.discard(job)
+        logger.error(f"Job Upload Error: {e}")
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+    bulk_jobs.start(job)
+    logger.info(f"Bulk job {job.id} queued ({job.upload_bytes} bytes, {job.format})")
+    return jsonify(job_status(job)), 202, {'Location': f'/jobs/{job.id}'}
+
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify({'jobs': bulk_jobs.list(), **bulk_jobs.stats()})
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status and progress of one bulk job"""
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job {job_id}'}), 404
+    return jsonify(job_status(job))
+
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    """Cancel a queued or running bulk job"""
+    body, status = cancel_job(job_id)
+    return jsonify(body), status
+
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """Download the scored CSV of a finished job"""
+    job, error, status = finished_job(job_id)
+    if job is None:
+        return jsonify(error), status
+    return send_file(job.result_path, mimetype='text/csv', as_attachment=True, download_name=job.result_name)
+
+
+@app.route('/admin/reload', methods=['POST'])
+def reload_endpoint():
+    """Reload the model files from disk without dropping requests (?force=1 swaps even if unchanged)"""
+    body, status = admin_reload(request.headers.get('X-Admin-Token'), request.args.get('force') == '1')
+    return jsonify(body), status
+
 
-        prediction_prob = float(prediction[0][0])
-        prediction_class = int(prediction_prob > 0.5)
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Runtime statistics for tuning the serving path"""
+    return jsonify(runtime_stats())
 
-        return jsonify({
-            'test_input': {k: v[0][0] for k, v in test_inputs.items()},
-            'raw_prediction': prediction.tolist(),
-            'prediction_class': prediction_class,
-            'prediction_probability': float(prediction_prob),
-            'probability_percent': round(float(prediction_prob) * 100, 2),
-            'message': 'Debug test completed'
-        })
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/debug', methods=['GET'])
+def debug():
+    """Debug endpoint to test the model directly"""
+    try:
+        return jsonify(debug_result())
     except Exception as e:
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
@@ -191,42 +1545,82 @@ def debug():
 @app.route('/test-low-risk', methods=['GET'])
 def test_low_risk():
     """Test endpoint for low-risk values"""
-    test_inputs = {
-        'age': np.array([[40.0]], dtype=np.float32),
-        'sex': np.array([[0.0]], dtype=np.float32),
-        'chest_pain_type': np.array([[1.0]], dtype=np.float32),
-        'bp': np.array([[120.0]], dtype=np.float32),
-        'cholesterol': np.array([[180.0]], dtype=np.float32),
-        'fbs_over_120': np.array([[0.0]], dtype=np.float32),
-        'ekg_results': np.array([[0.0]], dtype=np.float32),
-        'max_hr': np.array([[160.0]], dtype=np.float32),
-        'exercise_angina': np.array([[0.0]], dtype=np.float32),
-        'st_depression': np.array([[0.5]], dtype=np.float32),
-        'slope_of_st': np.array([[1.0]], dtype=np.float32),
-        'number_of_vessels_fluro': np.array([[0.0]], dtype=np.float32),
-        'thallium': np.array([[3.0]], dtype=np.float32)
-    }
-
     try:
-        prediction = model.predict(test_inputs, verbose=0)
-        prediction_prob = float(prediction[0][0])
-        prediction_class = int(prediction_prob > 0.5)
-
-        return jsonify({
-            'test_input': {k: v[0][0] for k, v in test_inputs.items()},
-            'prediction_class': prediction_class,
-            'prediction_probability': float(prediction_prob),
-            'probability_percent': round(float(prediction_prob) * 100, 2),
-            'message': 'Low-risk test completed'
-        })
+        return jsonify(low_risk_result())
     except Exception as e:
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
 
+# ---------------------------------------------------
+# 6. THREAD BENCHMARK
+# ---------------------------------------------------
+def benchmark_current_config(clients, rows, seconds):
+    """Print one JSON line with the throughput of this process's inference pool settings"""
+    model_ready.wait()
+    result = measure_throughput(lambda matrix: predict_matrix(matrix, shadowed=False),
+                                len(EXPECTED_FEATURES_ORDER), clients, rows, seconds)
+    print(json.dumps({'engine': engine.name, **result}), flush=True)
+
+
+def benchmark_thread_configs(clients, rows, seconds):
+    """Run benchmark_current_config once per worker/thread setting, each in a fresh process.
+
+    Thread pools are sized once per process (TensorFlow's cannot be resized
+    at all), so every setting gets its own interpreter.
+    """
+    model_ready.wait()
+    tune_inter_op = engine.name.startswith('keras')
+    configs = candidate_configs(CPU_COUNT, tune_inter_op, BACKGROUND_INFERENCE_THREADS)
+    logger.info(f"Benchmarking {len(configs)} settings on {CPU_COUNT} CPUs ({engine.name} engine, "
+                f"{clients} clients x {rows} rows, {seconds:g} s each)")
+
+    results = []
+    for workers, intra_op, inter_op in configs:
+        env = dict(os.environ, INFERENCE_WORKERS=str(workers), INFERENCE_INTRA_OP_THREADS=str(intra_op),
+                   INFERENCE_INTER_OP_THREADS=str(inter_op), CANARY_INTERVAL='0', AUDIT_LOG_SAMPLE_RATE='0',
+                   MODEL_WATCH_INTERVAL='0')
+        command = [sys.executable, os.path.abspath(__file__), '--benchmark-run',
+                   '--clients', str(clients), '--rows', str(rows), '--seconds', str(seconds)]
+        run = subprocess.run(command, env=env, capture_output=True, text=True)
+        lines = run.stdout.strip().splitlines()
+        if run.returncode != 0 or not lines:
+            logger.error(f"workers={workers} intra={intra_op} inter={inter_op} failed: {run.stderr[-500:]}")
+            continue
+        results.append(((workers, intra_op, inter_op), json.loads(lines[-1])))
+
+    header = f"{'workers':>8}{'intra-op':>10}{'inter-op':>10}{'rows/s':>12}{'p50 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for (workers, intra_op, inter_op), result in results:
+        print(f"{workers:>8}{intra_op:>10}{inter_op:>10}{result['rows_per_second']:>12.0f}"
+              f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}")
+    if not results:
+        return None
+    (workers, intra_op, inter_op), best = max(results, key=lambda r: r[1]['rows_per_second'])
+    print(f"\nBest for this host: INFERENCE_WORKERS={workers} INFERENCE_INTRA_OP_THREADS={intra_op} "
+          f"INFERENCE_INTER_OP_THREADS={inter_op} ({best['rows_per_second']:.0f} rows/s)")
+    return workers, intra_op, inter_op
+
+
 if __name__ == '__main__':
-    print("=" * 60)
-    print("Heart Disease Prediction API")
-    print("Server starting on http://127.0.0.1:5000")
-    print(f"Model path: {MODEL_PATH}")
-    print("=" * 60)
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Heart Disease Prediction API")
+    parser.add_argument('--benchmark-threads', action='store_true',
+                        help="Sweep inference workers and intra/inter-op threads and report the best setting")
+    parser.add_argument('--benchmark-run', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--clients', type=int, default=max(4, CPU_COUNT), help="Concurrent benchmark callers")
+    parser.add_argument('--rows', type=int, default=BATCH_MAX_SIZE, help="Rows per benchmark forward pass")
+    parser.add_argument('--seconds', type=float, default=3.0, help="Duration of each benchmark run")
+    args = parser.parse_args()
+
+    if args.benchmark_run:
+        benchmark_current_config(args.clients, args.rows, args.seconds)
+    elif args.benchmark_threads:
+        benchmark_thread_configs(args.clients, args.rows, args.seconds)
+    else:
+        print("=" * 60)
+        print("Heart Disease Prediction API")
+        print("Server starting on http://127.0.0.1:5000")
+        print(f"Model path: {MODEL_PATH}")
+        print(f"Inference pool: {INFERENCE_WORKERS} workers x {INFERENCE_INTRA_OP_THREADS} intra-op threads")
+        print("=" * 60)
+        app.run(debug=True, port=5000)
\ No newline at end of file
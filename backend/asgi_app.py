@@ -0,0 +1,406 @@
+import asyncio
+import contextlib
+import functools
+import json
+import logging
+import os
+import time
+import traceback
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import app as backend
+from batching import BatcherQueueFull, DeadlineExceeded
+from bulk_jobs import JobQueueFull, UploadTooLarge
+from bounded_executor import BoundedExecutor, ExecutorSaturated
+from metrics import StageTimer
+import wire_formats
+
+# ---------------------------------------------------
+# 1. SETUP
+# ---------------------------------------------------
+# Async front-end for the same handlers as app.py. Model loading, the
+# micro-batcher and the prediction cache all live in app.py; this module
+# only decides how many requests may wait for inference at once.
+logger = logging.getLogger("AsgiBackend")
+
+# Threads running inference, and the most requests allowed to hold or wait for one
+ASGI_INFERENCE_WORKERS = int(os.environ.get("ASGI_INFERENCE_WORKERS", 8))
+ASGI_MAX_PENDING = int(os.environ.get("ASGI_MAX_PENDING", 64))
+
+# Seconds a client is told to back off when the executor is full
+ASGI_RETRY_AFTER = int(os.environ.get("ASGI_RETRY_AFTER", 1))
+
+# How long a /predict/stream upload pauses before retrying a full executor
+STREAM_RETRY_INTERVAL = 0.005
+
+executor = BoundedExecutor(max_workers=ASGI_INFERENCE_WORKERS, max_pending=ASGI_MAX_PENDING)
+
+
+# ---------------------------------------------------
+# 2. HELPERS
+# ---------------------------------------------------
+def error_response(error, status, retry_after=None):
+    headers = {'Retry-After': str(retry_after)} if retry_after is not None else None
+    return JSONResponse({'error': str(error)}, status_code=status, headers=headers)
+
+
+async def run_inference(handler, *args, timer=None):
+    """Run a blocking app.py handler on the executor and map overload to 429/503"""
+    if not backend.model_ready.is_set():
+        return JSONResponse({'error': 'Model is still loading', 'ready': False},
+                            status_code=503, headers={'Retry-After': '1'})
+    try:
+        result = await executor.run(handler, *args)
+    except ExecutorSaturated as e:
+        logger.warning(f"Request shed: {e}")
+        return error_response(e, 429, retry_after=ASGI_RETRY_AFTER)
+    except BatcherQueueFull as e:
+        logger.warning(f"Prediction rejected: {e}")
+        return error_response(e, 503, retry_after=ASGI_RETRY_AFTER)
+    except DeadlineExceeded as e:
+        logger.warning(f"Prediction shed: {e}")
+        return error_response(e, 504)
+    except Exception as e:
+        logger.error(f"{handler.__name__} failed: {e}")
+        logger.error(traceback.format_exc())
+        return JSONResponse({'error': str(e), 'traceback': traceback.format_exc()}, status_code=500)
+
+    if isinstance(result, tuple) and len(result) == 3:
+        # Already encoded: (content, status, media type)
+        content, status, media_type = result
+        response = Response(content, status_code=status, media_type=media_type)
+    else:
+        body, status = result if isinstance(result, tuple) else (result, 200)
+        response = JSONResponse(body, status_code=status)
+    if timer is not None:
+        timer.mark('serialize')
+    return response
+
+
+def instrumented(route):
+    """Count, time and track in-flight requests of one route in app.py's metrics registry.
+
+    A streaming response stays in flight, and its duration keeps running,
+    until its body has been sent (or the client went away).
+    """
+    endpoint = route.__name__
+
+    @functools.wraps(route)
+    async def wrapper(request):
+        start = time.perf_counter()
+        backend.metrics.inc('requests_in_flight', endpoint=endpoint)
+
+        def finish():
+            backend.metrics.inc('requests_in_flight', -1, endpoint=endpoint)
+            backend.metrics.observe('request_duration_seconds', time.perf_counter() - start, endpoint=endpoint)
+
+        try:
+            response = await route(request)
+        except BaseException:
+            backend.metrics.inc('requests_in_flight', -1, endpoint=endpoint)
+            raise
+        backend.metrics.inc('requests_total', endpoint=endpoint, status=response.status_code)
+        if response.status_code >= 400:
+            backend.metrics.inc('request_errors_total', endpoint=endpoint)
+        if isinstance(response, StreamingResponse):
+            response.body_iterator = finish_after(response.body_iterator, finish)
+        else:
+            finish()
+        return response
+
+    return wrapper
+
+
+async def finish_after(body, finish):
+    """Yield the chunks of a streaming body, then call `finish` however the stream ends"""
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        finish()
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+class UploadStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body generator is still reading the request.
+
+    The stock class watches `receive` for a disconnect while it streams,
+    which would swallow the upload chunks the generator consumes; here a
+    disconnect surfaces through request.stream() instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_ndjson_chunks(body):
+    """Async twin of app.iter_ndjson_chunks over an async iterator of body chunks"""
+    buffer = bytearray()
+    chunk = []
+    discarding = False
+    async for data in body:
+        buffer += data
+        while True:
+            newline = buffer.find(b'\n')
+            if newline < 0:
+                if len(buffer) > backend.STREAM_MAX_LINE_BYTES:
+                    # Drop an oversized line as it arrives instead of buffering it
+                    if not discarding:
+                        chunk.append(None)
+                        discarding = True
+                    buffer.clear()
+                break
+            line = bytes(buffer[:newline + 1])
+            del buffer[:newline + 1]
+            if discarding:
+                discarding = False
+            elif len(line) > backend.STREAM_MAX_LINE_BYTES + 1:
+                chunk.append(None)
+            elif line.strip():
+                chunk.append(line)
+            if len(chunk) >= backend.STREAM_BATCH_ROWS:
+                yield chunk
+                chunk = []
+    if buffer.strip() and not discarding:
+        chunk.append(bytes(buffer))
+    if chunk:
+        yield chunk
+
+
+# ---------------------------------------------------
+# 3. ROUTES
+# ---------------------------------------------------
+async def home(request):
+    return JSONResponse(backend.service_info())
+
+
+async def health(request):
+    """Liveness probe: the process is up and serving HTTP"""
+    return JSONResponse({'status': 'alive'})
+
+
+async def ready(request):
+    """Readiness probe: the model is loaded and warmed up"""
+    body, status = backend.readiness()
+    return JSONResponse(body, status_code=status)
+
+
+async def predict(request):
+    timer = StageTimer(backend.metrics, 'predict_stage_seconds')
+    try:
+        deadline = backend.request_deadline(request.headers.get(backend.REQUEST_TIMEOUT_HEADER), time.perf_counter())
+    except ValueError as e:
+        return error_response(e, 400)
+    data = await read_json(request)
+    if not isinstance(data, dict):
+        return error_response('Expected a JSON object with patient data', 400)
+    timer.mark('parse')
+    return await run_inference(backend.score_patient, data, timer, deadline, timer=timer)
+
+
+async def predict_batch(request):
+    """Score many patients with a single forward pass (JSON, MessagePack or Arrow IPC)"""
+    input_format = wire_formats.request_format(request.headers.get('content-type'))
+    output_format = wire_formats.response_format(request.headers.get('accept'), input_format)
+    if input_format == output_format == 'json':
+        return await run_inference(backend.score_patients, await read_json(request))
+    return await run_inference(backend.score_patients_wire, await request.body(), input_format, output_format)
+
+
+async def predict_sweep(request):
+    """What-if risk curve or surface over one or two features of a base patient"""
+    return await run_inference(backend.sweep_patient, await read_json(request))
+
+
+async def partial_dependence_endpoint(request):
+    """Precomputed partial-dependence and ICE curves for the advanced charts"""
+    return await run_inference(backend.partial_dependence, request.query_params.get('feature'))
+
+
+async def explain_endpoint(request):
+    """Per-feature attributions of the predicted probability for one patient or a list"""
+    return await run_inference(backend.explain_patients, await read_json(request))
+
+
+async def predict_stream(request):
+    """Score newline-delimited JSON patients while the upload is still arriving"""
+    if not backend.model_ready.is_set():
+        return JSONResponse({'error': 'Model is still loading', 'ready': False},
+                            status_code=503, headers={'Retry-After': '1'})
+    if executor.saturated:
+        return error_response('Inference executor is full', 429, retry_after=ASGI_RETRY_AFTER)
+
+    # Reading before the response starts lets the server answer `Expect: 100-continue`
+    stream = request.stream()
+    first = await anext(stream, b'')
+
+    async def upload():
+        yield first
+        async for data in stream:
+            yield data
+
+    async def generate():
+        count = scored = rejected = 0
+        try:
+            async for lines in iter_ndjson_chunks(upload()):
+                # A full executor pauses the upload (and so the client) rather than failing it
+                while True:
+                    try:
+                        results, chunk_scored, chunk_rejected = await executor.run(
+                            backend.score_ndjson_lines, lines, count)
+                        break
+                    except ExecutorSaturated:
+                        await asyncio.sleep(STREAM_RETRY_INTERVAL)
+                count += len(lines)
+                scored += chunk_scored
+                rejected += chunk_rejected
+                yield results
+        except Exception as e:
+            logger.error(f"Stream Prediction Error: {e}")
+            logger.error(traceback.format_exc())
+            yield backend.stream_summary(count, scored, rejected, error=str(e))
+            return
+        yield backend.stream_summary(count, scored, rejected)
+
+    return UploadStreamingResponse(generate(), media_type='application/x-ndjson')
+
+
+async def submit_job(request):
+    """Upload a CSV or Parquet file as the raw request body (?filename= or ?format=)"""
+    if not backend.model_ready.is_set():
+        return JSONResponse({'error': 'Model is still loading', 'ready': False},
+                            status_code=503, headers={'Retry-After': '1'})
+    filename = request.query_params.get('filename', 'upload')
+    file_format = backend.job_format(filename, request.headers.get('content-type'),
+                                     request.query_params.get('format'))
+    try:
+        job = backend.bulk_jobs.create(filename, file_format)
+    except ValueError as e:
+        return error_response(e, 400)
+    except JobQueueFull as e:
+        return error_response(e, 429, retry_after=30)
+
+    try:
+        async for data in request.stream():
+            backend.bulk_jobs.append_upload(job, data)
+    except UploadTooLarge as e:
+        backend.bulk_jobs.discard(job)
+        return error_response(e, 413)
+    except Exception as e:
+        backend.bulk_jobs.discard(job)
+        logger.error(f"Job Upload Error: {e}")
+        return JSONResponse({'error': str(e), 'traceback': traceback.format_exc()}, status_code=500)
+
+    backend.bulk_jobs.start(job)
+    return JSONResponse(backend.job_status(job), status_code=202, headers={'Location': f'/jobs/{job.id}'})
+
+
+async def list_jobs(request):
+    return JSONResponse({'jobs': backend.bulk_jobs.list(), **backend.bulk_jobs.stats()})
+
+
+async def get_job(request):
+    """Status and progress of one bulk job"""
+    job_id = request.path_params['job_id']
+    job = backend.bulk_jobs.get(job_id)
+    if job is None:
+        return error_response(f'Unknown job {job_id}', 404)
+    return JSONResponse(backend.job_status(job))
+
+
+async def delete_job(request):
+    """Cancel a queued or running bulk job"""
+    body, status = backend.cancel_job(request.path_params['job_id'])
+    return JSONResponse(body, status_code=status)
+
+
+async def get_job_result(request):
+    """Download the scored CSV of a finished job"""
+    job, error, status = backend.finished_job(request.path_params['job_id'])
+    if job is None:
+        return JSONResponse(error, status_code=status)
+    return FileResponse(job.result_path, media_type='text/csv', filename=job.result_name)
+
+
+async def reload_endpoint(request):
+    """Reload the model files from disk without dropping requests (?force=1 swaps even if unchanged)"""
+    body, status = backend.admin_reload(request.headers.get('X-Admin-Token'),
+                                        request.query_params.get('force') == '1')
+    return JSONResponse(body, status_code=status)
+
+
+async def stats(request):
+    """Runtime statistics for tuning the serving path"""
+    return JSONResponse({**backend.runtime_stats(), 'executor': executor.stats()})
+
+
+async def metrics_endpoint(request):
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(backend.render_metrics(), media_type='text/plain; version=0.0.4')
+
+
+async def debug(request):
+    """Debug endpoint to test the model directly"""
+    return await run_inference(backend.debug_result)
+
+
+async def test_low_risk(request):
+    """Test endpoint for low-risk values"""
+    return await run_inference(backend.low_risk_result)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route('/', instrumented(home), methods=['GET']),
+        Route('/health', instrumented(health), methods=['GET']),
+        Route('/ready', instrumented(ready), methods=['GET']),
+        Route('/predict', instrumented(predict), methods=['POST']),
+        Route('/predict/batch', instrumented(predict_batch), methods=['POST']),
+        Route('/predict/stream', instrumented(predict_stream), methods=['POST']),
+        Route('/predict/sweep', instrumented(predict_sweep), methods=['POST']),
+        Route('/explain', instrumented(explain_endpoint), methods=['POST']),
+        Route('/partial-dependence', instrumented(partial_dependence_endpoint), methods=['GET']),
+        Route('/jobs', instrumented(submit_job), methods=['POST']),
+        Route('/jobs', instrumented(list_jobs), methods=['GET']),
+        Route('/jobs/{job_id}', instrumented(get_job), methods=['GET']),
+        Route('/jobs/{job_id}', instrumented(delete_job), methods=['DELETE']),
+        Route('/jobs/{job_id}/result', instrumented(get_job_result), methods=['GET']),
+        Route('/admin/reload', instrumented(reload_endpoint), methods=['POST']),
+        Route('/stats', instrumented(stats), methods=['GET']),
+        Route('/metrics', instrumented(metrics_endpoint), methods=['GET']),
+        Route('/debug', instrumented(debug), methods=['GET']),
+        Route('/test-low-risk', instrumented(test_low_risk), methods=['GET']),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("=" * 60)
+    print("Heart Disease Prediction API (ASGI)")
+    print("Server starting on http://127.0.0.1:5000")
+    print(f"Inference executor: {ASGI_INFERENCE_WORKERS} threads, {ASGI_MAX_PENDING} pending max")
+    print("=" * 60)
+    uvicorn.run(app, host='127.0.0.1', port=5000)
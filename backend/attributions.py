@@ -0,0 +1,84 @@
+import numpy as np
+
+ATTRIBUTION_METHODS = ('auto', 'integrated_gradients', 'occlusion')
+
+
+def reference_patient(engine, midpoints, statistics=None):
+    """Full-width (n_features,) reference patient attributions are measured against.
+
+    Numeric features take their training mean (`norm_mean`, which covers
+    only `numeric_columns`) and categorical features their first vocabulary
+    entry, the most frequent value in training. The statistics come from
+    `engine`, or from `statistics` (a NumpyMLP of the same model) for
+    engines that do not carry them (Keras); features neither covers keep
+    their value from `midpoints`.
+    """
+    baseline = np.array(midpoints, dtype=np.float32)
+    source = engine if getattr(engine, 'norm_mean', None) is not None else statistics
+    if source is None or getattr(source, 'norm_mean', None) is None:
+        return baseline
+    baseline[np.asarray(source.numeric_columns, dtype=np.intp)] = source.norm_mean
+    for column, vocabulary, _ in source.categorical:
+        if len(vocabulary):
+            baseline[column] = vocabulary[0]
+    return baseline
+
+
+def integrated_gradients(engine, matrix, baseline, steps=32):
+    """Integrated gradients of the probability for every row of `matrix`.
+
+    The `steps` midpoint interpolations between `baseline` and each row,
+    the rows themselves and the baseline are stacked into one matrix and
+    sent through a single `engine.predict_with_gradients` call. Returns
+    (attributions (n, n_features), probabilities (n,), baseline
+    probability); each row's attributions sum to approximately
+    probability - baseline probability.
+    """
+    n_rows, n_features = matrix.shape
+    alphas = ((np.arange(steps, dtype=np.float32) + 0.5) / steps)[None, :, None]
+    path = baseline + alphas * (matrix - baseline)[:, None, :]
+    stacked = np.concatenate([path.reshape(-1, n_features), matrix, baseline[None, :]])
+
+    probs, gradients = engine.predict_with_gradients(stacked)
+    average_gradients = gradients[:n_rows * steps].reshape(n_rows, steps, n_features).mean(axis=1)
+    attributions = (matrix - baseline) * average_gradients
+    return attributions, probs[n_rows * steps:-1], float(probs[-1])
+
+
+def occlusion(engine, matrix, baseline):
+    """Occlusion attributions: the probability change when one feature is reset to `baseline`.
+
+    All n_features occluded copies of every row are scored together with
+    the rows and the baseline in one `engine.predict` call; works with any
+    engine. Returns the same triple as integrated_gradients.
+    """
+    n_rows, n_features = matrix.shape
+    occluded = np.repeat(matrix[:, None, :], n_features, axis=1)
+    diagonal = np.arange(n_features)
+    occluded[:, diagonal, diagonal] = baseline
+    stacked = np.concatenate([occluded.reshape(-1, n_features), matrix, baseline[None, :]])
+
+    probs = np.asarray(engine.predict(stacked), dtype=np.float32).reshape(-1)
+    row_probs = probs[n_rows * n_features:-1]
+    attributions = row_probs[:, None] - probs[:n_rows * n_features].reshape(n_rows, n_features)
+    return attributions, row_probs, float(probs[-1])
+
+
+def explain(engine, matrix, baseline, method='auto', steps=32):
+    """(method used, attributions, probabilities, baseline probability).
+
+    'auto' uses integrated gradients when the engine can compute input
+    gradients (the NumPy engines) and occlusion otherwise (Keras).
+    """
+    if method not in ATTRIBUTION_METHODS:
+        raise ValueError(f"Unknown attribution method {method!r}; expected one of {ATTRIBUTION_METHODS}")
+    has_gradients = hasattr(engine, 'predict_with_gradients')
+    if method == 'auto':
+        method = 'integrated_gradients' if has_gradients else 'occlusion'
+    elif method == 'integrated_gradients' and not has_gradients:
+        raise ValueError(f"The {engine.name} engine cannot compute input gradients; use occlusion")
+    matrix = np.asarray(matrix, dtype=np.float32)
+    baseline = np.asarray(baseline, dtype=np.float32)
+    if method == 'integrated_gradients':
+        return (method, *integrated_gradients(engine, matrix, baseline, steps))
+    return (method, *occlusion(engine, matrix, baseline))
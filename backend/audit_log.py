@@ -0,0 +1,146 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+
+class AuditLog:
+    """Sampled JSON-lines request log written by a background thread.
+
+    `record` never blocks: a sampled-out call returns immediately, and a
+    record arriving while `max_queue_size` others are waiting is dropped and
+    counted. The writer thread serialises records in batches of up to
+    `batch_size`, appends them with one write and rotates the file once it
+    exceeds `max_bytes`, keeping `backup_count` old files (path.1, path.2, ...).
+    """
+
+    def __init__(self, path, sample_rate=1.0, max_queue_size=10000, batch_size=256,
+                 max_bytes=50 * 1024 * 1024, backup_count=5):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._writer = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+        self._recorded = 0
+        self._dropped = 0
+        self._written = 0
+        self._rotations = 0
+        self._write_errors = 0
+
+    # ---------------------------------------------------
+    # PUBLIC API
+    # ---------------------------------------------------
+    def record(self, entry):
+        """Queue one dict for writing, subject to sampling; returns False if it was not queued"""
+        if self.sample_rate <= 0 or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            return False
+        self._ensure_started()
+        entry.setdefault('ts', time.time())
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+        with self._lock:
+            self._recorded += 1
+        return True
+
+    def close(self, timeout=5.0):
+        """Flush queued records; called at interpreter exit"""
+        if self._writer is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._writer.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'path': self.path,
+                'sample_rate': self.sample_rate,
+                'max_queue_size': self.max_queue_size,
+                'queue_depth': self._queue.qsize(),
+                'recorded': self._recorded,
+                'dropped': self._dropped,
+                'written': self._written,
+                'rotations': self._rotations,
+                'write_errors': self._write_errors,
+            }
+
+    # ---------------------------------------------------
+    # WRITER
+    # ---------------------------------------------------
+    def _reset_after_fork(self):
+        # Each forked worker writes (and rotates) its own file
+        root, ext = os.path.splitext(self.path)
+        self.path = f"{root}.{os.getpid()}{ext}"
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._lock = threading.Lock()
+        self._writer = None
+
+    def _ensure_started(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._writer = threading.Thread(target=self._run, name="AuditLog", daemon=True)
+                self._writer.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_size and batch[-1] is not None:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        with self._lock:
+            self._rotations += 1
+
+    def _write(self, entries):
+        payload = "".join(json.dumps(entry, separators=(',', ':'), default=str) + "\n" for entry in entries)
+        try:
+            if self.max_bytes > 0 and os.path.exists(self.path) \
+                    and os.path.getsize(self.path) + len(payload) > self.max_bytes:
+                self._rotate()
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(payload)
+        except OSError:
+            with self._lock:
+                self._write_errors += 1
+            return
+        with self._lock:
+            self._written += len(entries)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            stop = batch[-1] is None
+            entries = [entry for entry in batch if entry is not None]
+            if entries:
+                self._write(entries)
+            if stop:
+                return
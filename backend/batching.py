@@ -0,0 +1,193 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+
+
+class BatcherQueueFull(Exception):
+    """Raised when the micro-batcher queue is at capacity"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes before its row is scored"""
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row predictions into one forward pass.
+
+    Rows are collected until either `max_batch_size` rows are waiting or the
+    oldest row has waited `max_wait_ms`, then scored with one `predict_fn`
+    call on an (n, n_features) float32 matrix. With `tagged=True`,
+    `predict_fn` returns (probabilities, tag) and every future resolves to
+    (probability, tag), e.g. the model version that scored the batch.
+    Rows submitted with a `deadline` (a time.perf_counter() value) that has
+    passed by the time their batch is dispatched are dropped before the
+    forward pass and their futures fail with DeadlineExceeded; so are rows
+    whose caller stopped waiting at its deadline (predict cancels the
+    future), and `on_expired(n_rows)` is called with the number dropped. When a
+    batch holds rows submitted with `shadowed=False` (e.g. canary probes),
+    `predict_fn` is called as predict_fn(matrix, shadowed=mask), `mask`
+    being True for the rows that may be shadowed.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0, max_queue_size=1024, tagged=False,
+                 on_expired=None):
+        self.predict_fn = predict_fn
+        self.tagged = tagged
+        self.on_expired = on_expired
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_size = max_queue_size
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._worker = None
+        # Threads and held locks do not survive fork(): a child starts clean
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+        self._submitted = 0
+        self._rejected = 0
+        self._expired = 0
+        self._batches = 0
+        self._rows = 0
+        self._max_batch_seen = 0
+        self._last_batch_size = 0
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+        self._total_forward = 0.0
+
+    # ---------------------------------------------------
+    # PUBLIC API
+    # ---------------------------------------------------
+    def submit(self, row, deadline=None, shadowed=True):
+        """Queue one feature row and return a Future resolving to its probability (and tag)"""
+        self._ensure_started()
+        future = Future()
+        try:
+            self._queue.put_nowait((np.asarray(row, dtype=np.float32), future, time.perf_counter(), deadline,
+                                    shadowed))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise BatcherQueueFull(f"Prediction queue is full ({self.max_queue_size} pending rows)")
+        with self._lock:
+            self._submitted += 1
+        return future
+
+    def predict(self, row, timeout=None, deadline=None, shadowed=True):
+        """Probability (and tag) of one row; raises DeadlineExceeded once `deadline` has passed"""
+        future = self.submit(row, deadline, shadowed)
+        if deadline is not None:
+            remaining = deadline - time.perf_counter()
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        try:
+            return future.result(timeout=max(timeout, 0.0) if timeout is not None else None)
+        except FutureTimeout:
+            # A cancelled row is dropped unscored when the worker reaches it; cancel() fails
+            # only once its batch is in the forward pass, which can no longer be recovered
+            future.cancel()
+            if deadline is None:
+                raise
+            raise DeadlineExceeded("Deadline passed while waiting for the micro-batcher")
+
+    def stats(self):
+        with self._lock:
+            batches = self._batches
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'max_queue_size': self.max_queue_size,
+                'queue_depth': self._queue.qsize(),
+                'submitted': self._submitted,
+                'rejected': self._rejected,
+                'expired': self._expired,
+                'batches': batches,
+                'rows': self._rows,
+                'avg_batch_size': (self._rows / batches) if batches else 0.0,
+                'max_batch_size_seen': self._max_batch_seen,
+                'last_batch_size': self._last_batch_size,
+                'avg_wait_ms': (self._total_wait / self._rows * 1000.0) if self._rows else 0.0,
+                'max_wait_ms_seen': self._max_wait_seen * 1000.0,
+                'avg_forward_ms': (self._total_forward / batches * 1000.0) if batches else 0.0,
+            }
+
+    # ---------------------------------------------------
+    # WORKER
+    # ---------------------------------------------------
+    def _reset_after_fork(self):
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def _ensure_started(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="MicroBatcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drop_expired(self, batch, now):
+        """Fail rows whose deadline has passed and drop cancelled ones; returns the rows
+        still worth scoring, marked running so their callers can no longer cancel them"""
+        live = []
+        for item in batch:
+            future = item[1]
+            if item[3] is not None and item[3] <= now and not future.cancelled():
+                future.set_exception(DeadlineExceeded("Deadline passed before the row was scored"))
+            elif future.set_running_or_notify_cancel():
+                live.append(item)
+        if len(live) < len(batch):
+            with self._lock:
+                self._expired += len(batch) - len(live)
+            if self.on_expired is not None:
+                self.on_expired(len(batch) - len(live))
+        return live
+
+    def _run(self):
+        while True:
+            batch = self._drop_expired(self._collect(), time.perf_counter())
+            if not batch:
+                continue
+            dispatched = time.perf_counter()
+            try:
+                matrix = np.stack([item[0] for item in batch])
+                shadowed = np.array([item[4] for item in batch], dtype=bool)
+                output = self.predict_fn(matrix) if shadowed.all() else self.predict_fn(matrix, shadowed=shadowed)
+                probs, tag = output if self.tagged else (output, None)
+                probs = np.asarray(probs, dtype=np.float32).reshape(-1)
+                for (_, future, _, _, _), prob in zip(batch, probs):
+                    future.set_result((float(prob), tag) if self.tagged else float(prob))
+            except Exception as e:
+                for _, future, _, _, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finished = time.perf_counter()
+
+            waits = [dispatched - item[2] for item in batch]
+            with self._lock:
+                self._batches += 1
+                self._rows += len(batch)
+                self._last_batch_size = len(batch)
+                self._max_batch_seen = max(self._max_batch_seen, len(batch))
+                self._total_wait += sum(waits)
+                self._max_wait_seen = max(self._max_wait_seen, max(waits))
+                self._total_forward += finished - dispatched
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the executor already holds `max_pending` tasks"""
+
+
+class BoundedExecutor:
+    """Thread pool that refuses work instead of queueing it without limit.
+
+    At most `max_workers` tasks run at once and at most `max_pending` tasks
+    (running + queued) are admitted; `submit` raises ExecutorSaturated for
+    anything beyond that so callers can shed load immediately.
+    """
+
+    def __init__(self, max_workers=4, max_pending=64, name="Inference"):
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self.name = name
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+        self._pending = 0
+        self._max_pending_seen = 0
+        self._submitted = 0
+        self._rejected = 0
+
+    def _reset_after_fork(self):
+        # Pool threads do not survive fork(): a child starts with an empty pool
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn, *args):
+        """Schedule `fn(*args)` and return its concurrent Future"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise ExecutorSaturated(f"Inference executor is full ({self.max_pending} pending tasks)")
+            self._pending += 1
+            self._submitted += 1
+            self._max_pending_seen = max(self._max_pending_seen, self._pending)
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    @property
+    def saturated(self):
+        return self._pending >= self.max_pending
+
+    async def run(self, fn, *args):
+        """Await `fn(*args)` on the pool without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'max_pending_seen': self._max_pending_seen,
+                'submitted': self._submitted,
+                'rejected': self._rejected,
+            }
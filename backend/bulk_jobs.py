@@ -0,0 +1,270 @@
+import csv
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from inference_pool import lower_thread_priority
+
+JOB_FORMATS = ('csv', 'parquet')
+
+# Terminal states; anything else is still queued or running
+FINISHED_STATES = ('succeeded', 'failed', 'cancelled')
+
+
+class JobQueueFull(Exception):
+    """Raised when `max_queued` jobs are already waiting or running"""
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload grows past `max_upload_bytes`"""
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class BulkJob:
+    """State of one uploaded file being scored in the background"""
+
+    def __init__(self, job_id, filename, file_format, job_dir):
+        self.id = job_id
+        self.filename = filename
+        self.format = file_format
+        self.dir = job_dir
+        self.input_path = os.path.join(job_dir, f"input.{file_format}")
+        self.result_path = os.path.join(job_dir, "result.csv")
+
+        self.status = 'queued'
+        self.error = None
+        self.rows_total = None
+        self.rows_done = 0
+        self.rows_failed = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = threading.Event()
+        self.upload = None
+        self.upload_bytes = 0
+
+    @property
+    def result_name(self):
+        """Download name of the result: <upload name>_scored.csv"""
+        return f"{os.path.splitext(os.path.basename(self.filename))[0] or 'job'}_scored.csv"
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def to_dict(self):
+        progress = None
+        if self.rows_total:
+            progress = round(self.rows_done / self.rows_total, 4)
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'format': self.format,
+            'status': self.status,
+            'error': self.error,
+            'rows_total': self.rows_total,
+            'rows_done': self.rows_done,
+            'rows_failed': self.rows_failed,
+            'progress': progress,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class BulkJobManager:
+    """Scores uploaded CSV/Parquet files on a small pool of low-priority threads.
+
+    `score_frame(frame, first_row)` turns one DataFrame chunk into a dict
+    of equal-length result columns, one of them 'error'. At most
+    `max_concurrent` jobs run at once and at most `max_queued` are accepted
+    (running included); job threads lower their OS scheduling priority by
+    `niceness` so interactive requests keep the CPU. Only the newest
+    `max_history` finished jobs keep their files.
+    """
+
+    def __init__(self, score_frame, job_dir, max_concurrent=1, max_queued=8, chunk_rows=4096,
+                 niceness=10, max_history=50, max_upload_bytes=512 * 1024 * 1024):
+        self.score_frame = score_frame
+        self.job_dir = job_dir
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.chunk_rows = chunk_rows
+        self.niceness = niceness
+        self.max_history = max_history
+        self.max_upload_bytes = max_upload_bytes
+
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # Pool threads do not survive fork(); jobs queued in the parent stay there
+        self._lock = threading.Lock()
+        self._pool = None
+        self._jobs = OrderedDict()
+
+    # ---------------------------------------------------
+    # PUBLIC API
+    # ---------------------------------------------------
+    def create(self, filename, file_format):
+        """Reserve a queue slot and open the input file of a new upload; raises JobQueueFull.
+
+        Feed the upload to `append_upload`, then call `start` (or `discard`).
+        """
+        if file_format not in JOB_FORMATS:
+            raise ValueError(f"Unsupported format {file_format!r}; expected one of {JOB_FORMATS}")
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if not job.finished)
+            if active >= self.max_queued:
+                raise JobQueueFull(f"{active} bulk jobs are already queued or running")
+            job_id = uuid.uuid4().hex
+            job = BulkJob(job_id, filename, file_format, os.path.join(self.job_dir, job_id))
+            job.status = 'uploading'
+            self._jobs[job_id] = job
+        os.makedirs(job.dir, exist_ok=True)
+        job.upload = open(job.input_path, 'wb')
+        return job
+
+    def append_upload(self, job, data):
+        job.upload_bytes += len(data)
+        if job.upload_bytes > self.max_upload_bytes:
+            raise UploadTooLarge(f"Uploads are limited to {self.max_upload_bytes} bytes")
+        if not job.cancel_requested.is_set():
+            job.upload.write(data)
+
+    def start(self, job):
+        """Queue a job whose upload is complete, unless it was cancelled while uploading"""
+        job.upload.close()
+        with self._lock:
+            if job.finished:
+                if os.path.exists(job.input_path):
+                    os.remove(job.input_path)
+                return
+            job.status = 'queued'
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="BulkJob")
+            pool = self._pool
+        pool.submit(self._run, job)
+
+    def discard(self, job):
+        """Forget a job whose upload failed"""
+        job.upload.close()
+        with self._lock:
+            self._jobs.pop(job.id, None)
+        shutil.rmtree(job.dir, ignore_errors=True)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return [job.to_dict() for job in reversed(self._jobs.values())]
+
+    def cancel(self, job_id):
+        """Stop a job; returns the job, or None if unknown.
+
+        A job that has not started running (still uploading or queued) is
+        cancelled at once; a running one stops at its next chunk.
+        """
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel_requested.set()
+            with self._lock:
+                if job.status in ('uploading', 'queued'):
+                    self._finish(job, 'cancelled')
+        return job
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queued': self.max_queued,
+                'chunk_rows': self.chunk_rows,
+                'by_status': counts,
+            }
+
+    # ---------------------------------------------------
+    # WORKER
+    # ---------------------------------------------------
+    def _finish(self, job, status, error=None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+
+        finished = [j for j in self._jobs.values() if j.finished]
+        for old in finished[:max(len(finished) - self.max_history, 0)]:
+            del self._jobs[old.id]
+            shutil.rmtree(old.dir, ignore_errors=True)
+
+    def _iter_chunks(self, job):
+        import pandas as pd
+
+        if job.format == 'csv':
+            # Count records, not lines: quoted fields may contain newlines
+            with open(job.input_path, newline='', encoding='utf-8', errors='replace') as f:
+                job.rows_total = max(sum(1 for record in csv.reader(f) if record) - 1, 0)
+            yield from pd.read_csv(job.input_path, chunksize=self.chunk_rows)
+        else:
+            import pyarrow.parquet as pq
+
+            parquet = pq.ParquetFile(job.input_path)
+            job.rows_total = parquet.metadata.num_rows
+            for batch in parquet.iter_batches(batch_size=self.chunk_rows):
+                yield batch.to_pandas()
+
+    def _run(self, job):
+        with self._lock:
+            if job.finished:
+                if os.path.exists(job.input_path):
+                    os.remove(job.input_path)
+                return
+            job.status = 'running'
+            job.started_at = time.time()
+        lower_thread_priority(self.niceness)
+
+        # Results are written under a temporary name and only renamed to result.csv once
+        # every chunk is scored, so a failed or cancelled job never leaves a partial file
+        partial_path = job.result_path + '.partial'
+        try:
+            import pandas as pd
+
+            header = True
+            for frame in self._iter_chunks(job):
+                if job.cancel_requested.is_set():
+                    raise JobCancelled()
+                results = pd.DataFrame(self.score_frame(frame, job.rows_done))
+                results.to_csv(partial_path, mode='w' if header else 'a', header=header, index=False)
+                header = False
+                job.rows_done += len(frame)
+                job.rows_failed += int(results['error'].notna().sum())
+            if header:
+                raise ValueError("The uploaded file has no rows")
+            os.replace(partial_path, job.result_path)
+        except JobCancelled:
+            with self._lock:
+                self._finish(job, 'cancelled')
+            return
+        except Exception as e:
+            with self._lock:
+                self._finish(job, 'failed', error=f"{type(e).__name__}: {e}")
+            return
+        finally:
+            for path in (job.input_path, partial_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        with self._lock:
+            self._finish(job, 'succeeded')
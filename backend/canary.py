@@ -0,0 +1,191 @@
+import collections
+import logging
+import os
+import threading
+import time
+
+from shadow import DELTA_BUCKETS
+
+logger = logging.getLogger("Canary")
+
+
+class CanaryProber:
+    """Scores golden patients on a schedule and flags latency and output regressions.
+
+    `canaries` maps a name to {'row': feature row, 'expected_class': 0/1 or
+    None, 'expected_probability': float or None}; `probe_fn(row)` scores one
+    row through the serving path and returns (probability, model version).
+    Every `interval` seconds each canary is probed once and checked for:
+
+    - 'error': the probe raised;
+    - 'latency': it took longer than `latency_slo_ms`;
+    - 'class': the predicted class differs from `expected_class`;
+    - 'drift': the probability moved more than `drift_tolerance` from its
+      reference: `expected_probability` when configured, otherwise the first
+      probability seen for the current model version. Drift without a
+      version change is a silent model swap; a new version re-baselines.
+    """
+
+    def __init__(self, probe_fn, canaries, metrics, interval=30.0, drift_tolerance=0.01,
+                 latency_slo_ms=250.0, history=50):
+        self.probe_fn = probe_fn
+        self.canaries = dict(canaries)
+        self.metrics = metrics
+        self.interval = interval
+        self.drift_tolerance = drift_tolerance
+        self.latency_slo = latency_slo_ms / 1000.0
+        self.history = history
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+        self._ready = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+        self._reset_state()
+
+        metrics.counter('canary_probes_total', 'Canary probes run, by canary.')
+        metrics.counter('canary_regressions_total', 'Canary probes flagged as regressions, by canary and reason.')
+        metrics.counter('canary_model_changes_total', 'Model version changes seen by the canary prober.')
+        metrics.histogram('canary_probe_seconds', 'Latency of one canary probe through the serving path.')
+        metrics.histogram('canary_probability_drift', '|probability - reference| per canary probe.',
+                          buckets=DELTA_BUCKETS)
+        metrics.gauge('canary_probability', 'Probability returned by the latest probe of each canary.')
+        metrics.gauge('canary_healthy', '1 if the latest probe round raised no regression, else 0.')
+
+    def _reset_state(self):
+        self._rounds = 0
+        self._last_round_at = None
+        self._healthy = None
+        self._results = {}
+        self._references = {}
+        self._recent = collections.deque(maxlen=self.history)
+
+    # ---------------------------------------------------
+    # PUBLIC API
+    # ---------------------------------------------------
+    def start(self, ready=None):
+        """Probe in a background thread, after `ready` (a threading.Event) is set"""
+        if self.interval <= 0 or not self.canaries:
+            return False
+        with self._lock:
+            self._ready = ready
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="CanaryProber", daemon=True)
+                self._worker.start()
+        return True
+
+    def close(self):
+        self._stop.set()
+
+    def probe_all(self):
+        """Run one probe round now; returns the regressions it raised"""
+        regressions = []
+        for name, canary in self.canaries.items():
+            regressions.extend(self._probe(name, canary))
+        healthy = not regressions
+        self.metrics.set('canary_healthy', int(healthy))
+        with self._lock:
+            self._rounds += 1
+            self._last_round_at = time.time()
+            self._healthy = healthy
+            self._recent.extend(regressions)
+        return regressions
+
+    def stats(self):
+        with self._lock:
+            return {
+                'interval_seconds': self.interval,
+                'drift_tolerance': self.drift_tolerance,
+                'latency_slo_ms': self.latency_slo * 1000.0,
+                'running': self._worker is not None,
+                'rounds': self._rounds,
+                'last_round_at': self._last_round_at,
+                'healthy': self._healthy,
+                'canaries': {name: dict(result) for name, result in self._results.items()},
+                'recent_regressions': list(self._recent),
+            }
+
+    # ---------------------------------------------------
+    # PROBING
+    # ---------------------------------------------------
+    def _probe(self, name, canary):
+        self.metrics.inc('canary_probes_total', canary=name)
+        start = time.perf_counter()
+        try:
+            prob, version = self.probe_fn(canary['row'])
+        except Exception as e:
+            return self._record(name, {'error': str(e)}, [('error', str(e))])
+        latency = time.perf_counter() - start
+        self.metrics.observe('canary_probe_seconds', latency, canary=name)
+        self.metrics.set('canary_probability', prob, canary=name)
+
+        reasons = []
+        if latency > self.latency_slo:
+            reasons.append(('latency', f"{latency * 1000:.1f} ms > {self.latency_slo * 1000:g} ms"))
+        if canary.get('expected_class') is not None and int(prob > 0.5) != canary['expected_class']:
+            reasons.append(('class', f"predicted class {int(prob > 0.5)}, expected {canary['expected_class']}"))
+
+        reference, reference_version = canary.get('expected_probability'), version
+        if reference is None:
+            with self._lock:
+                reference, reference_version = self._references.setdefault(name, (prob, version))
+                if reference_version != version:
+                    # A reload the server knows about: the new version becomes the reference
+                    self._references[name] = (prob, version)
+            if reference_version != version:
+                self.metrics.inc('canary_model_changes_total')
+                logger.info(f"Canary {name}: model version {reference_version} -> {version}, "
+                            f"probability {reference:.4f} -> {prob:.4f}; re-baselined")
+                reference = prob
+        drift = abs(prob - reference)
+        self.metrics.observe('canary_probability_drift', drift, canary=name)
+        if drift > self.drift_tolerance:
+            reasons.append(('drift', f"probability {prob:.4f} vs reference {reference:.4f} "
+                                     f"(model version {version})"))
+
+        return self._record(name, {
+            'probability': prob,
+            'reference_probability': reference,
+            'drift': drift,
+            'latency_ms': latency * 1000.0,
+            'model_version': version,
+        }, reasons)
+
+    def _record(self, name, result, reasons):
+        now = time.time()
+        regressions = []
+        for reason, detail in reasons:
+            self.metrics.inc('canary_regressions_total', canary=name, reason=reason)
+            logger.warning(f"Canary {name} regression ({reason}): {detail}")
+            regressions.append({'canary': name, 'reason': reason, 'detail': detail, 'at': now})
+        with self._lock:
+            previous = self._results.get(name, {})
+            self._results[name] = {
+                **result,
+                'ok': not reasons,
+                'probed_at': now,
+                'regressions': previous.get('regressions', 0) + len(reasons),
+            }
+        return regressions
+
+    # ---------------------------------------------------
+    # WORKER
+    # ---------------------------------------------------
+    def _reset_after_fork(self):
+        # Each forked worker probes its own model and batcher
+        was_running = self._worker is not None
+        self._lock = threading.Lock()
+        self._worker = None
+        self._reset_state()
+        if was_running:
+            self.start(self._ready)
+
+    def _run(self):
+        if self._ready is not None:
+            self._ready.wait()
+        while not self._stop.is_set():
+            try:
+                self.probe_all()
+            except Exception as e:
+                logger.error(f"Canary probe round failed: {e}")
+            self._stop.wait(self.interval)
@@ -0,0 +1,224 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger("DriftMonitor")
+
+# Bins per continuous feature; features with few distinct values get one bin per value
+DRIFT_BINS = 20
+MAX_DISCRETE_VALUES = 12
+
+# Added to every bin count so empty bins do not make the PSI infinite
+PSI_SMOOTHING = 0.5
+
+
+def bin_edges(values, bins=DRIFT_BINS):
+    """Interior bin edges for one feature: midpoints between the values of a discrete
+    feature, otherwise the distinct quantiles that split `values` into `bins` equal parts"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    distinct = np.unique(values)
+    if len(distinct) <= MAX_DISCRETE_VALUES:
+        return (distinct[:-1] + distinct[1:]) / 2.0
+    return np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+
+
+def population_stability_index(reference, current):
+    """PSI of `current` against `reference` bin counts: sum((c - r) * ln(c / r)) over bin shares"""
+    reference = np.asarray(reference, dtype=np.float64) + PSI_SMOOTHING
+    current = np.asarray(current, dtype=np.float64) + PSI_SMOOTHING
+    reference /= reference.sum()
+    current /= current.sum()
+    return float(np.sum((current - reference) * np.log(current / reference)))
+
+
+class HistogramSketch:
+    """Fixed-bin histograms of every feature in one flat count array.
+
+    Memory is fixed by the bin edges, updating is one vectorised pass over
+    the new rows, and two sketches with the same edges merge by adding
+    their counts, so per-worker or per-window sketches can be combined.
+    """
+
+    def __init__(self, edges):
+        self.edges = [np.asarray(e, dtype=np.float64) for e in edges]
+        widest = max((len(e) for e in self.edges), default=0)
+        # Padding with +inf keeps every feature's bin index below its own bin count
+        self._padded = np.full((len(self.edges), widest), np.inf)
+        for i, e in enumerate(self.edges):
+            self._padded[i, :len(e)] = e
+        sizes = [len(e) + 1 for e in self.edges]
+        self._offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+        self._bounds = np.cumsum(sizes)
+        self.counts = np.zeros(sum(sizes), dtype=np.int64)
+        self.rows = 0
+
+    def empty_like(self):
+        return HistogramSketch(self.edges)
+
+    def bin_counts(self, matrix):
+        """Flat bin counts of an (n, n_features) matrix, without touching this sketch"""
+        matrix = np.asarray(matrix, dtype=np.float64).reshape(-1, len(self.edges))
+        bins = (matrix[:, :, None] >= self._padded[None, :, :]).sum(axis=2) + self._offsets
+        return np.bincount(bins.ravel(), minlength=len(self.counts))
+
+    def add(self, counts, rows):
+        self.counts += counts
+        self.rows += rows
+
+    def merge(self, other):
+        self.add(other.counts, other.rows)
+
+    def feature_counts(self, feature):
+        start = self._offsets[feature]
+        return self.counts[start:self._bounds[feature]]
+
+
+def load_reference(path, features):
+    """HistogramSketch of the training data saved by scripts/drift_reference.py, in `features` order"""
+    with np.load(path) as artifact:
+        saved = artifact['features'].tolist()
+        missing = [f for f in features if f not in saved]
+        if missing:
+            raise ValueError(f"{path} has no reference for {missing}")
+        sketch = HistogramSketch([artifact[f'edges_{f}'] for f in features])
+        sketch.add(np.concatenate([artifact[f'counts_{f}'] for f in features]), int(artifact['rows']))
+    return sketch
+
+
+class DriftMonitor:
+    """Compares the inputs the service receives with the training data, per feature.
+
+    `update(matrix)` adds the validated feature rows of a request to the
+    current window's sketch (constant memory; the work is proportional to
+    the rows in the request, not to the traffic seen so far). Every
+    `interval` seconds a background thread closes the window once it holds
+    `min_rows` rows, merges it into the lifetime sketch and publishes the
+    PSI of both against the reference as `input_drift_psi` gauges; a PSI
+    above `threshold` marks the feature as drifted. With no reference the
+    monitor does nothing.
+    """
+
+    def __init__(self, features, reference, metrics, interval=60.0, min_rows=500, threshold=0.2):
+        self.features = list(features)
+        self.reference = reference
+        self.metrics = metrics
+        self.interval = interval
+        self.min_rows = min_rows
+        self.threshold = threshold
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+        self._reset_state()
+
+        metrics.gauge('input_drift_psi', 'Population stability index of each input feature vs. the training data.')
+        metrics.gauge('input_drift_features_drifted', 'Input features whose PSI exceeds the drift threshold.')
+        metrics.counter('input_drift_rows_total', 'Rows compared with the training data by the drift monitor.')
+        metrics.counter('input_drift_evaluations_total', 'Drift windows evaluated.')
+
+    def _reset_state(self):
+        self._window = self.reference.empty_like() if self.reference is not None else None
+        self._lifetime = self.reference.empty_like() if self.reference is not None else None
+        self._scores = {}
+        self._evaluations = 0
+        self._last_evaluated_at = None
+
+    # ---------------------------------------------------
+    # PUBLIC API
+    # ---------------------------------------------------
+    @property
+    def enabled(self):
+        return self.reference is not None
+
+    def update(self, matrix):
+        if self.reference is None or len(matrix) == 0:
+            return
+        counts = self._window.bin_counts(matrix)
+        with self._lock:
+            self._window.add(counts, len(matrix))
+
+    def evaluate(self, force=False):
+        """Close the current window if it has enough rows; returns {window: {feature: PSI}} or None"""
+        if self.reference is None:
+            return None
+        with self._lock:
+            window = self._window
+            if window.rows == 0 or (window.rows < self.min_rows and not force):
+                return None
+            self._window = window.empty_like()
+            self._lifetime.merge(window)
+            lifetime = self._lifetime
+
+        scores = {}
+        for name, sketch in (('recent', window), ('lifetime', lifetime)):
+            scores[name] = {
+                feature: population_stability_index(self.reference.feature_counts(i), sketch.feature_counts(i))
+                for i, feature in enumerate(self.features)
+            }
+            drifted = [f for f, psi in scores[name].items() if psi > self.threshold]
+            for feature, psi in scores[name].items():
+                self.metrics.set('input_drift_psi', psi, feature=feature, window=name)
+            self.metrics.set('input_drift_features_drifted', len(drifted), window=name)
+        self.metrics.inc('input_drift_rows_total', window.rows)
+        self.metrics.inc('input_drift_evaluations_total')
+
+        drifted = [f for f, psi in scores['recent'].items() if psi > self.threshold]
+        if drifted:
+            logger.warning(f"Input drift over the last {window.rows} rows: " +
+                           ", ".join(f"{f} (PSI {scores['recent'][f]:.3f})" for f in drifted))
+        with self._lock:
+            self._scores = {name: {**values, 'rows': window.rows if name == 'recent' else lifetime.rows}
+                            for name, values in scores.items()}
+            self._evaluations += 1
+            self._last_evaluated_at = time.time()
+        return scores
+
+    def start(self):
+        if self.reference is None or self.interval <= 0:
+            return False
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="DriftMonitor", daemon=True)
+                self._worker.start()
+        return True
+
+    def close(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'interval_seconds': self.interval,
+                'min_rows': self.min_rows,
+                'psi_threshold': self.threshold,
+                'reference_rows': self.reference.rows if self.reference is not None else 0,
+                'window_rows': self._window.rows if self._window is not None else 0,
+                'evaluations': self._evaluations,
+                'last_evaluated_at': self._last_evaluated_at,
+                'psi': {name: dict(values) for name, values in self._scores.items()},
+            }
+
+    # ---------------------------------------------------
+    # WORKER
+    # ---------------------------------------------------
+    def _reset_after_fork(self):
+        # Each forked worker sketches its own traffic
+        was_running = self._worker is not None
+        self._lock = threading.Lock()
+        self._worker = None
+        self._reset_state()
+        if was_running:
+            self.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.evaluate()
+            except Exception as e:
+                logger.error(f"Drift evaluation failed: {e}")
@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import os
+
+import numpy as np
+
+from numpy_runtime import NumpyMLP
+from quantized_runtime import QuantizedMLP, QUANTIZATION_MODES
+from shared_weights import load_shared_weights
+
+logger = logging.getLogger("FlaskBackend")
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def import_tensorflow():
+    """Import TensorFlow with its thread pools sized from TF_NUM_INTRAOP_THREADS / TF_NUM_INTEROP_THREADS"""
+    import tensorflow as tf
+    for var, setter in (('TF_NUM_INTRAOP_THREADS', tf.config.threading.set_intra_op_parallelism_threads),
+                        ('TF_NUM_INTEROP_THREADS', tf.config.threading.set_inter_op_parallelism_threads)):
+        if os.environ.get(var):
+            try:
+                setter(int(os.environ[var]))
+            except RuntimeError:
+                # Already initialised by an earlier model load
+                pass
+    return tf
+
+
+class KerasEngine:
+    """Scores (n, 13) float32 matrices with the original Keras model"""
+
+    name = 'keras'
+
+    def __init__(self, model, features):
+        self.model = model
+        self.features = list(features)
+
+    @classmethod
+    def load(cls, path, features):
+        # TensorFlow is only imported when the Keras engine is actually requested
+        tf = import_tensorflow()
+        return cls(tf.keras.models.load_model(path), features)
+
+    def predict(self, matrix):
+        model_inputs = {
+            feature: matrix[:, i:i + 1]
+            for i, feature in enumerate(self.features)
+        }
+        return self.model.predict(model_inputs, batch_size=max(len(matrix), 1), verbose=0)[:, 0]
+
+
+class TracedKerasEngine(KerasEngine):
+    """Keras model wrapped in concrete tf.functions with fixed batch-size buckets.
+
+    `model.predict` builds a data pipeline and dispatches through a generic
+    function on every call. Here each bucket gets one pre-traced graph;
+    requests are zero-padded up to the nearest bucket (larger requests are
+    split into chunks of the largest one), and every bucket is run once at
+    load time so no request pays the tracing cost.
+    """
+
+    name = 'keras-traced'
+
+    def __init__(self, model, features, buckets=(1, 8, 32, 256)):
+        import tensorflow as tf
+        super().__init__(model, features)
+        self.buckets = sorted(set(int(b) for b in buckets))
+        self._functions = {}
+        for size in self.buckets:
+            signature = {f: tf.TensorSpec(shape=(size, 1), dtype=tf.float32, name=f) for f in self.features}
+            traced = tf.function(lambda inputs: model(inputs, training=False))
+            self._functions[size] = traced.get_concrete_function(signature)
+        self.warm_up()
+
+    @classmethod
+    def load(cls, path, features, buckets=(1, 8, 32, 256)):
+        tf = import_tensorflow()
+        return cls(tf.keras.models.load_model(path), features, buckets)
+
+    def warm_up(self):
+        for size in self.buckets:
+            self._run_bucket(np.zeros((size, len(self.features)), dtype=np.float32), size)
+
+    def _run_bucket(self, matrix, size):
+        inputs = {feature: matrix[:, i:i + 1] for i, feature in enumerate(self.features)}
+        return self._functions[size](inputs).numpy()[:, 0]
+
+    def predict(self, matrix):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        largest = self.buckets[-1]
+        outputs = []
+        for start in range(0, max(len(matrix), 1), largest):
+            chunk = matrix[start:start + largest]
+            size = next(b for b in self.buckets if b >= len(chunk))
+            if len(chunk) < size:
+                padded = np.zeros((size, matrix.shape[1]), dtype=np.float32)
+                padded[:len(chunk)] = chunk
+                chunk_probs = self._run_bucket(padded, size)[:len(chunk)]
+            else:
+                chunk_probs = self._run_bucket(np.ascontiguousarray(chunk), size)
+            outputs.append(chunk_probs)
+        return np.concatenate(outputs)[:len(matrix)]
+
+
+def model_version(engine, keras_path, numpy_path):
+    """Short content hash identifying the model an engine serves.
+
+    NumPy exports carry the hash of the .keras file they came from, so every
+    engine built from the same trained model reports the same version.
+    """
+    digest = getattr(engine, 'source_sha256', None)
+    if not digest:
+        digest = file_sha256(numpy_path if isinstance(engine, NumpyMLP) else keras_path)
+    return digest[:12]
+
+
+def load_engine(kind, features, keras_path, numpy_path, buckets=(1, 8, 32, 256), shared_path=None):
+    """Load the requested inference engine ('auto', 'numpy', 'int8', 'float16', 'keras' or 'traced').
+
+    'auto' prefers the exported NumPy artifact and falls back to Keras when
+    it has not been generated with scripts/export_numpy_model.py or was
+    exported from a different version of the Keras file. 'int8' and
+    'float16' quantize the NumPy export at load time (a storage/accuracy
+    trade-off: they run at float32 speed and memory on dequantized kernels). 'traced' serves the
+    Keras model through pre-traced functions for the given batch-size buckets.
+    'mmap' maps the flat weights file written by shared_weights.py, so
+    pre-forked workers share one copy (see serve_workers.py).
+
+    The engine is stamped with `engine.version` (see model_version).
+    """
+    engine = _load_engine(kind, features, keras_path, numpy_path, buckets, shared_path)
+    engine.version = model_version(engine, keras_path, numpy_path)
+    return engine
+
+
+def load_candidate(path, features):
+    """Load a shadow candidate from a NumPy export (.npz) or a Keras model (.keras)"""
+    if path.endswith('.npz'):
+        engine = NumpyMLP.load(path)
+        if engine.features != list(features):
+            raise ValueError(f"Candidate {path} features {engine.features} do not match {list(features)}")
+        engine.version = model_version(engine, None, path)
+    elif path.endswith('.keras'):
+        engine = KerasEngine.load(path, features)
+        engine.version = model_version(engine, path, None)
+    else:
+        raise ValueError(f"Unsupported candidate model file: {path}")
+    return engine
+
+
+def _load_engine(kind, features, keras_path, numpy_path, buckets, shared_path):
+    exported = None
+    if kind == 'auto':
+        kind = 'keras'
+        if os.path.exists(numpy_path):
+            exported = NumpyMLP.load(numpy_path)
+            if exported.source_sha256 and os.path.exists(keras_path) and \
+                    exported.source_sha256 != file_sha256(keras_path):
+                logger.warning(f"{numpy_path} was exported from a different {keras_path}; "
+                               f"re-run export_numpy_model.py. Falling back to the Keras model.")
+            else:
+                kind = 'numpy'
+
+    if kind == 'numpy' or kind in QUANTIZATION_MODES:
+        logger.info(f"Loading NumPy model from {numpy_path}...")
+        engine = exported if exported is not None else NumpyMLP.load(numpy_path)
+        if kind in QUANTIZATION_MODES:
+            engine = QuantizedMLP(engine, kind)
+        if engine.features != list(features):
+            raise ValueError(f"NumPy model features {engine.features} do not match {list(features)}")
+        return engine
+    if kind == 'mmap':
+        logger.info(f"Mapping shared model weights from {shared_path}...")
+        engine = load_shared_weights(shared_path)
+        if engine.features != list(features):
+            raise ValueError(f"Shared model features {engine.features} do not match {list(features)}")
+        return engine
+    if kind == 'keras':
+        logger.info(f"Loading TensorFlow Keras model from {keras_path}...")
+        return KerasEngine.load(keras_path, features)
+    if kind == 'traced':
+        logger.info(f"Loading TensorFlow Keras model from {keras_path} (traced buckets {list(buckets)})...")
+        return TracedKerasEngine.load(keras_path, features, buckets)
+    raise ValueError(f"Unknown inference engine: {kind}")
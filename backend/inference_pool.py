@@ -0,0 +1,170 @@
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger("InferencePool")
+
+
+def configure_threads(intra_op, inter_op):
+    """Cap the threads each forward pass may use; returns the settings that took effect.
+
+    `intra_op` bounds the BLAS/OpenMP pools NumPy calls into (through
+    threadpoolctl, when installed) and TensorFlow's intra-op pool;
+    `inter_op` bounds TensorFlow's inter-op pool. TensorFlow's pools cannot
+    be resized once it is initialised, so its counts are passed through the
+    environment to engines.import_tensorflow, which applies them when the
+    Keras model is loaded.
+    """
+    applied = {'intra_op': intra_op, 'inter_op': inter_op, 'blas': None, 'tensorflow': None}
+
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=intra_op)
+        applied['blas'] = 'threadpoolctl'
+    except ImportError:
+        # Only libraries loaded after this point (e.g. in child processes) see these
+        for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+            os.environ[var] = str(intra_op)
+        applied['blas'] = 'environment'
+
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(intra_op)
+    os.environ['TF_NUM_INTEROP_THREADS'] = str(inter_op)
+    applied['tensorflow'] = 'environment'
+    if 'tensorflow' in sys.modules:
+        tf = sys.modules['tensorflow']
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+            applied['tensorflow'] = 'config'
+        except RuntimeError as e:
+            logger.warning(f"TensorFlow is already initialised; its thread pools keep their size: {e}")
+            applied['tensorflow'] = 'unchanged'
+    return applied
+
+
+def lower_thread_priority(niceness):
+    """Renice the calling thread by `niceness` (no-op when <= 0 or unsupported); returns True if applied"""
+    if niceness <= 0 or not hasattr(os, 'setpriority'):
+        return False
+    try:
+        # On Linux the "process" priority of a native thread id applies to that thread only
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), niceness)
+    except OSError:
+        return False
+    return True
+
+
+class InferencePool:
+    """Fixed set of threads that run the latency-critical forward passes.
+
+    However many request threads call `run` at once, at most `workers`
+    forward passes execute concurrently, each with the intra-op threads
+    set by configure_threads, so workers x intra-op threads can be sized
+    to the host instead of oversubscribing it. Background work (bulk jobs,
+    shadow candidates) is kept off the pool so it cannot queue ahead of
+    requests. Callers block until their call has run on a pool thread and
+    get its result (or exception).
+    """
+
+    def __init__(self, workers=1, name="InferenceWorker"):
+        self.workers = workers
+        self.name = name
+        self.settings = {}
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+        self._calls = 0
+        self._busy = 0
+        self._max_busy_seen = 0
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+        self._total_run = 0.0
+
+    def _reset_after_fork(self):
+        # Pool threads do not survive fork(): a child starts with an empty pool
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+        self._lock = threading.Lock()
+        self._busy = 0
+
+    def _timed(self, enqueued, fn, args):
+        started = time.perf_counter()
+        with self._lock:
+            self._busy += 1
+            self._max_busy_seen = max(self._max_busy_seen, self._busy)
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._busy -= 1
+                self._calls += 1
+                self._total_wait += started - enqueued
+                self._max_wait_seen = max(self._max_wait_seen, started - enqueued)
+                self._total_run += finished - started
+
+    def run(self, fn, *args):
+        """Run `fn(*args)` on a pool thread and return its result"""
+        return self._pool.submit(self._timed, time.perf_counter(), fn, args).result()
+
+    def stats(self):
+        with self._lock:
+            calls = self._calls
+            return {
+                'workers': self.workers,
+                **self.settings,
+                'busy': self._busy,
+                'max_busy_seen': self._max_busy_seen,
+                'calls': calls,
+                'avg_wait_ms': (self._total_wait / calls * 1000.0) if calls else 0.0,
+                'max_wait_ms_seen': self._max_wait_seen * 1000.0,
+                'avg_run_ms': (self._total_run / calls * 1000.0) if calls else 0.0,
+            }
+
+
+# ---------------------------------------------------
+# BENCHMARK
+# ---------------------------------------------------
+def candidate_configs(cpus, tune_inter_op, background_threads=0):
+    """(workers, intra-op, inter-op) settings worth trying: powers of two with
+    (workers + background_threads) x intra <= cpus, so background scorers keep their share"""
+    powers = [1 << i for i in range(cpus.bit_length()) if 1 << i <= cpus]
+    inter_ops = [1, 2] if tune_inter_op else [1]
+    configs = [(workers, intra, inter) for workers in powers for intra in powers
+               for inter in inter_ops if (workers + background_threads) * intra <= cpus]
+    # A host with fewer cores than threads still gets the smallest setting
+    return configs or [(1, 1, inter) for inter in inter_ops]
+
+
+def measure_throughput(predict_fn, n_features, clients, batch_rows, seconds):
+    """Rows/s and latency percentiles of `clients` threads calling `predict_fn` back to back"""
+    matrix = np.random.default_rng(0).random((batch_rows, n_features), dtype=np.float32)
+    stop = time.perf_counter() + seconds
+    latencies = [[] for _ in range(clients)]
+
+    def client(timings):
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            predict_fn(matrix)
+            timings.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(timings,)) for timings in latencies]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    timings = np.concatenate([np.asarray(t) for t in latencies]) * 1000.0
+    return {
+        'rows_per_second': len(timings) * batch_rows / elapsed,
+        'p50_ms': float(np.percentile(timings, 50)) if len(timings) else None,
+        'p99_ms': float(np.percentile(timings, 99)) if len(timings) else None,
+    }
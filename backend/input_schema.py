@@ -0,0 +1,217 @@
+import math
+
+import numpy as np
+
+# Words accepted for yes/no style features, in addition to numbers
+BOOLEAN_VOCABULARY = {
+    'yes': 1.0, 'y': 1.0, 'true': 1.0,
+    'no': 0.0, 'n': 0.0, 'false': 0.0,
+}
+
+MISSING_POLICIES = ('fill', 'reject')
+
+
+class FeatureSpec:
+    """One model input: the keys it may arrive under, accepted words and valid range"""
+
+    def __init__(self, name, aliases=(), vocabulary=None, low=-math.inf, high=math.inf, default=0.0):
+        self.name = name
+        self.aliases = tuple(aliases)
+        self.vocabulary = dict(vocabulary or {})
+        self.low = low
+        self.high = high
+        self.default = default
+
+    def describe(self):
+        return {
+            'name': self.name,
+            'aliases': list(self.aliases),
+            'vocabulary': self.vocabulary,
+            'range': [self.low, self.high],
+            'default': self.default,
+        }
+
+
+class InputSchema:
+    """Converts patient payloads to a float32 feature matrix in one pass.
+
+    The per-feature aliases, vocabularies and ranges are compiled into flat
+    lookup tables when the schema is built, so conversion is one dict lookup
+    per key plus a float() call; range and finiteness checks then run
+    vectorised over the whole matrix. Missing features (absent, None or an
+    empty string) are filled with the feature default under the 'fill'
+    policy and reported as errors under 'reject'.
+    """
+
+    def __init__(self, features, missing_policy='fill'):
+        if missing_policy not in MISSING_POLICIES:
+            raise ValueError(f"missing_policy must be one of {MISSING_POLICIES}, got {missing_policy!r}")
+        self.features = list(features)
+        self.names = [f.name for f in self.features]
+        self.missing_policy = missing_policy
+
+        # key -> column, for every alias in its original, lower-case and snake_case spelling
+        self._columns = {}
+        for column, spec in enumerate(self.features):
+            for alias in (spec.name,) + spec.aliases:
+                for spelling in (alias, alias.lower(), alias.lower().replace(' ', '_')):
+                    self._columns.setdefault(spelling, column)
+
+        # column -> {lower-case word: value}
+        self._vocabularies = [
+            {word.lower(): float(value) for word, value in spec.vocabulary.items()}
+            for spec in self.features
+        ]
+        self._low = np.array([spec.low for spec in self.features], dtype=np.float64)
+        self._high = np.array([spec.high for spec in self.features], dtype=np.float64)
+        self._defaults = np.array([spec.default for spec in self.features], dtype=np.float32)
+
+    def column(self, key):
+        """Column index of a feature name or alias (in any accepted spelling), or None"""
+        if not isinstance(key, str):
+            return None
+        return self._columns.get(key, self._columns.get(key.strip().lower().replace(' ', '_')))
+
+    def describe(self):
+        return {
+            'features': [spec.describe() for spec in self.features],
+            'missing_policy': self.missing_policy,
+        }
+
+    # ---------------------------------------------------
+    # CONVERSION
+    # ---------------------------------------------------
+    def _convert(self, column, value):
+        """Value as float, None when missing; raises ValueError if it is not recognised"""
+        value_type = type(value)
+        if value_type is float or value_type is int or value_type is bool:
+            return float(value)
+        if value is None:
+            return None
+        if value_type is str:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+            word = value.strip().lower()
+            if not word:
+                return None
+            converted = self._vocabularies[column].get(word)
+            if converted is not None:
+                return converted
+        raise ValueError(f"cannot convert {value!r} to a number")
+
+    def _convert_payloads(self, payloads):
+        n_rows, n_features = len(payloads), len(self.features)
+        matrix = np.empty((n_rows, n_features), dtype=np.float32, order='F')
+        matrix[:] = self._defaults
+        present = np.zeros((n_rows, n_features), dtype=bool)
+        errors = {}
+
+        columns = self._columns
+        for row_index, payload in enumerate(payloads):
+            if not isinstance(payload, dict):
+                errors[row_index] = [{'field': None, 'code': 'not_an_object',
+                                      'message': 'Each patient must be a JSON object'}]
+                continue
+            for key, value in payload.items():
+                column = columns.get(key)
+                if column is None:
+                    continue
+                try:
+                    converted = self._convert(column, value)
+                except (ValueError, OverflowError) as e:
+                    errors.setdefault(row_index, []).append(
+                        {'field': self.names[column], 'code': 'invalid_value', 'message': f"{key}: {e}"})
+                    continue
+                if converted is not None:
+                    matrix[row_index, column] = converted
+                    present[row_index, column] = True
+
+        self._check(matrix, present, errors)
+        return matrix, present, errors
+
+    def _check(self, matrix, present, errors):
+        # Vectorised checks over every value that was actually supplied
+        # (NaN fails both comparisons, so it is reported as out of range)
+        with np.errstate(invalid='ignore'):
+            bad = present & ~((matrix >= self._low) & (matrix <= self._high))
+        missing = ~present if self.missing_policy == 'reject' else np.zeros_like(present)
+        for row_index, column in zip(*np.nonzero(bad | missing)):
+            row_index, column = int(row_index), int(column)
+            if row_index in errors and errors[row_index][0]['code'] == 'not_an_object':
+                continue
+            spec = self.features[column]
+            if missing[row_index, column]:
+                error = {'field': spec.name, 'code': 'missing', 'message': f"{spec.name} is required"}
+            else:
+                error = {'field': spec.name, 'code': 'out_of_range',
+                         'message': f"{spec.name}={float(matrix[row_index, column]):g} is outside "
+                                    f"[{spec.low:g}, {spec.high:g}]"}
+            errors.setdefault(row_index, []).append(error)
+
+    def to_matrix(self, payloads):
+        """Convert a list of payload dicts into an (n, n_features) float32 matrix.
+
+        The matrix is column-major so each feature column is contiguous.
+        Returns (matrix, valid_rows, errors) where `errors` maps a row index
+        to a list of {'field', 'code', 'message'} dicts; rows listed there
+        hold unspecified values and must not be scored.
+        """
+        matrix, _, errors = self._convert_payloads(payloads)
+        valid_rows = [i for i in range(len(payloads)) if i not in errors]
+        return matrix, valid_rows, errors
+
+    def columns_to_matrix(self, columns, n_rows):
+        """Column-wise twin of to_matrix for tabular input such as a CSV chunk.
+
+        `columns` maps a key to a 1-D array of `n_rows` values. Numeric
+        columns are converted without a Python-level loop, each value copied
+        once into the float32 matrix (integer columns are widened to float64
+        first); NaN cells (empty CSV fields) count as missing rather than
+        out of range.
+        """
+        n_features = len(self.features)
+        matrix = np.empty((n_rows, n_features), dtype=np.float32, order='F')
+        matrix[:] = self._defaults
+        present = np.zeros((n_rows, n_features), dtype=bool)
+        errors = {}
+
+        for key, values in columns.items():
+            column = self._columns.get(key.strip() if isinstance(key, str) else key)
+            if column is None:
+                continue
+            values = np.asarray(values)
+            if values.dtype.kind == 'f':
+                # Float columns (e.g. Arrow buffer views) are read in place; the only copy is into the matrix
+                converted = values
+            elif values.dtype.kind in 'biu':
+                converted = values.astype(np.float64)
+            else:
+                converted = np.full(n_rows, np.nan)
+                for row_index, value in enumerate(values.tolist()):
+                    try:
+                        value = self._convert(column, value)
+                    except (ValueError, OverflowError) as e:
+                        errors.setdefault(row_index, []).append(
+                            {'field': self.names[column], 'code': 'invalid_value', 'message': f"{key}: {e}"})
+                        continue
+                    if value is not None:
+                        converted[row_index] = value
+            supplied = ~np.isnan(converted)
+            if supplied.all():
+                # One contiguous copy into the column-major matrix
+                matrix[:, column] = converted
+            else:
+                matrix[supplied, column] = converted[supplied]
+            present[:, column] |= supplied
+
+        self._check(matrix, present, errors)
+        valid_rows = [i for i in range(n_rows) if i not in errors]
+        return matrix, valid_rows, errors
+
+    def to_row(self, payload):
+        """(row, errors, missing feature names) for a single payload"""
+        matrix, present, errors = self._convert_payloads([payload])
+        missing = [name for name, supplied in zip(self.names, present[0]) if not supplied]
+        return np.ascontiguousarray(matrix[0]), errors.get(0, []), missing
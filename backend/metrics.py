@@ -0,0 +1,179 @@
+import bisect
+import os
+import threading
+import time
+
+# Upper bounds (seconds) of the latency histogram buckets: 50 us .. 2.5 s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram in the Prometheus data model (cumulative `le` buckets)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate the q-quantile by interpolating inside its bucket, as histogram_quantile() does"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms rendered in the Prometheus text format.
+
+    Every metric is declared once with its type and help text, then updated
+    with keyword labels: `registry.inc('requests_total', endpoint='predict')`.
+    Updates take one lock and a dict lookup, so they are cheap enough for
+    the request hot path.
+    """
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self._families = {}
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        # A lock held by another thread at fork() time would never be released in the child
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------
+    # DECLARATION
+    # ---------------------------------------------------
+    def _declare(self, name, kind, help_text, buckets=None):
+        self._families[name] = {'type': kind, 'help': help_text, 'buckets': buckets, 'series': {}}
+
+    def counter(self, name, help_text):
+        self._declare(name, 'counter', help_text)
+
+    def gauge(self, name, help_text):
+        self._declare(name, 'gauge', help_text)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self._declare(name, 'histogram', help_text, buckets)
+
+    # ---------------------------------------------------
+    # UPDATES
+    # ---------------------------------------------------
+    def inc(self, name, amount=1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._families[name]['series']
+            series[key] = series.get(key, 0.0) + amount
+
+    def set(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._families[name]['series'][key] = float(value)
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families[name]
+            histogram = family['series'].get(key)
+            if histogram is None:
+                histogram = family['series'][key] = Histogram(family['buckets'])
+            histogram.observe(value)
+
+    def observe_many(self, name, values, **labels):
+        """Record several observations into one series under a single lock acquisition"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families[name]
+            histogram = family['series'].get(key)
+            if histogram is None:
+                histogram = family['series'][key] = Histogram(family['buckets'])
+            for value in values:
+                histogram.observe(value)
+
+    # ---------------------------------------------------
+    # EXPORT
+    # ---------------------------------------------------
+    def quantiles(self, name, qs=(0.5, 0.99)):
+        """{label values: {'p50': seconds, ...}} for every series of one histogram"""
+        with self._lock:
+            series = self._families[name]['series']
+            return {
+                ','.join(str(v) for _, v in key) or 'all': {
+                    'count': h.count,
+                    **{f"p{q * 100:g}": h.quantile(q) for q in qs}
+                }
+                for key, h in series.items()
+            }
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, family in self._families.items():
+                full_name = f"{self.namespace}_{name}"
+                lines.append(f"# HELP {full_name} {family['help']}")
+                lines.append(f"# TYPE {full_name} {family['type']}")
+                for key, value in family['series'].items():
+                    if family['type'] == 'histogram':
+                        lines.extend(self._render_histogram(full_name, key, value))
+                    else:
+                        lines.append(f"{full_name}{format_labels(key)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histogram(full_name, key, histogram):
+        cumulative = 0
+        bounds = [f"{b:g}" for b in histogram.buckets] + ['+Inf']
+        for bound, count in zip(bounds, histogram.counts):
+            cumulative += count
+            yield f"{full_name}_bucket{format_labels(key + (('le', bound),))} {cumulative}"
+        yield f"{full_name}_sum{format_labels(key)} {histogram.sum:.9g}"
+        yield f"{full_name}_count{format_labels(key)} {histogram.count}"
+
+
+def format_labels(key):
+    if not key:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in key)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(key, escaped)) + '}'
+
+
+class StageTimer:
+    """Records the time since the previous `mark` into one histogram, labelled by stage"""
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.registry.observe(self.name, now - self._last, stage=stage)
+        self._last = now
+
+
+class NullTimer:
+    """Stand-in for StageTimer when a caller does not collect stage timings"""
+
+    def mark(self, stage):
+        pass
+
+
+NULL_TIMER = NullTimer()
@@ -0,0 +1,300 @@
+import numpy as np
+
+# Keras Normalization divides by max(sqrt(variance), epsilon)
+KERAS_EPSILON = 1e-7
+
+
+def _relu(x):
+    return np.maximum(x, 0.0, out=x)
+
+
+def _sigmoid(x):
+    with np.errstate(over='ignore'):
+        return 1.0 / (1.0 + np.exp(-x))
+
+
+def _linear(x):
+    return x
+
+
+ACTIVATIONS = {
+    'relu': _relu,
+    'sigmoid': _sigmoid,
+    'linear': _linear,
+    'tanh': np.tanh,
+}
+
+# Derivative of each activation, as a function of its pre-activation input
+ACTIVATION_GRADIENTS = {
+    'relu': lambda z: (z > 0).astype(z.dtype),
+    'sigmoid': lambda z: _sigmoid(z) * (1.0 - _sigmoid(z)),
+    'linear': np.ones_like,
+    'tanh': lambda z: 1.0 - np.tanh(z) ** 2,
+}
+
+
+class NumpyMLP:
+    """Pure-NumPy forward pass for the HeartDiseaseHyperModel network.
+
+    Normalization is folded into the first Dense layer and every
+    BatchNormalization into the Dense layer that follows it, so inference
+    is a chain of `x @ W + b` and activations. StringLookup one-hot inputs
+    become row lookups into their slice of the first Dense kernel.
+
+    `input_affines` keeps, per Dense layer, the (scale, shift) that was
+    folded into it (Normalization or BatchNormalization), or None, so the
+    unfolded kernels can be recovered for quantization.
+    """
+
+    name = 'numpy'
+
+    def __init__(self, features, weights, biases, activations,
+                 numeric_columns, categorical=None, norm_mean=None, norm_var=None,
+                 input_affines=None, source_sha256=None):
+        self.features = list(features)
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.ascontiguousarray(b, dtype=np.float32) for b in biases]
+        self.activations = list(activations)
+        self.numeric_columns = np.asarray(numeric_columns, dtype=np.intp)
+        # [(column, vocabulary as float32, table of shape (len(vocabulary) + 1, units))]
+        self.categorical = categorical or []
+        self.norm_mean = None if norm_mean is None else np.asarray(norm_mean, dtype=np.float32)
+        self.norm_var = None if norm_var is None else np.asarray(norm_var, dtype=np.float32)
+        self.input_affines = input_affines or [None] * len(self.weights)
+        # SHA-256 of the .keras file this export was built from, if known
+        self.source_sha256 = source_sha256
+        self._all_numeric = len(self.numeric_columns) == len(self.features) and \
+            np.array_equal(self.numeric_columns, np.arange(len(self.features)))
+        self._activation_fns = [ACTIVATIONS[a] for a in self.activations]
+
+    # ---------------------------------------------------
+    # INFERENCE
+    # ---------------------------------------------------
+    def _dense(self, x, i):
+        x = x @ self.weights[i]
+        x += self.biases[i]
+        return x
+
+    def _first_layer(self, matrix):
+        x = self._dense(matrix if self._all_numeric else matrix[:, self.numeric_columns], 0)
+        for column, vocabulary, table in self.categorical:
+            x += table[self._lookup(matrix[:, column], vocabulary)]
+        return x
+
+    @staticmethod
+    def _lookup(values, vocabulary):
+        # Index 0 is the out-of-vocabulary row, like StringLookup(num_oov_indices=1)
+        order = np.argsort(vocabulary)
+        sorted_vocab = vocabulary[order]
+        pos = np.clip(np.searchsorted(sorted_vocab, values), 0, len(sorted_vocab) - 1)
+        found = sorted_vocab[pos] == values
+        return np.where(found, order[pos] + 1, 0)
+
+    def predict_logits(self, matrix):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        x = self._first_layer(matrix)
+        for i in range(1, len(self.weights)):
+            x = self._dense(self._activation_fns[i - 1](x), i)
+        return x[:, 0]
+
+    def predict(self, matrix):
+        """Return the positive-class probability for every row of an (n, n_features) matrix"""
+        logits = self.predict_logits(matrix)
+        return self._activation_fns[-1](logits.astype(np.float32, copy=False))
+
+    # ---------------------------------------------------
+    # GRADIENTS
+    # ---------------------------------------------------
+    def _dense_backward(self, grad, i):
+        """Gradient w.r.t. the input of Dense layer i, given the gradient w.r.t. its output"""
+        return grad @ self.weights[i].T
+
+    def predict_with_gradients(self, matrix):
+        """(probabilities, d probability / d input) for every row, in one forward and backward pass.
+
+        Categorical inputs are looked up rather than multiplied, so their
+        gradient columns are zero.
+        """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        pre_activations = [self._first_layer(matrix)]
+        for i in range(1, len(self.weights)):
+            # Activations may work in place; keep each pre-activation for the backward pass
+            pre_activations.append(self._dense(self._activation_fns[i - 1](pre_activations[-1].copy()), i))
+        probs = self._activation_fns[-1](pre_activations[-1][:, 0].copy())
+
+        grad = ACTIVATION_GRADIENTS[self.activations[-1]](pre_activations[-1])
+        for i in range(len(self.weights) - 1, 0, -1):
+            grad = self._dense_backward(grad, i) * ACTIVATION_GRADIENTS[self.activations[i - 1]](pre_activations[i - 1])
+        gradients = np.zeros_like(matrix)
+        gradients[:, self.numeric_columns] = self._dense_backward(grad, 0)
+        return probs, gradients
+
+    def weight_bytes(self):
+        """Resident bytes of the kernels and biases the forward pass uses"""
+        return sum(w.nbytes for w in self.weights) + sum(b.nbytes for b in self.biases)
+
+    # ---------------------------------------------------
+    # SERIALISATION
+    # ---------------------------------------------------
+    def to_arrays(self):
+        """Flatten the network into the {name: ndarray} layout of the .npz export"""
+        arrays = {
+            'features': np.array(self.features),
+            'activations': np.array(self.activations),
+            'numeric_columns': self.numeric_columns,
+            'n_layers': np.array(len(self.weights)),
+            'categorical_columns': np.array([c for c, _, _ in self.categorical], dtype=np.intp),
+        }
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f'W{i}'] = w
+            arrays[f'b{i}'] = b
+        for i, (_, vocabulary, table) in enumerate(self.categorical):
+            arrays[f'vocab{i}'] = vocabulary
+            arrays[f'table{i}'] = table
+        if self.norm_mean is not None:
+            arrays['norm_mean'] = self.norm_mean
+            arrays['norm_var'] = self.norm_var
+        for i, affine in enumerate(self.input_affines):
+            if affine is not None:
+                arrays[f'affine_scale{i}'], arrays[f'affine_shift{i}'] = affine
+        if self.source_sha256:
+            arrays['source_sha256'] = np.array(self.source_sha256)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, data):
+        """Rebuild a network from `to_arrays()` output (an NpzFile or any mapping)"""
+        n_layers = int(data['n_layers'])
+        categorical = [
+            (int(column), data[f'vocab{i}'], data[f'table{i}'])
+            for i, column in enumerate(data['categorical_columns'])
+        ]
+        return cls(
+            features=data['features'].tolist(),
+            weights=[data[f'W{i}'] for i in range(n_layers)],
+            biases=[data[f'b{i}'] for i in range(n_layers)],
+            activations=data['activations'].tolist(),
+            numeric_columns=data['numeric_columns'],
+            categorical=categorical,
+            norm_mean=data['norm_mean'] if 'norm_mean' in data else None,
+            norm_var=data['norm_var'] if 'norm_var' in data else None,
+            input_affines=[
+                (data[f'affine_scale{i}'], data[f'affine_shift{i}'])
+                if f'affine_scale{i}' in data else None
+                for i in range(n_layers)
+            ],
+            source_sha256=str(data['source_sha256']) if 'source_sha256' in data else None,
+        )
+
+    def save(self, path):
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls.from_arrays(data)
+
+    # ---------------------------------------------------
+    # EXPORT FROM KERAS
+    # ---------------------------------------------------
+    @classmethod
+    def from_keras(cls, model):
+        """Fold a trained HeartDiseaseHyperModel network into NumpyMLP weights.
+
+        Only layer attributes are read, so TensorFlow is needed by the caller
+        (to load the model) but not by this module.
+        """
+        layers = list(model.layers)
+        concat_index = next(
+            (i for i, layer in enumerate(layers) if type(layer).__name__ == 'Concatenate'), None
+        )
+        if concat_index is None:
+            raise ValueError("Expected a Concatenate layer joining the preprocessed inputs")
+
+        # 1. Input blocks, in the order they are concatenated
+        blocks = []
+        for tensor in layers[concat_index].input:
+            layer = tensor._keras_history.operation
+            feature = layer.input._keras_history.operation.name
+            kind = type(layer).__name__
+            if kind == 'Normalization':
+                mean = float(np.asarray(layer.mean).reshape(-1)[0])
+                var = float(np.asarray(layer.variance).reshape(-1)[0])
+                blocks.append(('numeric', feature, 1, (mean, var)))
+            elif kind == 'StringLookup':
+                vocabulary = layer.get_vocabulary()[layer.num_oov_indices:]
+                try:
+                    vocabulary = np.array([float(v) for v in vocabulary], dtype=np.float32)
+                except ValueError:
+                    raise ValueError(f"StringLookup vocabulary for '{feature}' is not numeric")
+                blocks.append(('categorical', feature, len(vocabulary) + 1, vocabulary))
+            else:
+                raise ValueError(f"Unsupported preprocessing layer for '{feature}': {kind}")
+
+        features = [feature for _, feature, _, _ in blocks]
+
+        # 2. Dense / BatchNormalization chain after the concatenation
+        weights, biases, activations, input_affines = [], [], [], []
+        pending_scale, pending_shift = None, None
+        for layer in layers[concat_index + 1:]:
+            kind = type(layer).__name__
+            if kind == 'Dropout':
+                continue
+            if kind == 'BatchNormalization':
+                moving_mean = np.asarray(layer.moving_mean, dtype=np.float64)
+                moving_var = np.asarray(layer.moving_variance, dtype=np.float64)
+                gamma = np.asarray(layer.gamma, dtype=np.float64) if layer.scale else 1.0
+                beta = np.asarray(layer.beta, dtype=np.float64) if layer.center else 0.0
+                scale = gamma / np.sqrt(moving_var + layer.epsilon)
+                shift = beta - moving_mean * scale
+                if pending_scale is not None:
+                    pending_shift = pending_shift * scale + shift
+                    pending_scale = pending_scale * scale
+                else:
+                    pending_scale, pending_shift = scale, shift
+                continue
+            if kind != 'Dense':
+                raise ValueError(f"Unsupported layer after Concatenate: {kind}")
+
+            kernel, bias = [np.asarray(w, dtype=np.float64) for w in layer.get_weights()]
+            input_affines.append(None)
+            if pending_scale is not None:
+                bias = bias + pending_shift @ kernel
+                kernel = pending_scale[:, None] * kernel
+                input_affines[-1] = (pending_scale.astype(np.float32), pending_shift.astype(np.float32))
+                pending_scale, pending_shift = None, None
+            weights.append(kernel)
+            biases.append(bias)
+            activations.append(layer.get_config()['activation'])
+
+        if pending_scale is not None:
+            raise ValueError("BatchNormalization after the output layer cannot be folded")
+
+        # 3. Fold Normalization into the first kernel and split out categorical rows
+        first_kernel = weights[0]
+        numeric_rows, numeric_columns, norm_mean, norm_var = [], [], [], []
+        categorical = []
+        first_bias = biases[0].copy()
+        offset = 0
+        for column, (kind, feature, width, params) in enumerate(blocks):
+            rows = first_kernel[offset:offset + width]
+            if kind == 'numeric':
+                mean, var = params
+                std = max(np.sqrt(var), KERAS_EPSILON)
+                numeric_rows.append(rows[0] / std)
+                first_bias -= (mean / std) * rows[0]
+                numeric_columns.append(column)
+                norm_mean.append(mean)
+                norm_var.append(var)
+            else:
+                categorical.append((column, params, rows.astype(np.float32)))
+            offset += width
+
+        weights[0] = np.array(numeric_rows).reshape(len(numeric_rows), first_kernel.shape[1])
+        biases[0] = first_bias
+        std = np.maximum(np.sqrt(norm_var), KERAS_EPSILON)
+        input_affines[0] = ((1.0 / std).astype(np.float32), (-np.array(norm_mean) / std).astype(np.float32))
+
+        return cls(features, weights, biases, activations, numeric_columns,
+                   categorical=categorical, norm_mean=norm_mean, norm_var=norm_var,
+                   input_affines=input_affines)
@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    """Bounded LRU + TTL cache of probabilities keyed on the float32 feature vector.
+
+    The cache empties itself whenever one of `watched_paths` changes on disk
+    (checked at most every `check_interval` seconds), so a new model file
+    never serves probabilities computed by the old one.
+    """
+
+    def __init__(self, max_size=10000, ttl_seconds=300.0, watched_paths=(), check_interval=1.0):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self.watched_paths = list(watched_paths)
+        self.check_interval = check_interval
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_lock)
+        self._signature = self._file_signature()
+        self._next_check = time.monotonic() + check_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _reset_lock(self):
+        # A lock held by another thread at fork() time would never be released in the child
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(row):
+        # Adding 0.0 turns -0.0 into 0.0 so both spell the same key
+        return (np.asarray(row, dtype=np.float32).reshape(-1) + np.float32(0.0)).tobytes()
+
+    def _file_signature(self):
+        signature = []
+        for path in self.watched_paths:
+            try:
+                st = os.stat(path)
+                signature.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append((path, None, None))
+        return signature
+
+    def _check_model_files(self, now):
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        signature = self._file_signature()
+        if signature != self._signature:
+            self._signature = signature
+            self._entries.clear()
+            self.invalidations += 1
+
+    def get(self, row):
+        """Return the cached probability for `row`, or None"""
+        if self.max_size <= 0:
+            return None
+        key = self.make_key(row)
+        now = time.monotonic()
+        with self._lock:
+            self._check_model_files(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, row, value):
+        if self.max_size <= 0:
+            return
+        key = self.make_key(row)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
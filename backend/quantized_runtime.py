@@ -0,0 +1,140 @@
+import numpy as np
+
+from numpy_runtime import NumpyMLP
+
+QUANTIZATION_MODES = ('int8', 'float16')
+
+
+def quantize_int8(kernel):
+    """Symmetric per-output-channel int8 quantization of a (in, out) kernel"""
+    max_abs = np.max(np.abs(kernel), axis=0)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    quantized = np.clip(np.rint(kernel / scales), -127, 127).astype(np.int8)
+    return quantized, scales
+
+
+class QuantizedMLP(NumpyMLP):
+    """NumpyMLP whose Dense kernels are held as per-channel int8 or float16.
+
+    Kernels are quantized in their unfolded form, with the Normalization /
+    BatchNormalization affine applied to the layer input instead: the
+    folded kernels carry 1/std factors and large cancelling biases that
+    amplify rounding error.
+
+    NumPy has no int8/float16 GEMM kernels, so the quantized kernels are
+    dequantized once at load time (scales and input affine folded back in)
+    and only those float32 kernels are kept: `weights` is the list the
+    forward pass multiplies, at the speed of the float32 runtime, and
+    to_arrays() re-quantizes it for saving. Quantization is a storage
+    optimisation: the saved file shrinks 4x (int8) or 2x (float16), while
+    `weight_bytes()` (resident memory) is slightly above the float32
+    engine's and the predictions carry the quantization error.
+    """
+
+    def __init__(self, mlp, mode, quantized=None):
+        """Quantize a float32 NumpyMLP, or, with `quantized` = (kernels, scales)
+        as written by save(), rebuild one whose `mlp` holds the unfolded biases"""
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        super().__init__(mlp.features, mlp.weights, mlp.biases, mlp.activations,
+                         mlp.numeric_columns, categorical=mlp.categorical,
+                         norm_mean=mlp.norm_mean, norm_var=mlp.norm_var,
+                         input_affines=mlp.input_affines, source_sha256=mlp.source_sha256)
+        self.mode = mode
+        self.name = f'numpy-{mode}'
+
+        if quantized is not None:
+            kernels = [np.ascontiguousarray(w) for w in quantized[0]]
+            self.scales = quantized[1]
+        else:
+            for i, affine in enumerate(self.input_affines):
+                if affine is None:
+                    continue
+                scale, shift = affine
+                safe_scale = np.where(scale != 0, scale, 1.0)
+                kernel = np.where((scale != 0)[:, None], self.weights[i] / safe_scale[:, None], 0.0)
+                self.biases[i] = (self.biases[i] - shift @ kernel).astype(np.float32)
+                self.weights[i] = kernel.astype(np.float32)
+
+            if mode == 'int8':
+                quantized = [quantize_int8(w) for w in self.weights]
+                kernels = [q for q, _ in quantized]
+                self.scales = [s for _, s in quantized]
+            else:
+                kernels = [w.astype(np.float16) for w in self.weights]
+                self.scales = None
+        self._dequantize(kernels)
+
+    def _dequantize(self, kernels):
+        """Float32 kernels and biases actually multiplied, with the input affines re-folded;
+        the quantized `kernels` are not kept"""
+        self._kernels, self._kernel_biases = [], []
+        for i, (w, b) in enumerate(zip(kernels, self.biases)):
+            kernel = w.astype(np.float64)
+            if self.scales is not None:
+                kernel *= self.scales[i]
+            bias = b.astype(np.float64)
+            affine = self.input_affines[i]
+            if affine is not None:
+                bias = bias + affine[1].astype(np.float64) @ kernel
+                kernel = affine[0].astype(np.float64)[:, None] * kernel
+            self._kernels.append(np.ascontiguousarray(kernel, dtype=np.float32))
+            self._kernel_biases.append(np.ascontiguousarray(bias, dtype=np.float32))
+        self.weights = self._kernels
+
+    def _quantized_kernels(self):
+        """The int8/float16 kernels _dequantize was given, recovered from the float32 ones"""
+        kernels = []
+        for i, kernel in enumerate(self._kernels):
+            kernel = kernel.astype(np.float64)
+            affine = self.input_affines[i]
+            if affine is not None:
+                scale = affine[0].astype(np.float64)
+                kernel = np.where((scale != 0)[:, None], kernel / np.where(scale != 0, scale, 1.0)[:, None], 0.0)
+            if self.scales is not None:
+                kernels.append(np.clip(np.rint(kernel / self.scales[i]), -127, 127).astype(np.int8))
+            else:
+                kernels.append(kernel.astype(np.float16))
+        return kernels
+
+    @classmethod
+    def load(cls, path, mode='int8'):
+        """Load a file written by save(), or quantize a float32 export on the fly"""
+        with np.load(path, allow_pickle=False) as data:
+            if 'quantization' not in data:
+                return cls(NumpyMLP.from_arrays(data), mode)
+            engine = cls.from_arrays(data)
+        if engine.mode != mode:
+            raise ValueError(f"{path} holds a {engine.mode} model, not {mode}")
+        return engine
+
+    def to_arrays(self):
+        """The .npz layout of NumpyMLP with the quantized kernels, their scales and the mode"""
+        arrays = super().to_arrays()
+        for i, kernel in enumerate(self._quantized_kernels()):
+            arrays[f'W{i}'] = kernel
+        arrays['quantization'] = np.array(self.mode)
+        for i, scales in enumerate(self.scales or []):
+            arrays[f'scales{i}'] = scales
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, data):
+        mode = str(data['quantization'])
+        n_layers = int(data['n_layers'])
+        kernels = [data[f'W{i}'] for i in range(n_layers)]
+        scales = [data[f'scales{i}'] for i in range(n_layers)] if mode == 'int8' else None
+        return cls(NumpyMLP.from_arrays(data), mode, quantized=(kernels, scales))
+
+    def _dense(self, x, i):
+        x = x @ self._kernels[i]
+        x += self._kernel_biases[i]
+        return x
+
+    def _dense_backward(self, grad, i):
+        return grad @ self._kernels[i].T
+
+    def weight_bytes(self):
+        # Resident: the float32 kernels and folded biases, plus the unfolded biases and scales kept for saving
+        scale_bytes = sum(s.nbytes for s in self.scales) if self.scales is not None else 0
+        return super().weight_bytes() + sum(b.nbytes for b in self._kernel_biases) + scale_bytes
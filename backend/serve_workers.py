@@ -0,0 +1,133 @@
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+from numpy_runtime import NumpyMLP
+from shared_weights import write_shared_weights
+
+# ---------------------------------------------------
+# 1. SETUP
+# ---------------------------------------------------
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("WorkerLauncher")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+NUMPY_MODEL_PATH = os.path.join(BASE_DIR, "..", "artifacts_nn", "best_nn_model.npz")
+SHARED_WEIGHTS_PATH = os.path.join(BASE_DIR, "..", "artifacts_nn", "best_nn_model.weights")
+
+
+def read_memory_kb(pid):
+    """(Rss, Pss) in kB from /proc; Pss splits shared pages between the processes mapping them"""
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ('Rss', 'Pss'):
+                    usage[key] = int(rest.split()[0])
+    except OSError:
+        return None
+    return usage.get('Rss'), usage.get('Pss')
+
+
+# ---------------------------------------------------
+# 2. WORKERS
+# ---------------------------------------------------
+def run_worker(backend, listen_socket, host, port):
+    from werkzeug.serving import make_server
+
+    # The parent turns Ctrl+C into SIGTERM for every worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    backend.start_background_services()
+    server = make_server(host, port, backend.app, threaded=True, fd=listen_socket.fileno())
+    server.serve_forever()
+
+
+def spawn_worker(backend, listen_socket, host, port):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(backend, listen_socket, host, port)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def serve(host, port, workers, report_memory):
+    # 1. Flatten the exported weights into one content-hashed file every worker maps read-only
+    write_shared_weights(NumpyMLP.load(NUMPY_MODEL_PATH), SHARED_WEIGHTS_PATH)
+    os.environ['INFERENCE_ENGINE'] = 'mmap'
+    os.environ['SHARED_WEIGHTS_PATH'] = SHARED_WEIGHTS_PATH
+    # The supervisor only forks; each worker starts its own probes, drift monitor and watcher
+    os.environ['BACKGROUND_SERVICES'] = '0'
+
+    # 2. Import and warm the app once in the parent; children inherit it through fork()
+    import app as backend
+    backend.model_ready.wait()
+
+    listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listen_socket.bind((host, port))
+    listen_socket.listen(1024)
+    listen_socket.set_inheritable(True)
+
+    children = set()
+    shutting_down = False
+
+    def shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for child in list(children):
+            try:
+                os.kill(child, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for _ in range(workers):
+        children.add(spawn_worker(backend, listen_socket, host, port))
+    logger.info(f"Serving on http://{host}:{port} with {workers} workers sharing {SHARED_WEIGHTS_PATH}")
+
+    if report_memory:
+        time.sleep(1.0)
+        for child in sorted(children):
+            usage = read_memory_kb(child)
+            if usage:
+                logger.info(f"Worker {child}: RSS={usage[0] / 1024:.1f} MB, PSS={usage[1] / 1024:.1f} MB")
+
+    # 3. Supervise: replace workers that die until asked to stop
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not shutting_down:
+            logger.warning(f"Worker {pid} exited with status {status}; starting a replacement")
+            children.add(spawn_worker(backend, listen_socket, host, port))
+
+    listen_socket.close()
+    logger.info("All workers stopped.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pre-fork multi-worker launcher for the prediction API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--report-memory', action='store_true',
+                        help="Log RSS/PSS of every worker once they have started (Linux only)")
+    args = parser.parse_args()
+
+    if not hasattr(os, 'fork'):
+        sys.exit("serve_workers.py needs os.fork(); run app.py directly on this platform.")
+    serve(args.host, args.port, args.workers, args.report_memory)
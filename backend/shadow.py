@@ -0,0 +1,147 @@
+import os
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+
+from inference_pool import lower_thread_priority
+
+# Upper bounds of the |candidate - production| probability histogram buckets
+DELTA_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _empty_totals():
+    return {'rows': 0, 'disagreements': 0, 'delta_sum': 0.0, 'delta_max': 0.0, 'errors': 0}
+
+
+class ShadowScorer:
+    """Scores production batches with candidate models off the response path.
+
+    `submit(matrix, probs)` hands over the feature matrix production already
+    built and the probabilities it returned; it never blocks; a batch that
+    arrives while `max_queue_size` others are waiting is dropped and counted.
+    A single low-priority background thread runs every candidate on the same
+    matrix and records, per candidate, rows scored, class disagreements and
+    the |candidate - production| probability delta into `metrics`.
+    """
+
+    def __init__(self, candidates, metrics, sample_rate=1.0, max_queue_size=64, niceness=10):
+        self.candidates = dict(candidates)
+        self.metrics = metrics
+        self.sample_rate = sample_rate
+        self.max_queue_size = max_queue_size
+        self.niceness = niceness
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._worker = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+        self._submitted = 0
+        self._dropped = 0
+        self._totals = {}
+
+        metrics.counter('shadow_rows_total', 'Rows scored by each shadow candidate.')
+        metrics.counter('shadow_disagreements_total', 'Rows where a shadow candidate predicted the other class.')
+        metrics.counter('shadow_errors_total', 'Shadow batches a candidate failed to score.')
+        metrics.counter('shadow_dropped_batches_total', 'Batches not shadowed because the shadow queue was full.')
+        metrics.histogram('shadow_probability_delta', '|candidate - production| probability per row.',
+                          buckets=DELTA_BUCKETS)
+        metrics.histogram('shadow_batch_seconds', 'Time a shadow candidate spent scoring one batch.')
+
+    # ---------------------------------------------------
+    # PUBLIC API
+    # ---------------------------------------------------
+    def submit(self, matrix, probs):
+        """Queue one scored batch for the candidates; returns False if it was not queued"""
+        if not self.candidates or self.sample_rate <= 0 or \
+                (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((matrix, probs))
+        except queue.Full:
+            self.metrics.inc('shadow_dropped_batches_total')
+            with self._lock:
+                self._dropped += 1
+            return False
+        with self._lock:
+            self._submitted += 1
+        return True
+
+    def stats(self):
+        with self._lock:
+            candidates = {}
+            for name, engine in self.candidates.items():
+                totals = self._totals.get(name) or _empty_totals()
+                rows = totals['rows']
+                candidates[name] = {
+                    'engine': engine.name,
+                    'version': getattr(engine, 'version', None),
+                    'rows': rows,
+                    'agreement_rate': 1.0 - totals['disagreements'] / rows if rows else None,
+                    'mean_abs_delta': totals['delta_sum'] / rows if rows else None,
+                    'max_abs_delta': totals['delta_max'],
+                    'errors': totals['errors'],
+                }
+            return {
+                'sample_rate': self.sample_rate,
+                'max_queue_size': self.max_queue_size,
+                'queue_depth': self._queue.qsize(),
+                'submitted': self._submitted,
+                'dropped': self._dropped,
+                'candidates': candidates,
+            }
+
+    # ---------------------------------------------------
+    # WORKER
+    # ---------------------------------------------------
+    def _reset_after_fork(self):
+        # The worker thread does not survive fork(); each worker shadows its own traffic
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._submitted = 0
+        self._dropped = 0
+        self._totals = {}
+
+    def _ensure_started(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="ShadowScorer", daemon=True)
+                self._worker.start()
+
+    def _compare(self, name, engine, matrix, probs):
+        start = time.perf_counter()
+        try:
+            candidate = np.clip(np.asarray(engine.predict(matrix), dtype=np.float32).reshape(-1), 0.0, 1.0)
+        except Exception:
+            self.metrics.inc('shadow_errors_total', candidate=name)
+            with self._lock:
+                self._totals.setdefault(name, _empty_totals())['errors'] += 1
+            return
+        self.metrics.observe('shadow_batch_seconds', time.perf_counter() - start, candidate=name)
+
+        deltas = np.abs(candidate - probs)
+        disagreements = int(np.count_nonzero((candidate > 0.5) != (probs > 0.5)))
+        self.metrics.inc('shadow_rows_total', len(deltas), candidate=name)
+        self.metrics.inc('shadow_disagreements_total', disagreements, candidate=name)
+        self.metrics.observe_many('shadow_probability_delta', deltas.tolist(), candidate=name)
+        with self._lock:
+            totals = self._totals.setdefault(name, _empty_totals())
+            totals['rows'] += len(deltas)
+            totals['disagreements'] += disagreements
+            totals['delta_sum'] += float(deltas.sum())
+            totals['delta_max'] = max(totals['delta_max'], float(deltas.max(initial=0.0)))
+
+    def _run(self):
+        lower_thread_priority(self.niceness)
+        while True:
+            matrix, probs = self._queue.get()
+            probs = np.asarray(probs, dtype=np.float32).reshape(-1)
+            for name, engine in self.candidates.items():
+                self._compare(name, engine, matrix, probs)
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+
+from numpy_runtime import NumpyMLP
+
+# Each array starts on a cache-line boundary inside the blob
+ALIGNMENT = 64
+
+# Weight pairs kept on disk: the current one and the one before it, for readers mid-swap
+KEEP_VERSIONS = 2
+
+
+def _replace(target, payload, mode):
+    tmp_path = f"{target}.tmp.{os.getpid()}"
+    with open(tmp_path, mode) as f:
+        f.write(payload)
+    os.replace(tmp_path, target)
+
+
+def write_shared_weights(mlp, path):
+    """Write `mlp` as one flat binary blob plus a JSON layout sidecar; returns the blob's path.
+
+    Numeric arrays go into the blob; string arrays and the offsets/shapes of
+    everything else go into its '.json' sidecar. The pair is named after a
+    hash of its content (`path.<hash>`, `path.<hash>.json`) and `path`
+    itself is a pointer holding the blob's file name, replaced last, so a
+    reader always resolves a complete, matching pair, processes that already
+    mapped the old blob keep reading it, and workers writing the same model
+    at once write identical files. Older pairs beyond KEEP_VERSIONS are removed.
+    """
+    layout = {'arrays': {}, 'strings': {}}
+    blob = bytearray()
+    for name, array in mlp.to_arrays().items():
+        array = np.asarray(array)
+        if array.dtype.kind in 'US':
+            layout['strings'][name] = array.tolist()
+            continue
+        offset = (len(blob) + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        blob.extend(b'\0' * (offset - len(blob)))
+        blob.extend(np.ascontiguousarray(array).tobytes())
+        layout['arrays'][name] = {'offset': offset, 'shape': list(array.shape), 'dtype': array.dtype.str}
+
+    layout = json.dumps(layout)
+    digest = hashlib.sha256(bytes(blob) + layout.encode()).hexdigest()[:16]
+    blob_path = f"{path}.{digest}"
+    if not (os.path.exists(blob_path) and os.path.exists(blob_path + '.json')):
+        # Sidecar first: a blob on disk always has its layout next to it
+        _replace(blob_path + '.json', layout, 'w')
+        _replace(blob_path, bytes(blob), 'wb')
+    _replace(path, os.path.basename(blob_path), 'w')
+    _prune(path, keep=blob_path)
+    return blob_path
+
+
+def _prune(path, keep):
+    """Remove all but the newest KEEP_VERSIONS weight pairs next to `path` (always keeping `keep`)"""
+    directory, prefix = os.path.split(os.path.abspath(path))
+    pattern = re.compile(re.escape(prefix) + r'\.[0-9a-f]{16}$')
+    blobs = [os.path.join(directory, name) for name in os.listdir(directory) if pattern.match(name)]
+    blobs.sort(key=lambda p: os.stat(p).st_mtime_ns if os.path.exists(p) else 0, reverse=True)
+    stale = [p for p in blobs[KEEP_VERSIONS:] if p != os.path.abspath(keep)]
+    for blob_path in stale:
+        # Processes that mapped a removed blob keep their pages until they unmap it
+        for target in (blob_path, blob_path + '.json'):
+            try:
+                os.remove(target)
+            except OSError:
+                pass
+
+
+def resolve_shared_weights(path):
+    """Path of the blob the pointer file `path` currently names"""
+    with open(path) as f:
+        name = f.read().strip()
+    return os.path.join(os.path.dirname(os.path.abspath(path)), name)
+
+
+def load_shared_weights(path):
+    """Load a NumpyMLP whose arrays are read-only views of one np.memmap.
+
+    `path` is the pointer written by write_shared_weights; it is read once,
+    so the blob and layout always come from the same version. Every process
+    that maps the same file shares one physical copy of the weights through
+    the page cache, and the mapping survives fork().
+    """
+    path = resolve_shared_weights(path)
+    with open(path + '.json') as f:
+        layout = json.load(f)
+    blob = np.memmap(path, dtype=np.uint8, mode='r')
+
+    arrays = {name: np.array(values) for name, values in layout['strings'].items()}
+    for name, spec in layout['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        view = blob[spec['offset']:spec['offset'] + count * dtype.itemsize]
+        arrays[name] = np.ndarray(spec['shape'], dtype=dtype, buffer=view)
+
+    mlp = NumpyMLP.from_arrays(arrays)
+    mlp.name = 'numpy-mmap'
+    return mlp
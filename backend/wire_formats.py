@@ -0,0 +1,119 @@
+import numpy as np
+
+# Media types per wire format; the first one is used in responses
+MEDIA_TYPES = {
+    'json': ('application/json',),
+    'msgpack': ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'application/vnd.apache.arrow.file'),
+}
+FORMAT_BY_MEDIA_TYPE = {media_type: fmt for fmt, types in MEDIA_TYPES.items() for media_type in types}
+
+# Arrow IPC files start with this magic; IPC streams do not
+ARROW_FILE_MAGIC = b'ARROW1'
+
+
+def request_format(content_type):
+    """Wire format of a request body; anything unrecognised is treated as JSON"""
+    media_type = (content_type or '').split(';', 1)[0].strip().lower()
+    return FORMAT_BY_MEDIA_TYPE.get(media_type, 'json')
+
+
+def response_format(accept, default):
+    """Best wire format allowed by an Accept header, preferring `default` for wildcards"""
+    if not accept:
+        return default
+    choices = []
+    for position, item in enumerate(accept.split(',')):
+        media_type, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            choices.append((-quality, position, media_type.lower()))
+    for _, _, media_type in sorted(choices):
+        if media_type in FORMAT_BY_MEDIA_TYPE:
+            return FORMAT_BY_MEDIA_TYPE[media_type]
+        if media_type in ('*/*', 'application/*'):
+            return default
+    return default
+
+
+def media_type(fmt):
+    return MEDIA_TYPES[fmt][0]
+
+
+# ---------------------------------------------------
+# MESSAGEPACK
+# ---------------------------------------------------
+# msgpack and pyarrow are optional: only clients that ask for them need them installed
+def decode_msgpack(raw):
+    import msgpack
+    return msgpack.unpackb(raw)
+
+
+def encode_msgpack(body):
+    import msgpack
+    return msgpack.packb(body, use_single_float=False)
+
+
+# ---------------------------------------------------
+# ARROW IPC
+# ---------------------------------------------------
+def decode_arrow(raw):
+    """({column name: 1-D NumPy array}, n_rows) from an Arrow IPC stream or file.
+
+    Numeric columns without nulls in a single chunk come back as read-only
+    views of the Arrow buffers rather than lists of Python objects;
+    nullable columns are copied to float64 with NaN marking the nulls. This
+    is not zero-copy end to end: building the model's float32 input matrix
+    copies every value once more (see InputSchema.columns_to_matrix).
+    """
+    import pyarrow as pa
+
+    reader = pa.ipc.open_file(raw) if raw[:len(ARROW_FILE_MAGIC)] == ARROW_FILE_MAGIC else pa.ipc.open_stream(raw)
+    table = reader.read_all()
+    columns = {}
+    for name, column in zip(table.column_names, table.columns):
+        if column.num_chunks == 1:
+            column = column.chunk(0)
+        elif column.num_chunks == 0:
+            column = pa.array([], type=column.type)
+        else:
+            column = column.combine_chunks()
+        if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+            if column.null_count:
+                column = column.cast(pa.float64()).fill_null(float('nan'))
+            columns[name] = column.to_numpy(zero_copy_only=False)
+        else:
+            columns[name] = np.asarray(column.to_pylist(), dtype=object)
+    return columns, table.num_rows
+
+
+def encode_arrow(n_rows, valid_rows, probs, row_errors, metadata):
+    """Arrow IPC stream of one record batch: index, prediction, probability and error per row"""
+    import pyarrow as pa
+
+    scored = np.zeros(n_rows, dtype=bool)
+    scored[valid_rows] = True
+    probability = np.zeros(n_rows, dtype=np.float64)
+    probability[valid_rows] = probs
+    errors = [None] * n_rows
+    for row_index, row_error in row_errors.items():
+        errors[row_index] = row_error[0]['message']
+
+    batch = pa.RecordBatch.from_arrays([
+        pa.array(np.arange(n_rows, dtype=np.int64)),
+        pa.array((probability > 0.5).astype(np.int8), mask=~scored),
+        pa.array(np.round(probability * 100, 2), mask=~scored),
+        pa.array(errors, type=pa.string()),
+    ], names=['index', 'prediction', 'probability', 'error'])
+    batch = batch.replace_schema_metadata({key: str(value) for key, value in metadata.items()})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,68 @@
+import numpy as np
+from pathlib import Path
+import argparse
+import logging
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from engines import load_engine  # noqa: E402
+from numpy_runtime import NumpyMLP  # noqa: E402
+
+# ---------------------------------------------------
+# 1. SETUP
+# ---------------------------------------------------
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger("Benchmark")
+
+MODEL_PATH = Path("../artifacts_nn/best_nn_model.keras")
+NUMPY_MODEL_PATH = Path("../artifacts_nn/best_nn_model.npz")
+
+ENGINES = ['keras', 'traced', 'numpy', 'int8', 'float16']
+BATCH_SIZES = [1, 8, 32, 256]
+
+
+def time_engine(engine, matrix, batch_size, iterations):
+    """Per-call latencies (ms) for scoring `batch_size` rows"""
+    batch = np.ascontiguousarray(matrix[:batch_size])
+    engine.predict(batch)
+    latencies = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        engine.predict(batch)
+        latencies[i] = (time.perf_counter() - start) * 1000.0
+    return latencies
+
+
+def run_benchmark(engines, batch_sizes, iterations):
+    features = NumpyMLP.load(NUMPY_MODEL_PATH).features
+    rng = np.random.default_rng(42)
+    matrix = rng.normal(100.0, 50.0, size=(max(batch_sizes), len(features))).astype(np.float32)
+
+    header = f"{'engine':<14}{'batch':>7}{'p50 ms':>10}{'p99 ms':>10}{'rows/s':>14}"
+    rows = []
+    for kind in engines:
+        try:
+            engine = load_engine(kind, features, str(MODEL_PATH), str(NUMPY_MODEL_PATH), buckets=batch_sizes)
+        except Exception as e:
+            logger.warning(f"Skipping {kind}: {e}")
+            continue
+        for batch_size in batch_sizes:
+            n = iterations if kind != 'keras' else max(iterations // 20, 5)
+            latencies = time_engine(engine, matrix, batch_size, n)
+            p50, p99 = np.percentile(latencies, [50, 99])
+            rows.append(f"{engine.name:<14}{batch_size:>7}{p50:>10.3f}{p99:>10.3f}"
+                        f"{batch_size / (p50 / 1000.0):>14,.0f}")
+
+    print("\n" + header)
+    print("-" * len(header))
+    print("\n".join(rows))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-call latency of the inference engines")
+    parser.add_argument('--engines', nargs='+', default=ENGINES, choices=ENGINES)
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=BATCH_SIZES)
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+    run_benchmark(args.engines, args.batch_sizes, args.iterations)
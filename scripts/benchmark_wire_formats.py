@@ -0,0 +1,129 @@
+import numpy as np
+from pathlib import Path
+import argparse
+import json
+import logging
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+import app as backend  # noqa: E402
+import wire_formats  # noqa: E402
+
+# ---------------------------------------------------
+# 1. SETUP
+# ---------------------------------------------------
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger("Benchmark")
+
+FORMATS = ['json', 'msgpack', 'arrow']
+ROWS = 10000
+
+
+def synthetic_batch(n_rows):
+    """Feature columns in each feature's valid range, like real /predict/batch traffic"""
+    rng = np.random.default_rng(42)
+    columns = {}
+    for spec in backend.input_schema.features:
+        low = spec.low if np.isfinite(spec.low) else 0.0
+        high = spec.high if np.isfinite(spec.high) else 300.0
+        columns[spec.name] = rng.uniform(low, high, n_rows).round(1)
+    return columns
+
+
+# ---------------------------------------------------
+# 2. CLIENT SIDE
+# ---------------------------------------------------
+def encode_request(fmt, columns, n_rows):
+    if fmt == 'arrow':
+        import pyarrow as pa
+
+        batch = pa.RecordBatch.from_arrays([pa.array(c) for c in columns.values()], names=list(columns))
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+    rows = [dict(zip(columns, values)) for values in zip(*(c.tolist() for c in columns.values()))]
+    if fmt == 'msgpack':
+        return wire_formats.encode_msgpack(rows)
+    return json.dumps(rows).encode()
+
+
+def decode_response(fmt, content):
+    if fmt == 'arrow':
+        import pyarrow as pa
+
+        table = pa.ipc.open_stream(content).read_all()
+        return table.column('probability').to_numpy(zero_copy_only=False)
+    body = wire_formats.decode_msgpack(content) if fmt == 'msgpack' else json.loads(content)
+    return [result['probability'] for result in body['results']]
+
+
+# ---------------------------------------------------
+# 3. SERVER SIDE (the same calls app.score_patients_wire makes, minus the forward pass)
+# ---------------------------------------------------
+def decode_request(fmt, raw):
+    if fmt == 'arrow':
+        columns, n_rows = wire_formats.decode_arrow(raw)
+        return backend.input_schema.columns_to_matrix(columns, n_rows)
+    payloads = wire_formats.decode_msgpack(raw) if fmt == 'msgpack' else json.loads(raw)
+    return backend.input_schema.to_matrix(payloads)
+
+
+def encode_response(fmt, n_rows, probs):
+    valid_rows = list(range(n_rows))
+    if fmt == 'arrow':
+        return wire_formats.encode_arrow(n_rows, valid_rows, probs, {}, {'count': n_rows})
+    body = backend.batch_body(n_rows, valid_rows, probs, {}, 'benchmark')
+    return wire_formats.encode_msgpack(body) if fmt == 'msgpack' else json.dumps(body).encode()
+
+
+def time_ms(fn, iterations):
+    fn()
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings[i] = (time.perf_counter() - start) * 1000.0
+    return float(np.median(timings))
+
+
+def run_benchmark(formats, n_rows, iterations):
+    columns = synthetic_batch(n_rows)
+    probs = np.random.default_rng(7).random(n_rows).astype(np.float32)
+    scale = 10000 / n_rows
+
+    header = (f"{'format':<10}{'request KB':>12}{'response KB':>13}{'client enc':>12}{'server dec':>12}"
+              f"{'server enc':>12}{'client dec':>12}{'server total':>14}")
+    rows = []
+    for fmt in formats:
+        try:
+            request = encode_request(fmt, columns, n_rows)
+            response = encode_response(fmt, n_rows, probs)
+        except ImportError as e:
+            logger.warning(f"Skipping {fmt}: {e.name} is not installed")
+            continue
+        matrix, valid_rows, errors = decode_request(fmt, request)
+        if errors or len(valid_rows) != n_rows:
+            logger.warning(f"{fmt}: {len(errors)} rows rejected while decoding")
+
+        client_enc = time_ms(lambda: encode_request(fmt, columns, n_rows), iterations) * scale
+        server_dec = time_ms(lambda: decode_request(fmt, request), iterations) * scale
+        server_enc = time_ms(lambda: encode_response(fmt, n_rows, probs), iterations) * scale
+        client_dec = time_ms(lambda: decode_response(fmt, response), iterations) * scale
+        rows.append(f"{fmt:<10}{len(request) / 1024:>12.1f}{len(response) / 1024:>13.1f}{client_enc:>12.2f}"
+                    f"{server_dec:>12.2f}{server_enc:>12.2f}{client_dec:>12.2f}{server_dec + server_enc:>14.2f}")
+
+    print(f"\nms per 10k rows (median of {iterations} runs over {n_rows} rows; sizes for {n_rows} rows)")
+    print(header)
+    print("-" * len(header))
+    print("\n".join(rows))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare /predict/batch encode/decode cost per wire format")
+    parser.add_argument('--formats', nargs='+', default=FORMATS, choices=FORMATS)
+    parser.add_argument('--rows', type=int, default=ROWS)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+    run_benchmark(args.formats, args.rows, args.iterations)
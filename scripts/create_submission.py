@@ -1,8 +1,14 @@
 import pandas as pd
-import tensorflow as tf
+import numpy as np
+import argparse
 import logging
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from numpy_runtime import NumpyMLP  # noqa: E402
+from quantized_runtime import QuantizedMLP, QUANTIZATION_MODES  # noqa: E402
+
 # ---------------------------------------------------
 # 1. SETUP
 # ---------------------------------------------------
@@ -10,21 +16,30 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger("Inference")
 
 MODEL_PATH = Path("../artifacts_nn/best_nn_model.keras")
+NUMPY_MODEL_PATH = Path("../artifacts_nn/best_nn_model.npz")
 TEST_DATA_PATH = "../dataset/test.csv"
 SUBMISSION_FILE = "../dataset/submission.csv"
 
 
-def make_predictions():
+def make_predictions(engine='keras'):
     # ---------------------------------------------------
     # 2. LOAD MODEL
     # ---------------------------------------------------
-    if not MODEL_PATH.exists():
-        logger.error(f"Model not found at {MODEL_PATH}. Run train_model.py first!")
+    model_path = MODEL_PATH if engine == 'keras' else NUMPY_MODEL_PATH
+    if not model_path.exists():
+        hint = "train_model.py" if engine == 'keras' else "export_numpy_model.py"
+        logger.error(f"Model not found at {model_path}. Run {hint} first!")
         return
 
-    logger.info(f"Loading model from {MODEL_PATH}...")
+    logger.info(f"Loading {engine} model from {model_path}...")
     try:
-        model = tf.keras.models.load_model(MODEL_PATH)
+        if engine == 'keras':
+            import tensorflow as tf
+            model = tf.keras.models.load_model(model_path)
+        else:
+            model = NumpyMLP.load(model_path)
+            if engine in QUANTIZATION_MODES:
+                model = QuantizedMLP(model, engine)
     except Exception as e:
         logger.error(f"Failed to load model: {e}")
         return
@@ -51,20 +66,22 @@ def make_predictions():
 
     patient_ids = df.pop('id')  # Save IDs and remove from input
 
-    # C. Convert to TensorFlow Friendly Format (Dictionary)
-    # The model expects {'age': [...], 'sex': [...]}, not a DataFrame
-    input_dict = {
-        name: tf.convert_to_tensor(value)
-        for name, value in df.items()
-    }
-
     # ---------------------------------------------------
     # 4. PREDICT
     # ---------------------------------------------------
     logger.info("Running predictions...")
 
-    # Predict returns probabilities (e.g., 0.85, 0.12)
-    probs = model.predict(input_dict)
+    if engine == 'keras':
+        # The Keras model expects {'age': [...], 'sex': [...]}, not a DataFrame
+        input_dict = {
+            name: tf.convert_to_tensor(value)
+            for name, value in df.items()
+        }
+        # Predict returns probabilities (e.g., 0.85, 0.12)
+        probs = model.predict(input_dict)
+    else:
+        # The NumPy engines take one float32 matrix in the model's feature order
+        probs = model.predict(df[model.features].to_numpy(dtype=np.float32))
 
     # Convert probabilities to Class (0 or 1)
     # Threshold is 0.5 (Standard)
@@ -91,5 +108,8 @@ def make_predictions():
 
 
 if __name__ == "__main__":
-    make_predictions()
+    parser = argparse.ArgumentParser(description="Create the competition submission file")
+    parser.add_argument('--engine', default='keras', choices=['keras', 'numpy', *QUANTIZATION_MODES],
+                        help="Inference engine (numpy/int8/float16 need export_numpy_model.py)")
+    make_predictions(parser.parse_args().engine)
 
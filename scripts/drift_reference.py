@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import argparse
+import logging
+import sys
+import time
+
+# The sketch code is shared with the backend's drift monitor
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from drift import DRIFT_BINS, HistogramSketch, bin_edges  # noqa: E402
+
+# ---------------------------------------------------
+# 1. SETUP
+# ---------------------------------------------------
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger("DriftReference")
+
+DATA_PATH = "../dataset/train.csv"
+OUTPUT_PATH = Path("../artifacts_nn/drift_reference.npz")
+TARGET = "heart_disease"
+
+
+# ---------------------------------------------------
+# 2. BUILD THE REFERENCE SKETCHES
+# ---------------------------------------------------
+def build_reference(data_path, output_path, bins):
+    try:
+        df = pd.read_csv(data_path)
+    except FileNotFoundError:
+        logger.error(f"{data_path} not found!")
+        return False
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+    features = [c for c in df.columns if c not in ('id', TARGET)]
+    matrix = df[features].to_numpy(dtype=np.float64)
+    logger.info(f"Loaded {len(df)} rows x {len(features)} features from {data_path}")
+
+    sketch = HistogramSketch([bin_edges(matrix[:, i], bins) for i in range(len(features))])
+    sketch.add(sketch.bin_counts(matrix), len(matrix))
+
+    arrays = {
+        'features': np.array(features),
+        'rows': np.array(sketch.rows),
+        'created_at': np.array(time.time()),
+    }
+    for i, feature in enumerate(features):
+        arrays[f'edges_{feature}'] = sketch.edges[i]
+        arrays[f'counts_{feature}'] = sketch.feature_counts(i)
+        logger.info(f"{feature:<24} {len(sketch.edges[i]) + 1:>3} bins")
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix('.tmp.npz')
+    np.savez_compressed(tmp_path, **arrays)
+    tmp_path.replace(output_path)
+    logger.info(f"✅ Saved {output_path} ({output_path.stat().st_size / 1024:.1f} KB)")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Histogram the training data for the backend's drift monitor")
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--output', type=Path, default=OUTPUT_PATH)
+    parser.add_argument('--bins', type=int, default=DRIFT_BINS)
+    args = parser.parse_args()
+    sys.exit(0 if build_reference(args.data, args.output, args.bins) else 1)
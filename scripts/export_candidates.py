@@ -0,0 +1,119 @@
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+import keras_tuner as kt
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from export_numpy_model import check_equivalence, load_validation_features, synthetic_features
+from train_model import DATA_PATH, RAW_TARGET, HeartDiseaseHyperModel
+
+# The runtime lives with the backend so the API can import it without TensorFlow
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from numpy_runtime import NumpyMLP  # noqa: E402
+from engines import file_sha256  # noqa: E402
+
+# ---------------------------------------------------
+# 1. SETUP
+# ---------------------------------------------------
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger("Candidates")
+
+TUNER_DIR = Path("../my_nn_dir")
+DEFAULT_PROJECTS = ["heart_disease_kt_v2", "heart_disease_kt_robust"]
+CANDIDATE_DIR = Path("../artifacts_nn/candidates")
+
+TARGET_MAPPING = {'presence': 1, 'absence': 0, 'yes': 1, 'no': 0, '1': 1, '0': 0,
+                  'true': 1, 'false': 0, '1.0': 1, '0.0': 0}
+
+
+# ---------------------------------------------------
+# 2. REBUILD THE HYPERMODEL
+# ---------------------------------------------------
+def build_hypermodel():
+    """HeartDiseaseHyperModel with the training-split statistics train_model.py used.
+
+    Normalization statistics and vocabularies are baked into the built
+    graph, not the checkpoints, so they must come from the same split.
+    """
+    df = pd.read_csv(DATA_PATH)
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+    target = RAW_TARGET.lower().replace(' ', '_')
+    if 'id' in df.columns:
+        df = df.drop(columns=['id'])
+    df[target] = df[target].astype(str).str.strip().str.lower().map(TARGET_MAPPING).astype(int)
+
+    features = df.drop(columns=[target])
+    numeric_cols = features.select_dtypes(include=['int64', 'float64']).columns.tolist()
+    categorical_cols = features.select_dtypes(include=['object', 'category']).columns.tolist()
+    train_df, _ = train_test_split(df, test_size=0.2, random_state=42)
+    return HeartDiseaseHyperModel(train_df, numeric_cols, categorical_cols)
+
+
+def best_trials(project_dir, top):
+    """(trial id, score, trial dir, hyperparameters) of the `top` completed trials with a checkpoint"""
+    trials = []
+    for trial_file in sorted(project_dir.glob("trial_*/trial.json")):
+        trial = json.loads(trial_file.read_text())
+        checkpoint = trial_file.parent / "checkpoint.weights.h5"
+        if trial.get('status') != 'COMPLETED' or trial.get('score') is None or not checkpoint.exists():
+            continue
+        trials.append((trial['trial_id'], trial['score'], trial_file.parent, trial['hyperparameters']))
+    # Every tuner in this repo maximises val_accuracy
+    return sorted(trials, key=lambda t: t[1], reverse=True)[:top]
+
+
+# ---------------------------------------------------
+# 3. EXPORT
+# ---------------------------------------------------
+def export_candidates(projects, top):
+    hypermodel = build_hypermodel()
+    CANDIDATE_DIR.mkdir(parents=True, exist_ok=True)
+
+    exported = 0
+    for project in projects:
+        project_dir = TUNER_DIR / project
+        trials = best_trials(project_dir, top)
+        if not trials:
+            logger.warning(f"{project_dir}: no completed trials with a checkpoint; skipping.")
+            continue
+
+        for trial_id, score, trial_dir, hp_config in trials:
+            checkpoint = trial_dir / "checkpoint.weights.h5"
+            logger.info(f"{project} trial {trial_id}: val_accuracy={score:.4f}, rebuilding from {checkpoint}...")
+            model = hypermodel.build(kt.HyperParameters.from_config(hp_config))
+            model.load_weights(checkpoint)
+
+            runtime = NumpyMLP.from_keras(model)
+            # The checkpoint hash becomes the candidate's model version in the backend
+            runtime.source_sha256 = file_sha256(checkpoint)
+            export_path = CANDIDATE_DIR / f"{project}_trial_{trial_id}.npz"
+            runtime.save(export_path)
+
+            runtime = NumpyMLP.load(export_path)
+            try:
+                matrix = load_validation_features(runtime.features)
+            except FileNotFoundError:
+                matrix = synthetic_features(runtime)
+            if not check_equivalence(model, runtime, matrix):
+                logger.error(f"Equivalence check FAILED for {export_path}; removing it.")
+                export_path.unlink()
+                continue
+            logger.info(f"✅ Exported {export_path}")
+            exported += 1
+
+    logger.info(f"{exported} candidate(s) in {CANDIDATE_DIR}. Serve them in shadow mode with "
+                f"SHADOW_MODELS={CANDIDATE_DIR.resolve()}")
+    return exported > 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the best tuner checkpoints as shadow candidates")
+    parser.add_argument("--project", action="append", dest="projects",
+                        help=f"Tuner project under {TUNER_DIR} (repeatable; default: {', '.join(DEFAULT_PROJECTS)})")
+    parser.add_argument("--top", type=int, default=3, help="Best trials to export per project")
+    args = parser.parse_args()
+    sys.exit(0 if export_candidates(args.projects or DEFAULT_PROJECTS, args.top) else 1)
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from sklearn.model_selection import train_test_split
+from pathlib import Path
+import logging
+import sys
+
+# The runtime lives with the backend so the API can import it without TensorFlow
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from numpy_runtime import NumpyMLP  # noqa: E402
+from engines import file_sha256  # noqa: E402
+
+# ---------------------------------------------------
+# 1. SETUP
+# ---------------------------------------------------
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger("Export")
+
+MODEL_PATH = Path("../artifacts_nn/best_nn_model.keras")
+EXPORT_PATH = Path("../artifacts_nn/best_nn_model.npz")
+DATA_PATH = "../dataset/train.csv"
+
+# Largest tolerated |keras - numpy| probability difference
+TOLERANCE = 1e-4
+
+
+def load_validation_features(features):
+    """Rebuild the 20% validation split used by train_model.py"""
+    df = pd.read_csv(DATA_PATH)
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+    _, val_df = train_test_split(df, test_size=0.2, random_state=42)
+    return val_df[features].to_numpy(dtype=np.float32)
+
+
+def synthetic_features(runtime, n_rows=20000):
+    """Sample rows from the Normalization statistics when train.csv is unavailable"""
+    rng = np.random.default_rng(42)
+    return rng.normal(runtime.norm_mean, np.sqrt(runtime.norm_var),
+                      size=(n_rows, len(runtime.features))).astype(np.float32)
+
+
+def check_equivalence(model, runtime, matrix):
+    model_inputs = {feature: matrix[:, i:i + 1] for i, feature in enumerate(runtime.features)}
+    keras_probs = model.predict(model_inputs, batch_size=4096, verbose=0)[:, 0]
+    numpy_probs = runtime.predict(matrix)
+
+    max_diff = float(np.max(np.abs(keras_probs - numpy_probs)))
+    agreement = float(np.mean((keras_probs > 0.5) == (numpy_probs > 0.5)))
+    logger.info(f"Rows compared: {len(matrix)}")
+    logger.info(f"Max |keras - numpy| probability difference: {max_diff:.2e}")
+    logger.info(f"Class agreement: {agreement:.4%}")
+    return max_diff <= TOLERANCE
+
+
+def export_model():
+    if not MODEL_PATH.exists():
+        logger.error(f"Model not found at {MODEL_PATH}. Run train_model.py first!")
+        return False
+
+    logger.info(f"Loading model from {MODEL_PATH}...")
+    model = tf.keras.models.load_model(MODEL_PATH)
+
+    runtime = NumpyMLP.from_keras(model)
+    runtime.source_sha256 = file_sha256(MODEL_PATH)
+    runtime.save(EXPORT_PATH)
+    logger.info(f"Exported {len(runtime.weights)} folded Dense layers to {EXPORT_PATH} "
+                f"({EXPORT_PATH.stat().st_size / 1024:.1f} KB)")
+
+    # Check the reloaded artifact, not the in-memory object
+    runtime = NumpyMLP.load(EXPORT_PATH)
+    try:
+        matrix = load_validation_features(runtime.features)
+        logger.info("Checking equivalence on the validation split...")
+    except FileNotFoundError:
+        matrix = synthetic_features(runtime)
+        logger.warning(f"{DATA_PATH} not found; checking equivalence on synthetic rows instead.")
+
+    if not check_equivalence(model, runtime, matrix):
+        logger.error(f"Equivalence check FAILED (tolerance {TOLERANCE:g}).")
+        return False
+
+    logger.info("✅ Equivalence check passed.")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if export_model() else 1)
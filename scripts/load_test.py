@@ -0,0 +1,283 @@
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import http.client
+import json
+import logging
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+# ---------------------------------------------------
+# 1. SETUP
+# ---------------------------------------------------
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger("LoadTest")
+
+BACKEND_DIR = Path("../backend")
+# Audit logs of the backend; forked workers write requests.<pid>.jsonl
+AUDIT_LOG_PATTERN = str(BACKEND_DIR / "logs" / "requests*.jsonl")
+OUTPUT_DIR = Path("load_test_results")
+
+# Plausible ranges for synthesized patients, keyed like the frontend form
+# (and therefore like FRONTEND_TO_BACKEND in backend/app.py)
+SYNTHETIC_RANGES = {
+    'Age': (29, 77),
+    'Sex': (0, 1),
+    'Chest pain type': (1, 4),
+    'BP': (94, 200),
+    'Cholesterol': (126, 564),
+    'FBS over 120': (0, 1),
+    'EKG results': (0, 2),
+    'Max HR': (71, 202),
+    'Exercise angina': (0, 1),
+    'ST depression': (0.0, 6.2),
+    'Slope of ST': (1, 3),
+    'Number of vessels fluro': (0, 3),
+    'Thallium': (3, 7)
+}
+
+# A rate is past the knee once it misses one of these
+KNEE_MIN_THROUGHPUT_RATIO = 0.95
+KNEE_MAX_ERROR_RATE = 0.01
+KNEE_MAX_P99_GROWTH = 3.0
+
+
+# ---------------------------------------------------
+# 2. PAYLOADS
+# ---------------------------------------------------
+def load_replay_payloads(pattern, limit):
+    """Request bodies recorded by the backend audit log (one JSON object per line)"""
+    pattern = Path(pattern)
+    payloads = []
+    for path in sorted(pattern.parent.glob(pattern.name)):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                payload = record.get('payload', record) if isinstance(record, dict) else None
+                if isinstance(payload, dict):
+                    payloads.append(payload)
+                if len(payloads) >= limit:
+                    return payloads
+    return payloads
+
+
+def synthesize_payloads(count, seed):
+    rng = np.random.default_rng(seed)
+    payloads = []
+    for _ in range(count):
+        payload = {}
+        for key, (low, high) in SYNTHETIC_RANGES.items():
+            if isinstance(low, float):
+                payload[key] = round(float(rng.uniform(low, high)), 1)
+            else:
+                payload[key] = int(rng.integers(low, high + 1))
+        payloads.append(payload)
+    return payloads
+
+
+# ---------------------------------------------------
+# 3. OPEN-LOOP DRIVER
+# ---------------------------------------------------
+class HttpClient:
+    """One keep-alive connection per worker thread"""
+
+    def __init__(self, url, timeout):
+        parsed = urllib.parse.urlsplit(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def post(self, path, body):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            raise
+
+
+def run_step(client, endpoint, bodies, rate, concurrency, duration):
+    """Fire requests at a fixed arrival rate for `duration` seconds.
+
+    Arrivals follow a fixed schedule whether or not earlier requests have
+    finished (open loop). Latency is measured from the scheduled arrival, so
+    time spent waiting for a free client thread counts against the server
+    instead of silently lowering the offered load.
+    """
+    total = max(int(rate * duration), 1)
+    latencies = np.full(total, np.nan)
+    statuses = [None] * total
+
+    def fire(i, scheduled):
+        try:
+            statuses[i] = client.post(endpoint, bodies[i % len(bodies)])
+        except Exception as e:
+            statuses[i] = type(e).__name__
+        latencies[i] = (time.perf_counter() - scheduled) * 1000.0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        for i in range(total):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, i, scheduled)
+    elapsed = time.perf_counter() - start
+
+    status_counts = {}
+    for status in statuses:
+        status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+    ok = np.array([status == 200 for status in statuses])
+    ok_latencies = latencies[ok]
+    p50, p95, p99, p999 = (np.percentile(ok_latencies, [50, 95, 99, 99.9]) if ok.any() else [float('nan')] * 4)
+
+    return {
+        'offered_rps': rate,
+        'concurrency': concurrency,
+        'requests': total,
+        'duration_s': elapsed,
+        'throughput_rps': ok.sum() / elapsed,
+        'error_rate': 1.0 - ok.mean(),
+        'status_counts': status_counts,
+        'latency_ms': {'p50': p50, 'p95': p95, 'p99': p99, 'p999': p999, 'max': np.nanmax(latencies)},
+    }
+
+
+def find_knee(steps):
+    """Highest offered rate the server still sustains, or None if even the first step is saturated"""
+    knee = None
+    baseline_p99 = None
+    for step in sorted(steps, key=lambda s: s['offered_rps']):
+        p99 = step['latency_ms']['p99']
+        if baseline_p99 is None:
+            baseline_p99 = p99
+        healthy = (
+            step['throughput_rps'] >= KNEE_MIN_THROUGHPUT_RATIO * step['offered_rps']
+            and step['error_rate'] <= KNEE_MAX_ERROR_RATE
+            and p99 <= KNEE_MAX_P99_GROWTH * baseline_p99
+        )
+        if not healthy:
+            break
+        knee = step['offered_rps']
+    return knee
+
+
+# ---------------------------------------------------
+# 4. SERVER
+# ---------------------------------------------------
+def start_server(kind, url, workers):
+    port = str(urllib.parse.urlsplit(url).port or 80)
+    if kind == 'asgi':
+        command = [sys.executable, '-m', 'uvicorn', 'asgi_app:app', '--port', port]
+    else:
+        command = [sys.executable, 'serve_workers.py', '--port', port, '--workers', str(workers)]
+    logger.info(f"Starting server: {' '.join(command)}")
+    process = subprocess.Popen(command, cwd=BACKEND_DIR)
+
+    parsed = urllib.parse.urlsplit(url)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=1)
+            conn.request('GET', '/ready')
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("Server did not become ready within 120 s")
+
+
+# ---------------------------------------------------
+# 5. REPORT
+# ---------------------------------------------------
+def print_summary(report):
+    header = (f"{'rps':>8}{'conc':>6}{'tput':>10}{'err %':>8}"
+              f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'p999 ms':>10}")
+    print("\n" + header)
+    print("-" * len(header))
+    for step in report['steps']:
+        lat = step['latency_ms']
+        print(f"{step['offered_rps']:>8g}{step['concurrency']:>6}{step['throughput_rps']:>10.1f}"
+              f"{step['error_rate'] * 100:>8.2f}{lat['p50']:>10.2f}{lat['p95']:>10.2f}"
+              f"{lat['p99']:>10.2f}{lat['p999']:>10.2f}")
+    for concurrency, knee in report['knee_rps'].items():
+        print(f"Saturation knee (concurrency {concurrency}): "
+              f"{f'{knee:g} rps' if knee is not None else 'below the lowest rate tested'}")
+
+
+def run_load_test(args):
+    payloads = load_replay_payloads(args.replay, args.max_payloads) if args.replay else []
+    source = args.replay
+    if not payloads:
+        payloads = synthesize_payloads(args.max_payloads, args.seed)
+        source = 'synthetic'
+    logger.info(f"Using {len(payloads)} payloads ({source})")
+    bodies = [json.dumps(p).encode() for p in payloads]
+
+    server = start_server(args.start_server, args.url, args.workers) if args.start_server else None
+    try:
+        client = HttpClient(args.url, args.timeout)
+        steps = []
+        for concurrency in args.concurrency:
+            for rate in args.rates:
+                logger.info(f"Offering {rate:g} rps with {concurrency} client threads for {args.duration:g} s")
+                steps.append(run_step(client, args.endpoint, bodies, rate, concurrency, args.duration))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        'url': args.url + args.endpoint,
+        'payload_source': source,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'steps': steps,
+        'knee_rps': {
+            c: find_knee([s for s in steps if s['concurrency'] == c]) for c in args.concurrency
+        },
+    }
+
+    output = Path(args.output) if args.output else OUTPUT_DIR / f"load_test_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, default=float))
+    print_summary(report)
+    logger.info(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Open-loop load test of the prediction API")
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--endpoint', default='/predict')
+    parser.add_argument('--rates', nargs='+', type=float, default=[50, 100, 200, 400, 800])
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[64])
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per rate step")
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--replay', default=AUDIT_LOG_PATTERN,
+                        help="JSON-lines file(s) of recorded payloads (glob allowed); "
+                             "synthesized payloads are used when none match")
+    parser.add_argument('--max-payloads', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--start-server', choices=['workers', 'asgi'],
+                        help="Launch the backend locally for the duration of the test")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes for --start-server workers")
+    parser.add_argument('--output', help="Where to write the JSON report")
+    run_load_test(parser.parse_args())
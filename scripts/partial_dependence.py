@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import argparse
+import logging
+import sys
+import time
+
+# The runtime lives with the backend so this job needs no TensorFlow
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from engines import model_version  # noqa: E402
+from numpy_runtime import NumpyMLP  # noqa: E402
+
+# ---------------------------------------------------
+# 1. SETUP
+# ---------------------------------------------------
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger("PartialDependence")
+
+MODEL_PATH = Path("../artifacts_nn/best_nn_model.keras")
+NUMPY_MODEL_PATH = Path("../artifacts_nn/best_nn_model.npz")
+OUTPUT_PATH = Path("../artifacts_nn/partial_dependence.npz")
+DATA_PATH = "../dataset/train.csv"
+TARGET = "heart_disease"
+
+SAMPLE_SIZE = 20000
+GRID_POINTS = 30
+# Features with at most this many distinct values are swept over exactly those values
+MAX_DISCRETE_VALUES = 12
+# Raw ICE curves kept per feature for plotting (the rest is summarised as quantiles)
+ICE_CURVES = 50
+ICE_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Rows per forward pass; one pass covers many sample rows x grid points
+BATCH_ROWS = 1 << 18
+
+
+def load_sample(path, features, sample_size, seed):
+    """Feature matrix of a sample stratified on the target, like the train/validation split"""
+    df = pd.read_csv(path)
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+    if TARGET in df.columns and sample_size < len(df):
+        fraction = sample_size / len(df)
+        df = df.groupby(TARGET, group_keys=False).sample(frac=fraction, random_state=seed)
+    elif sample_size < len(df):
+        df = df.sample(n=sample_size, random_state=seed)
+    logger.info(f"Sampled {len(df)} rows from {path}"
+                + (f" (target rate {df[TARGET].astype(str).str.lower().eq('presence').mean():.1%})"
+                   if TARGET in df.columns else ""))
+    return df[features].to_numpy(dtype=np.float32)
+
+
+def feature_grid(values, grid_points):
+    """Distinct values for discrete features, otherwise quantiles between the 1st and 99th percentile"""
+    distinct = np.unique(values)
+    if len(distinct) <= MAX_DISCRETE_VALUES:
+        return distinct.astype(np.float32)
+    quantiles = np.linspace(0.01, 0.99, grid_points)
+    return np.unique(np.quantile(values, quantiles)).astype(np.float32)
+
+
+def ice_curves(model, sample, column, grid):
+    """(n_sample, n_grid) probabilities with `column` set to every grid value, in large batches"""
+    n_sample, n_grid = len(sample), len(grid)
+    probs = np.empty(n_sample * n_grid, dtype=np.float32)
+    rows_per_pass = max(BATCH_ROWS // n_grid, 1)
+    for start in range(0, n_sample, rows_per_pass):
+        chunk = sample[start:start + rows_per_pass]
+        # Each sample row repeated once per grid point, with the swept column overwritten
+        matrix = np.repeat(chunk, n_grid, axis=0)
+        matrix[:, column] = np.tile(grid, len(chunk))
+        probs[start * n_grid:(start + len(chunk)) * n_grid] = model.predict(matrix)
+    return probs.reshape(n_sample, n_grid)
+
+
+# ---------------------------------------------------
+# 2. COMPUTE AND STORE
+# ---------------------------------------------------
+def compute_partial_dependence(data_path, output_path, sample_size, grid_points, seed):
+    if not NUMPY_MODEL_PATH.exists():
+        logger.error(f"{NUMPY_MODEL_PATH} not found. Run export_numpy_model.py first!")
+        return False
+    model = NumpyMLP.load(NUMPY_MODEL_PATH)
+    version = model_version(model, str(MODEL_PATH), str(NUMPY_MODEL_PATH))
+    try:
+        sample = load_sample(data_path, model.features, sample_size, seed)
+    except FileNotFoundError:
+        logger.error(f"{data_path} not found!")
+        return False
+
+    rng = np.random.default_rng(seed)
+    ice_rows = np.sort(rng.choice(len(sample), size=min(ICE_CURVES, len(sample)), replace=False))
+    arrays = {
+        'features': np.array(model.features),
+        'model_version': np.array(version),
+        'sample_size': np.array(len(sample)),
+        'ice_quantiles': np.array(ICE_QUANTILES, dtype=np.float32),
+        'created_at': np.array(time.time()),
+    }
+    start = time.perf_counter()
+    for column, feature in enumerate(model.features):
+        grid = feature_grid(sample[:, column], grid_points)
+        curves = ice_curves(model, sample, column, grid)
+        arrays[f'grid_{feature}'] = grid
+        arrays[f'pd_{feature}'] = curves.mean(axis=0)
+        arrays[f'ice_quantiles_{feature}'] = np.quantile(curves, ICE_QUANTILES, axis=0).astype(np.float32)
+        # Raw curves are only for drawing, so half precision is plenty
+        arrays[f'ice_{feature}'] = curves[ice_rows].astype(np.float16)
+        logger.info(f"{feature:<24} {len(grid):>3} grid points, PD range "
+                    f"{curves.mean(axis=0).min():.3f} .. {curves.mean(axis=0).max():.3f}")
+    logger.info(f"Scored {len(sample)} rows x {len(model.features)} features in {time.perf_counter() - start:.1f} s")
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix('.tmp.npz')
+    np.savez_compressed(tmp_path, **arrays)
+    tmp_path.replace(output_path)
+    logger.info(f"✅ Saved {output_path} ({output_path.stat().st_size / 1024:.1f} KB, model version {version})")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute partial-dependence and ICE curves for the backend")
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--output', type=Path, default=OUTPUT_PATH)
+    parser.add_argument('--sample-size', type=int, default=SAMPLE_SIZE)
+    parser.add_argument('--grid-points', type=int, default=GRID_POINTS)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    ok = compute_partial_dependence(args.data, args.output, args.sample_size, args.grid_points, args.seed)
+    sys.exit(0 if ok else 1)
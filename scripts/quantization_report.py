@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score, accuracy_score
+from sklearn.model_selection import train_test_split
+from pathlib import Path
+import json
+import logging
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from numpy_runtime import NumpyMLP  # noqa: E402
+from quantized_runtime import QuantizedMLP, QUANTIZATION_MODES  # noqa: E402
+
+# ---------------------------------------------------
+# 1. SETUP
+# ---------------------------------------------------
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger("Quantization")
+
+NUMPY_MODEL_PATH = Path("../artifacts_nn/best_nn_model.npz")
+DATA_PATH = "../dataset/train.csv"
+REPORT_PATH = Path("../artifacts_nn/quantization_report.json")
+RAW_TARGET = "Heart Disease"
+
+TARGET_MAPPING = {
+    'presence': 1, 'absence': 0, 'yes': 1, 'no': 0, '1': 1, '0': 0,
+    'true': 1, 'false': 0, '1.0': 1, '0.0': 0
+}
+
+# Batch sizes used for the throughput measurement
+THROUGHPUT_BATCHES = [1, 64, 4096]
+
+
+# ---------------------------------------------------
+# 2. DATA: THE SAME 20% HOLD-OUT AS train_model.py
+# ---------------------------------------------------
+def load_validation_split(features):
+    df = pd.read_csv(DATA_PATH)
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+    target_clean = RAW_TARGET.lower().replace(' ', '_')
+    df[target_clean] = df[target_clean].astype(str).str.strip().str.lower().map(TARGET_MAPPING)
+    _, val_df = train_test_split(df, test_size=0.2, random_state=42)
+    return val_df[features].to_numpy(dtype=np.float32), val_df[target_clean].to_numpy()
+
+
+def saved_bytes(engine):
+    """Size of the engine's .npz file, where quantization actually saves space"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "engine.npz"
+        engine.save(path)
+        return path.stat().st_size
+
+
+def measure_throughput(engine, matrix, batch_size, min_seconds=0.5):
+    """Rows scored per second at a fixed batch size"""
+    batch = np.ascontiguousarray(matrix[:batch_size])
+    engine.predict(batch)
+    rows, start = 0, time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        engine.predict(batch)
+        rows += len(batch)
+    return rows / (time.perf_counter() - start)
+
+
+# ---------------------------------------------------
+# 3. REPORT
+# ---------------------------------------------------
+def generate_quantization_report():
+    if not NUMPY_MODEL_PATH.exists():
+        logger.error(f"Model not found at {NUMPY_MODEL_PATH}. Run export_numpy_model.py first!")
+        return
+
+    baseline = NumpyMLP.load(NUMPY_MODEL_PATH)
+    engines = {'float32': baseline}
+    for mode in QUANTIZATION_MODES:
+        engines[mode] = QuantizedMLP(baseline, mode)
+
+    try:
+        matrix, labels = load_validation_split(baseline.features)
+    except FileNotFoundError:
+        logger.error(f"{DATA_PATH} not found.")
+        return
+    logger.info(f"Validation rows: {len(matrix)}")
+
+    baseline_probs = baseline.predict(matrix)
+    report = {}
+    for name, engine in engines.items():
+        probs = engine.predict(matrix)
+        report[name] = {
+            'auc': float(roc_auc_score(labels, probs)),
+            'accuracy': float(accuracy_score(labels, probs > 0.5)),
+            'max_prob_delta_vs_float32': float(np.max(np.abs(probs - baseline_probs))),
+            'class_agreement_vs_float32': float(np.mean((probs > 0.5) == (baseline_probs > 0.5))),
+            'resident_bytes': int(engine.weight_bytes()),
+            'file_bytes': int(saved_bytes(engine)),
+            'rows_per_second': {
+                str(b): float(measure_throughput(engine, matrix, b)) for b in THROUGHPUT_BATCHES
+            },
+        }
+
+    REPORT_PATH.write_text(json.dumps(report, indent=2))
+    logger.info(f"Report saved to {REPORT_PATH}")
+    # The quantized engines multiply dequantized float32 kernels: expect float32 speed and memory, smaller files
+
+    header = f"{'engine':<10}{'AUC':>9}{'ΔAUC':>10}{'acc':>9}{'Δacc':>10}{'agree':>9}{'RAM KB':>8}{'file KB':>9}" + \
+        ''.join(f"{'rows/s@' + str(b):>16}" for b in THROUGHPUT_BATCHES)
+    print("\n" + header)
+    print("-" * len(header))
+    for name, row in report.items():
+        print(f"{name:<10}{row['auc']:>9.4f}{row['auc'] - report['float32']['auc']:>+10.4f}"
+              f"{row['accuracy']:>9.4f}{row['accuracy'] - report['float32']['accuracy']:>+10.4f}"
+              f"{row['class_agreement_vs_float32']:>9.4f}{row['resident_bytes'] / 1024:>8.1f}"
+              f"{row['file_bytes'] / 1024:>9.1f}" +
+              ''.join(f"{row['rows_per_second'][str(b)]:>16,.0f}" for b in THROUGHPUT_BATCHES))
+
+
+if __name__ == "__main__":
+    generate_quantization_report()
@@ -0,0 +1,106 @@
+import sys
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from batching import DeadlineExceeded, MicroBatcher  # noqa: E402
+
+
+def blocking_batcher(**kwargs):
+    """MicroBatcher whose forward pass waits for `release`; rows score as their first feature"""
+    release = threading.Event()
+
+    def predict(matrix):
+        release.wait(5)
+        return matrix[:, 0]
+
+    shed = []
+    batcher = MicroBatcher(predict, max_batch_size=1, max_wait_ms=1, on_expired=shed.append, **kwargs)
+    return batcher, release, shed
+
+
+def test_rows_past_their_deadline_are_dropped_unscored():
+    batcher, release, shed = blocking_batcher()
+    busy = batcher.submit(np.array([1.0]))
+    queued = batcher.submit(np.array([2.0]), deadline=time.perf_counter() + 0.01)
+    time.sleep(0.05)
+    release.set()
+
+    assert busy.result(timeout=5) == 1.0
+    with pytest.raises(DeadlineExceeded):
+        queued.result(timeout=5)
+    assert batcher.stats()['rows'] == 1
+    assert batcher.stats()['expired'] == 1
+    assert shed == [1]
+
+
+def test_a_caller_that_stops_waiting_cancels_its_row():
+    batcher, release, shed = blocking_batcher()
+    busy = batcher.submit(np.array([1.0]))
+    with pytest.raises(FutureTimeout):
+        batcher.predict(np.array([2.0]), timeout=0.02)
+    release.set()
+
+    assert busy.result(timeout=5) == 1.0
+    deadline = time.perf_counter() + 5
+    while batcher.stats()['expired'] == 0 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    assert batcher.stats()['rows'] == 1
+    assert shed == [1]
+
+
+def test_predict_raises_deadline_exceeded_at_the_deadline():
+    batcher, release, _ = blocking_batcher()
+    batcher.submit(np.array([1.0]))
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        batcher.predict(np.array([2.0]), deadline=start + 0.02)
+    assert time.perf_counter() - start < 1.0
+    release.set()
+
+
+def test_concurrent_rows_are_scored_in_one_forward_pass():
+    batch_sizes = []
+
+    def predict(matrix):
+        batch_sizes.append(len(matrix))
+        return matrix[:, 0] * 10.0
+
+    batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=200)
+    futures = [batcher.submit(np.array([float(i), 0.0])) for i in range(5)]
+
+    # Each future gets its own row's result, in submission order
+    assert [f.result(timeout=5) for f in futures] == [0.0, 10.0, 20.0, 30.0, 40.0]
+    assert batch_sizes == [5]
+    assert batcher.stats()['batches'] == 1 and batcher.stats()['rows'] == 5
+
+
+def test_batches_are_capped_at_max_batch_size():
+    batch_sizes = []
+
+    def predict(matrix):
+        batch_sizes.append(len(matrix))
+        return np.zeros(len(matrix))
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=200)
+    futures = [batcher.submit(np.zeros(2)) for _ in range(10)]
+    for future in futures:
+        future.result(timeout=5)
+    assert max(batch_sizes) <= 4 and sum(batch_sizes) == 10
+
+
+def test_tagged_batcher_returns_the_tag_and_propagates_errors():
+    batcher = MicroBatcher(lambda matrix: (np.full(len(matrix), 0.25), 'v1'), tagged=True)
+    assert batcher.predict(np.zeros(3), timeout=5) == (0.25, 'v1')
+
+    def broken(matrix):
+        raise RuntimeError("engine failed")
+
+    failing = MicroBatcher(broken)
+    with pytest.raises(RuntimeError, match="engine failed"):
+        failing.predict(np.zeros(3), timeout=5)
@@ -0,0 +1,102 @@
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pandas")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from bulk_jobs import BulkJobManager  # noqa: E402
+
+CSV = b'id,age,note\n1,50,"two\nlines"\n2,61,plain\n3,,missing\n'
+
+
+def score_frame(frame, first_row):
+    """Doubles 'age'; rows without one are errors"""
+    return {
+        'id': frame['id'].to_numpy(),
+        'score': (frame['age'] * 2).to_numpy(),
+        'error': ['no age' if age != age else None for age in frame['age']],
+    }
+
+
+def wait_finished(manager, job, seconds=10):
+    deadline = time.time() + seconds
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def upload(manager, data, filename='patients.csv'):
+    job = manager.create(filename, 'csv')
+    manager.append_upload(job, data)
+    return job
+
+
+def test_job_scores_every_row_and_publishes_the_result(tmp_path):
+    manager = BulkJobManager(score_frame, str(tmp_path), chunk_rows=2, niceness=0)
+    job = upload(manager, CSV)
+    assert job.status == 'uploading'
+    manager.start(job)
+    wait_finished(manager, job)
+
+    assert job.status == 'succeeded'
+    # The quoted newline is one record, not two
+    assert job.to_dict()['rows_total'] == 3
+    assert job.rows_done == 3 and job.rows_failed == 1
+    assert job.to_dict()['progress'] == 1.0
+    assert sorted(os.listdir(job.dir)) == ['result.csv']
+    assert Path(job.result_path).read_text().splitlines()[0] == 'id,score,error'
+
+
+def test_cancel_while_uploading_finishes_the_job_at_once(tmp_path):
+    manager = BulkJobManager(score_frame, str(tmp_path), niceness=0)
+    job = upload(manager, CSV)
+    manager.cancel(job.id)
+    assert job.status == 'cancelled'
+
+    manager.append_upload(job, CSV)
+    manager.start(job)
+    time.sleep(0.1)
+    assert job.status == 'cancelled'
+    assert not os.path.exists(job.input_path) and not os.path.exists(job.result_path)
+
+
+def test_cancel_while_running_leaves_no_partial_result(tmp_path):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_score(frame, first_row):
+        started.set()
+        release.wait(5)
+        return score_frame(frame, first_row)
+
+    manager = BulkJobManager(slow_score, str(tmp_path), chunk_rows=1, niceness=0)
+    job = upload(manager, CSV)
+    manager.start(job)
+    assert started.wait(5)
+    manager.cancel(job.id)
+    assert job.status == 'running'
+    release.set()
+    wait_finished(manager, job)
+
+    assert job.status == 'cancelled'
+    assert os.listdir(job.dir) == []
+
+
+def test_failed_job_reports_the_error_and_leaves_no_partial_result(tmp_path):
+    def failing_score(frame, first_row):
+        if first_row > 0:
+            raise RuntimeError("model unavailable")
+        return score_frame(frame, first_row)
+
+    manager = BulkJobManager(failing_score, str(tmp_path), chunk_rows=1, niceness=0)
+    job = upload(manager, CSV)
+    manager.start(job)
+    wait_finished(manager, job)
+
+    assert job.status == 'failed'
+    assert job.error == 'RuntimeError: model unavailable'
+    assert job.rows_done == 1
+    assert os.listdir(job.dir) == []
@@ -0,0 +1,55 @@
+import sys
+from types import SimpleNamespace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+ARTIFACTS = Path(__file__).resolve().parent.parent / "artifacts_nn"
+sys.path.insert(0, str(BACKEND))
+from attributions import reference_patient  # noqa: E402
+from engines import load_engine  # noqa: E402
+from numpy_runtime import NumpyMLP  # noqa: E402
+from shared_weights import write_shared_weights  # noqa: E402
+
+KERAS_PATH = str(ARTIFACTS / "best_nn_model.keras")
+NUMPY_PATH = str(ARTIFACTS / "best_nn_model.npz")
+
+pytestmark = pytest.mark.skipif(not Path(NUMPY_PATH).exists(), reason="NumPy export not generated")
+
+
+@pytest.fixture(scope="module")
+def exported():
+    return NumpyMLP.load(NUMPY_PATH)
+
+
+@pytest.mark.parametrize("kind", ['numpy', 'int8', 'float16', 'mmap', 'keras', 'traced'])
+def test_baseline_is_one_value_per_model_input(kind, exported, tmp_path):
+    if kind in ('keras', 'traced'):
+        pytest.importorskip("tensorflow")
+    shared_path = str(tmp_path / "weights")
+    if kind == 'mmap':
+        write_shared_weights(exported, shared_path)
+    engine = load_engine(kind, exported.features, KERAS_PATH, NUMPY_PATH, shared_path=shared_path)
+
+    midpoints = np.zeros(len(exported.features))
+    baseline = reference_patient(engine, midpoints, exported)
+
+    assert baseline.shape == (len(exported.features),)
+    assert np.asarray(engine.predict(baseline[None, :])).reshape(-1).shape == (1,)
+    assert np.allclose(baseline[exported.numeric_columns], exported.norm_mean)
+    for column, vocabulary, _ in exported.categorical:
+        assert baseline[column] == vocabulary[0]
+
+
+def test_categorical_columns_get_their_most_frequent_value():
+    # Column 1 is categorical: norm_mean only covers columns 0 and 2
+    engine = SimpleNamespace(numeric_columns=np.array([0, 2]), norm_mean=np.array([50.0, 7.5]),
+                             categorical=[(1, np.array([3.0, 1.0, 2.0]), None)])
+    baseline = reference_patient(engine, [0.0, 0.0, 0.0])
+    assert baseline.tolist() == [50.0, 3.0, 7.5]
+
+
+def test_engines_without_statistics_keep_the_midpoints():
+    assert reference_patient(SimpleNamespace(), [1.0, 2.0]).tolist() == [1.0, 2.0]
@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from input_schema import BOOLEAN_VOCABULARY, FeatureSpec, InputSchema  # noqa: E402
+
+FEATURES = [
+    FeatureSpec('age', aliases=('Age',), low=0, high=120, default=50.0),
+    FeatureSpec('exercise_angina', aliases=('Exercise angina',), vocabulary=BOOLEAN_VOCABULARY, low=0, high=1),
+    FeatureSpec('st_depression', aliases=('ST depression',), low=0, high=10),
+]
+
+
+def codes(errors, row):
+    return [(e['field'], e['code']) for e in errors[row]]
+
+
+def test_aliases_words_and_numeric_strings_are_converted():
+    schema = InputSchema(FEATURES)
+    matrix, valid_rows, errors = schema.to_matrix([
+        {'Age': '61', 'Exercise angina': 'Yes', 'st_depression': 1.5},
+        {'age': 40, 'exercise angina': False, 'ST depression': '0'},
+    ])
+    assert valid_rows == [0, 1] and errors == {}
+    assert matrix.dtype == np.float32 and matrix.flags['F_CONTIGUOUS']
+    np.testing.assert_array_equal(matrix, [[61, 1, 1.5], [40, 0, 0]])
+
+
+def test_every_bad_field_of_a_row_is_reported():
+    schema = InputSchema(FEATURES)
+    _, valid_rows, errors = schema.to_matrix([
+        {'age': 'old', 'exercise_angina': 'maybe', 'st_depression': 11},
+        {'age': float('nan')},
+        'not a patient',
+        {'age': 30},
+    ])
+    assert valid_rows == [3]
+    assert codes(errors, 0) == [('age', 'invalid_value'), ('exercise_angina', 'invalid_value'),
+                                ('st_depression', 'out_of_range')]
+    assert codes(errors, 1) == [('age', 'out_of_range')]
+    assert codes(errors, 2) == [(None, 'not_an_object')]
+    assert errors[0][2]['message'] == 'st_depression=11 is outside [0, 10]'
+
+
+def test_missing_features_are_filled_or_rejected_by_policy():
+    filled, valid_rows, errors = InputSchema(FEATURES).to_matrix([{'age': 70, 'st_depression': ''}])
+    assert valid_rows == [0] and errors == {}
+    np.testing.assert_array_equal(filled, [[70, 0, 0]])
+
+    _, valid_rows, errors = InputSchema(FEATURES, missing_policy='reject').to_matrix([{'age': 70}])
+    assert valid_rows == []
+    assert codes(errors, 0) == [('exercise_angina', 'missing'), ('st_depression', 'missing')]
+
+    with pytest.raises(ValueError):
+        InputSchema(FEATURES, missing_policy='ignore')
+
+
+def test_columns_to_matrix_treats_nan_cells_as_missing():
+    schema = InputSchema(FEATURES, missing_policy='reject')
+    matrix, valid_rows, errors = schema.columns_to_matrix({
+        'Age': np.array([61, 200]),
+        'Exercise angina': np.array(['yes', 'no'], dtype=object),
+        'ST depression': np.array([1.5, np.nan]),
+    }, 2)
+    assert valid_rows == [0]
+    np.testing.assert_array_equal(matrix[0], [61, 1, 1.5])
+    assert codes(errors, 1) == [('age', 'out_of_range'), ('st_depression', 'missing')]
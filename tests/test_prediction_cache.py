@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from prediction_cache import PredictionCache  # noqa: E402
+
+ROW = np.array([61.0, 1.0, 0.0], dtype=np.float32)
+
+
+def test_entries_expire_after_the_ttl():
+    cache = PredictionCache(ttl_seconds=0.05)
+    cache.put(ROW, 0.7)
+    assert cache.get(ROW) == 0.7
+    time.sleep(0.1)
+    assert cache.get(ROW) is None
+    assert cache.stats()['expirations'] == 1 and cache.stats()['size'] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_size=2)
+    cache.put([1.0], 0.1)
+    cache.put([2.0], 0.2)
+    cache.get([1.0])
+    cache.put([3.0], 0.3)
+    assert cache.get([2.0]) is None
+    assert cache.get([1.0]) == 0.1 and cache.get([3.0]) == 0.3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_keys_are_the_float32_feature_vector():
+    cache = PredictionCache()
+    cache.put([0.0, 1.0], 0.5)
+    assert cache.get(np.array([-0.0, 1.0], dtype=np.float64)) == 0.5
+    assert cache.get([0.0, 1.00000001]) == 0.5
+    assert cache.get([0.0, 1.1]) is None
+
+
+def test_changing_a_watched_model_file_empties_the_cache(tmp_path):
+    model = tmp_path / "model.npz"
+    model.write_bytes(b"v1")
+    cache = PredictionCache(watched_paths=[str(model)], check_interval=0.0)
+    cache.put(ROW, 0.7)
+    assert cache.get(ROW) == 0.7
+
+    model.write_bytes(b"version 2")
+    os.utime(model, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+    assert cache.get(ROW) is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = PredictionCache(max_size=0)
+    cache.put(ROW, 0.7)
+    assert cache.get(ROW) is None and cache.stats()['size'] == 0
@@ -0,0 +1,44 @@
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from numpy_runtime import NumpyMLP  # noqa: E402
+from shared_weights import KEEP_VERSIONS, load_shared_weights, resolve_shared_weights, write_shared_weights  # noqa: E402
+
+NUMPY_PATH = Path(__file__).resolve().parent.parent / "artifacts_nn" / "best_nn_model.npz"
+
+pytestmark = pytest.mark.skipif(not NUMPY_PATH.exists(), reason="NumPy export not generated")
+
+
+def test_pointer_names_a_complete_content_hashed_pair(tmp_path):
+    mlp = NumpyMLP.load(str(NUMPY_PATH))
+    path = str(tmp_path / "weights")
+    blob_path = write_shared_weights(mlp, path)
+
+    assert resolve_shared_weights(path) == blob_path
+    assert os.path.exists(blob_path + '.json')
+    # The same model always lands in the same pair
+    assert write_shared_weights(mlp, path) == blob_path
+
+    matrix = np.random.default_rng(0).random((4, len(mlp.features)), dtype=np.float32)
+    assert np.allclose(load_shared_weights(path).predict(matrix), mlp.predict(matrix))
+
+
+def test_new_versions_swap_the_pointer_and_prune_old_pairs(tmp_path):
+    mlp = NumpyMLP.load(str(NUMPY_PATH))
+    path = str(tmp_path / "weights")
+    written = []
+    for step in range(KEEP_VERSIONS + 2):
+        mlp.biases[-1] = mlp.biases[-1] + 1.0
+        written.append(write_shared_weights(mlp, path))
+
+    assert resolve_shared_weights(path) == written[-1]
+    assert len(set(written)) == len(written)
+    for blob_path in written[-KEEP_VERSIONS:]:
+        assert os.path.exists(blob_path) and os.path.exists(blob_path + '.json')
+    for blob_path in written[:-KEEP_VERSIONS]:
+        assert not os.path.exists(blob_path) and not os.path.exists(blob_path + '.json')